@@ -3,22 +3,142 @@
 # Purpose: Find invertible nitrogens, and calculate their sum of angles 
 #          for classification of geometry from planar to pyramidal.
 # Usage: python am1wib.py -i input.sdf -o output.dat -p barplot-angles.dat
+#        python am1wib.py -i input.sdf -t output.csv
+#        python am1wib.py -i input.sdf -t output.npy
 
 import argparse
-import math
 import os, sys
-import openeye.oechem as oechem
-import openeye.oequacpac as oequacpac
+import numpy as np
+import journal
+import charge_cache
+import geometry
 
+# name of the charge model in the charge cache
+CACHE_MODEL = 'am1bccsym'
+
+# columns of the table output, one row per bond of each invertible N,
+# and their NumPy types
+TABLE_COLUMNS = ['molecule', 'conformer', 'n_index', 'angle_sum', 'nbor_index', 'wiberg']
+TABLE_TYPES = {'conformer': 'i4', 'n_index': 'i4', 'angle_sum': 'f8',
+               'nbor_index': 'i4', 'wiberg': 'f8', 'height': 'f8'}
+
+
+def charge_wiberg(mol, charged):
+    """
+    Assign AM1-BCC charges to a molecule and get its Wiberg bond orders.
+
+    Parameters
+    ----------
+    mol: OEMol whose bonds are used as keys of the output
+    charged: copy of mol (or of one of its conformers) to charge,
+        with the same bond order as mol
+
+    Returns
+    -------
+    dict of Wiberg bond order of each bond index of mol
+
+    """
+    import openeye.oequacpac as oequacpac
+
+    status = oequacpac.OEAssignPartialCharges(charged, oequacpac.OECharges_AM1BCCSym, False, False)
+    if not status:
+        raise(RuntimeError("OEAssignPartialCharges returned error code %s" % status))
+    return {bond.GetIdx(): cbond.GetData("WibergBondOrder")
+            for bond, cbond in zip(mol.GetBonds(), charged.GetBonds())}
+
+
+def cached_wiberg(mol, cache):
+    """
+    Get the Wiberg bond orders of a molecule from the charge cache,
+    charging a copy and adding it to the cache if not found.
+
+    Parameters
+    ----------
+    mol: OEMol
+    cache: charge_cache.ChargeCache
+
+    Returns
+    -------
+    dict of Wiberg bond order of each bond index of mol
 
-def am1wib(insdf, outdat, plotout=None):
+    """
+    import openeye.oechem as oechem
+
+    charged = oechem.OEMol(mol)
+    if cache.lookup_mol(charged, CACHE_MODEL):
+        return {bond.GetIdx(): cbond.GetData("WibergBondOrder")
+                for bond, cbond in zip(mol.GetBonds(), charged.GetBonds())}
+    wibergs = charge_wiberg(mol, charged)
+    cache.store_mol(charged, CACHE_MODEL)
+    return wibergs
+
+
+def conf_coords(mol):
+    """
+    Get the coordinates of all conformers of a molecule.
+
+    Parameters
+    ----------
+    mol: OEMol
+
+    Returns
+    -------
+    numpy array of shape (nconfs, natoms, 3), indexed by atom index
+
+    """
+    import openeye.oechem as oechem
+
+    natoms = mol.GetMaxAtomIdx()
+    buf = oechem.OEFloatArray(3*natoms)
+    coords = np.empty((mol.NumConfs(), natoms, 3))
+    for i, conf in enumerate(mol.GetConfs()):
+        conf.GetCoords(buf)
+        coords[i] = np.fromiter(buf, np.float64, 3*natoms).reshape(natoms, 3)
+    return coords
+
+
+def format_csv_rows(rows):
+    """
+    Format table rows as CSV text, with the molecule title quoted.
+    """
+    return ''.join('"{}",{}\n'.format(row[0].replace('"', '""'),
+                   ','.join(repr(v) for v in row[1:])) for row in rows)
+
+
+def save_table_npy(filename, rows, columns=TABLE_COLUMNS):
+    """
+    Save table rows as a NumPy structured array with the given
+    columns, readable with np.load(filename).
+    """
+    width = max([len(row[0]) for row in rows] + [1])
+    dtype = [('molecule', 'U%d' % width)] + [(c, TABLE_TYPES[c]) for c in columns[1:]]
+    np.save(filename, np.array([tuple(row) for row in rows], dtype=dtype))
+
+
+def am1wib(insdf, outdat, plotout=None, journalfile=None, per_conf=False,
+           cachefile=None, tableout=None, heights=False):
     """
     Parameters
     ----------
     insdf: string, name of SDF file
+    outdat: string, name of text file for output, or None for no text output
+    plotout: string, name of text file for plot-friendly output
+    journalfile: string, name of journal file for checkpointing. If it
+        already exists, molecules it lists as finished are skipped.
+    per_conf: bool, recompute charges and Wiberg bond orders for each
+        conformer instead of once per molecule
+    cachefile: string, name of charge cache file for looking up and storing
+        Wiberg bond orders, so molecules from earlier runs are not charged
+        again. Not used with per_conf.
+    tableout: string, name of file for table output with one row per bond
+        of each invertible N and the columns of TABLE_COLUMNS. Written as
+        CSV text, or as a NumPy structured array if the extension is .npy.
+    heights: bool, also report the out-of-plane height of each invertible N
+        above the plane of its neighbors, as the last table column
 
     """
-    outf = open(outdat, 'w')
+    import openeye.oechem as oechem
+
     ### Read in .sdf file and distinguish each molecule's conformers
     ifs = oechem.oemolistream()
     ifs.SetConfTest( oechem.OEAbsoluteConfTest() )
@@ -26,57 +146,120 @@ def am1wib(insdf, outdat, plotout=None):
         oechem.OEThrow.Warning("Unable to open %s for reading" % insdf)
         return
 
+    cache = None
+    if cachefile is not None and not per_conf:
+        cache = charge_cache.ChargeCache(cachefile)
+
+    ### Open outputs, continuing from the journal if given
+    jnl = None
     angList = [] # for plotting
     labelList = [] # for plotting
-    for mol in ifs.GetOEMols():
+    tableRows = [] # for .npy table, which is written at the end
+    npy = tableout is not None and os.path.splitext(tableout)[1] == '.npy'
+    outputs = [f for f in (outdat, None if npy else tableout) if f is not None]
+    if journalfile is not None:
+        jnl = journal.Journal(journalfile)
+        outfs = [jnl.open_output(f) for f in outputs]
+        for results in jnl.results():
+            angList.extend(results['angles'])
+            labelList.extend(results['labels'])
+            tableRows.extend(results.get('rows', []))
+    else:
+        outfs = [open(f, 'wb') for f in outputs]
+    outf = outfs[0] if outdat is not None else None
+    csvf = outfs[-1] if tableout is not None and not npy else None
+    columns = TABLE_COLUMNS + ['height'] if heights else TABLE_COLUMNS
+    if csvf is not None and csvf.tell() == 0:
+        csvf.write((','.join(columns) + '\n').encode())
+
+    for molIdx, mol in enumerate(ifs.GetOEMols()):
         molName = mol.GetTitle()
-        outf.write('\n\n>>> Molecule: %s\tNumConfs: %d' % (molName, mol.NumConfs()))
+        if jnl is not None and molIdx < len(jnl):
+            jnl.check(molIdx, molName)
+            continue
+
+        # buffer output lines and results of this molecule
+        lines = ['\n\n>>> Molecule: %s\tNumConfs: %d' % (molName, mol.NumConfs())]
+        molAngs = []
+        molLabels = []
+        molRows = []
+
+        ### AM1-BCC charge calculation on a copy, once for all conformers
+        if cache is not None:
+            wibergs = cached_wiberg(mol, cache)
+        elif not per_conf:
+            wibergs = charge_wiberg(mol, oechem.OEMol(mol))
+
+        ### Find invertible N's and their bonds, which are the same for all conformers
+        nitrogens = list(mol.GetAtoms(oechem.OEIsInvertibleNitrogen()))
+        centers = [atom.GetIdx() for atom in nitrogens]
+        nbors = [[nbor.GetIdx() for nbor in atom.GetAtoms()][:3] for atom in nitrogens]
+        nbonds = [[(bond.GetIdx(), bond.GetNbr(atom).GetIdx()) for bond in atom.GetBonds()]
+                  for atom in nitrogens]
+
+        ### Sum angles around each invertible N for all conformers at once
+        if centers:
+            coords = conf_coords(mol)
+            angSums = geometry.angle_sums(coords, centers, nbors).tolist()
+            if heights:
+                nHeights = geometry.pyramid_heights(coords, centers, nbors).tolist()
+
         for i, conf in enumerate( mol.GetConfs()):
 
-            ### AM1-BCC charge calculation
-            charged_copy = oechem.OEMol(mol)
-            status = oequacpac.OEAssignPartialCharges(charged_copy, oequacpac.OECharges_AM1BCCSym, False, False)
-            if not status:
-                raise(RuntimeError("OEAssignPartialCharges returned error code %s" % status))
-
-            ### Our copy has the charges we want but not the right conformation.
-            ### Copy charges over. Also copy over Wiberg bond orders.
-            partial_charges = []
-            partial_bondorders = []
-            for atom in charged_copy.GetAtoms():
-                partial_charges.append( atom.GetPartialCharge() )
-            for (idx,atom) in enumerate(mol.GetAtoms()):
-                atom.SetPartialCharge( partial_charges[idx] )
-            for bond in charged_copy.GetBonds():
-                partial_bondorders.append( bond.GetData("WibergBondOrder"))
-            for (idx, bond) in enumerate(mol.GetBonds()):
-                bond.SetData("WibergBondOrder", partial_bondorders[idx])
-
-            ### Sum angles around each invertible N, and get Wiberg bond order.
-            for atom in conf.GetAtoms(oechem.OEIsInvertibleNitrogen()):
-                aidx = atom.GetIdx()
-                nbors = list(atom.GetAtoms())
-                ang1 = math.degrees(oechem.OEGetAngle(conf, nbors[0],atom,nbors[1]))
-                ang2 = math.degrees(oechem.OEGetAngle(conf, nbors[1],atom,nbors[2]))
-                ang3 = math.degrees(oechem.OEGetAngle(conf, nbors[2],atom,nbors[0]))
-                ang_sum = math.fsum([ang1,ang2,ang3])
-                outf.write("\n\n%s: sum of angles for N, index %d: %f" % (molName, aidx, ang_sum))
-                angList.append(ang_sum)
-                labelList.append("{}_{}_{}".format(molName,i,aidx))
-
-                for bond in atom.GetBonds():
-                    nbor = bond.GetNbr(atom)
-                    nidx = nbor.GetIdx()
-                    nbor_wib = bond.GetData('WibergBondOrder')
-                    outf.write("\n{}: wiberg bond order for indices {} {}: {}".format(molName, aidx, nidx, nbor_wib))
+            ### Charge a copy of only this conformer for conformer-dependent values
+            if per_conf:
+                wibergs = charge_wiberg(mol, oechem.OEMol(conf))
+
+            ### Report angle sums and Wiberg bond orders of each invertible N
+            for j, aidx in enumerate(centers):
+                ang_sum = angSums[i][j]
+                lines.append("\n\n%s: sum of angles for N, index %d: %f" % (molName, aidx, ang_sum))
+                if heights:
+                    lines.append("\n%s: out-of-plane height for N, index %d: %f" % (molName, aidx, nHeights[i][j]))
+                molAngs.append(ang_sum)
+                molLabels.append("{}_{}_{}".format(molName,i,aidx))
+
+                for bidx, nidx in nbonds[j]:
+                    nbor_wib = wibergs[bidx]
+                    lines.append("\n{}: wiberg bond order for indices {} {}: {}".format(molName, aidx, nidx, nbor_wib))
+                    row = [molName, i, aidx, ang_sum, nidx, nbor_wib]
+                    if heights:
+                        row.append(nHeights[i][j])
+                    molRows.append(row)
+
+        ### Write all output of this molecule at once
+        if outf is not None:
+            outf.write(''.join(lines).encode())
+        if csvf is not None:
+            csvf.write(format_csv_rows(molRows).encode())
+        angList.extend(molAngs)
+        labelList.extend(molLabels)
+        if npy:
+            tableRows.extend(molRows)
+        if jnl is not None:
+            results = {'angles': molAngs, 'labels': molLabels}
+            if npy:
+                results['rows'] = molRows
+            jnl.record(molIdx, molName, results)
 
     if plotout is not None:
         with open(plotout,'w') as f:
             lis = [list(range(len(angList))), angList, labelList]
             for x in zip(*lis):
                 f.write("{0}\t{1}\t{2}\n".format(*x))
+    if npy:
+        save_table_npy(tableout, tableRows, columns)
 
     ifs.close()
+    if jnl is not None:
+        jnl.close()
+    else:
+        for f in outfs:
+            f.close()
+    if cache is not None:
+        print("Charge cache {}: {} hit(s), {} miss(es).".format(
+              cachefile, cache.hits, cache.misses))
+        cache.close()
 
 
 if __name__ == "__main__":
@@ -86,18 +269,36 @@ if __name__ == "__main__":
     req.add_argument("-i", "--input",
         help="Name of SDF file to be processed.")
     req.add_argument("-o", "--output",
-        help="Name of text file for output.")
+        help="Name of text file for output. Optional if --table is given.")
     req.add_argument("-p", "--plotout",
         help="Name of text file for plot-friendly output. "+
              "Each angle has label of molTitle_confIdx_atomIdx.")
+    parser.add_argument("-t", "--table",
+        help="Name of file for table output, with one row per bond of each "
+             "invertible N: molecule, conformer, N index, angle sum, neighbor "
+             "index, Wiberg bond order. CSV, or NumPy binary if ending in .npy.")
+    parser.add_argument("--heights", action="store_true", default=False,
+        help="Also report the out-of-plane height of each invertible N above "
+             "the plane of its three neighbors.")
+    parser.add_argument("--per_conf", action="store_true", default=False,
+        help="Compute AM1-BCC charges and Wiberg bond orders separately for "
+             "each conformer. Default is once per molecule.")
+    parser.add_argument("-j", "--journal",
+        help="Checkpoint progress in this journal file. If the job is killed, "
+             "rerun the same command to continue where it stopped.")
+    parser.add_argument("-c", "--cache",
+        help="Look up and store Wiberg bond orders in this charge cache "
+             "file, e.g., to reuse results from earlier runs. Not used "
+             "with --per_conf.")
 
     args = parser.parse_args()
     opt = vars(args)
     if opt['input'] is None:
         print("ERROR: no input file specified.")
         exit()
-    if opt['output'] is None:
+    if opt['output'] is None and opt['table'] is None:
         print("ERROR: no output file specified.")
         exit()
 
-    am1wib(opt['input'], opt['output'], opt['plotout'])
+    am1wib(opt['input'], opt['output'], opt['plotout'], opt['journal'], opt['per_conf'],
+           opt['cache'], opt['table'], opt['heights'])
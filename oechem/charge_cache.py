@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+
+"""
+Purpose:    Persistent on-disk cache of partial charges and Wiberg bond orders,
+            keyed by canonical isomeric SMILES and charge model, so that a
+            molecule charged in an earlier campaign is a lookup instead of a
+            new quantum chemistry calculation. Values are stored in canonical
+            atom and bond order, and the least recently used entries are
+            evicted when the cache grows past its maximum size.
+Version:    Oct 18 2026
+Usage:      python charge_cache.py -d charges.db --export charges.jsonl
+            python charge_cache.py -d charges.db --import charges.jsonl
+            python charge_cache.py -d charges.db --max_entries 500000
+
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+
+# number of reads or writes between commits to the cache file
+COMMIT_EVERY = 1000
+
+### ------------------- Script -------------------
+
+
+def canonical_order(mol):
+    """
+    Get the canonical key and atom/bond order of a molecule.
+
+    Parameters
+    ----------
+    mol : OEMol
+
+    Returns
+    -------
+    smiles : string
+        Canonical isomeric SMILES
+    atom_order : list of ints
+        Positions of the atoms of mol (as from mol.GetAtoms()) in canonical order
+    bond_order : list of ints
+        Positions of the bonds of mol (as from mol.GetBonds()) in canonical order
+
+    """
+    import openeye.oechem as oechem
+
+    # tag the atoms and bonds of a copy with their original position, then reorder
+    cmol = oechem.OEGraphMol(mol)
+    for i, atom in enumerate(cmol.GetAtoms()):
+        atom.SetIntData('cache_pos', i)
+    for i, bond in enumerate(cmol.GetBonds()):
+        bond.SetIntData('cache_pos', i)
+    oechem.OECanonicalOrderAtoms(cmol)
+    oechem.OECanonicalOrderBonds(cmol)
+    smiles = oechem.OECreateIsoSmiString(cmol)
+    atom_order = [atom.GetIntData('cache_pos') for atom in cmol.GetAtoms()]
+    bond_order = [bond.GetIntData('cache_pos') for bond in cmol.GetBonds()]
+    return smiles, atom_order, bond_order
+
+
+class ChargeCache:
+    """
+    Parameters
+    ----------
+    filename : string
+        Name of the SQLite cache file. It is created if it does not exist.
+    max_entries : int (opt.)
+        Maximum number of molecules to keep. When exceeded, the least
+        recently used entries are removed.
+
+    Notes
+    -----
+    The last use of entries and new entries are committed every
+    COMMIT_EVERY reads or writes and on close, so entries from a run
+    that was killed may be lost, which only costs charging them again.
+    For the same reason, the cache can exceed max_entries by up to
+    COMMIT_EVERY entries until the next commit.
+
+    """
+    def __init__(self, filename, max_entries=1000000):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(filename)
+        self._db.execute("CREATE TABLE IF NOT EXISTS charges ("
+            "smiles TEXT, model TEXT, natoms INTEGER, charges TEXT, "
+            "wibergs TEXT, last_used REAL, PRIMARY KEY (smiles, model))")
+        self._db.execute("CREATE INDEX IF NOT EXISTS lru ON charges (last_used)")
+        self._db.commit()
+        self._count = self._db.execute("SELECT COUNT(*) FROM charges").fetchone()[0]
+        # last use of entries read since the last commit, by (smiles, model)
+        self._touched = {}
+        self._nwrites = 0
+
+    def __len__(self):
+        return self._count
+
+    def get(self, smiles, model):
+        """
+        Returns
+        -------
+        charges : list of floats
+            Partial charge of each atom, in canonical order
+        wibergs : list of floats, or None
+            Wiberg bond order of each bond, in canonical order
+        or None if the molecule is not in the cache
+
+        """
+        row = self._db.execute("SELECT charges, wibergs FROM charges "
+            "WHERE smiles=? AND model=?", (smiles, model)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[smiles, model] = time.time()
+        if len(self._touched) >= COMMIT_EVERY:
+            self.commit()
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, smiles, model, charges, wibergs=None, last_used=None):
+        """
+        Add or replace the charges of a molecule. Old entries are
+        evicted at the next commit if the cache is too large.
+        """
+        if last_used is None:
+            last_used = time.time()
+        values = (len(charges), json.dumps(charges), json.dumps(wibergs), last_used)
+        cur = self._db.execute("INSERT OR IGNORE INTO charges VALUES (?,?,?,?,?,?)",
+            (smiles, model) + values)
+        if cur.rowcount:
+            self._count += 1
+        else:
+            self._db.execute("UPDATE charges SET natoms=?, charges=?, wibergs=?, "
+                "last_used=? WHERE smiles=? AND model=?", values + (smiles, model))
+        self._touched.pop((smiles, model), None)
+        self._nwrites += 1
+        if self._nwrites >= COMMIT_EVERY:
+            self.evict()
+
+    def _write_touched(self):
+        self._db.executemany("UPDATE charges SET last_used=? WHERE smiles=? "
+            "AND model=?", ((t, smiles, model) for (smiles, model), t
+                            in self._touched.items()))
+        self._touched = {}
+
+    def commit(self):
+        """
+        Write the last use of entries read since the last commit, and
+        commit all changes to the file.
+        """
+        self._write_touched()
+        self._nwrites = 0
+        self._db.commit()
+
+    def evict(self):
+        """
+        Remove the least recently used entries beyond max_entries,
+        then commit.
+        """
+        # update last use first so recently read entries are kept
+        self._write_touched()
+        excess = self._count - self.max_entries
+        if excess > 0:
+            cur = self._db.execute("DELETE FROM charges WHERE rowid IN (SELECT "
+                "rowid FROM charges ORDER BY last_used LIMIT ?)", (excess,))
+            self._count -= cur.rowcount
+        self.commit()
+
+    def lookup_mol(self, mol, model):
+        """
+        Set partial charges, and Wiberg bond orders as the "WibergBondOrder"
+        bond data, on mol from the cache.
+
+        Returns
+        -------
+        bool, whether the molecule was found in the cache
+
+        """
+        smiles, atom_order, bond_order = canonical_order(mol)
+        entry = self.get(smiles, model)
+        if entry is None or len(entry[0]) != len(atom_order):
+            return False
+        charges, wibergs = entry
+        atoms = list(mol.GetAtoms())
+        for pos, q in zip(atom_order, charges):
+            atoms[pos].SetPartialCharge(q)
+        if wibergs is not None:
+            bonds = list(mol.GetBonds())
+            for pos, w in zip(bond_order, wibergs):
+                bonds[pos].SetData("WibergBondOrder", w)
+        return True
+
+    def store_mol(self, mol, model):
+        """
+        Add the partial charges, and Wiberg bond orders if present,
+        of a charged molecule to the cache.
+        """
+        smiles, atom_order, bond_order = canonical_order(mol)
+        atoms = list(mol.GetAtoms())
+        charges = [atoms[pos].GetPartialCharge() for pos in atom_order]
+        wibergs = None
+        bonds = list(mol.GetBonds())
+        bonds = [bonds[pos] for pos in bond_order]
+        if bonds and all(bond.HasData("WibergBondOrder") for bond in bonds):
+            wibergs = [bond.GetData("WibergBondOrder") for bond in bonds]
+        self.put(smiles, model, charges, wibergs)
+
+    def export_jsonl(self, outfile):
+        """
+        Write every entry of the cache as one JSON object per line.
+        """
+        self.commit()
+        with open(outfile, 'w') as f:
+            for row in self._db.execute("SELECT smiles, model, charges, "
+                    "wibergs, last_used FROM charges ORDER BY last_used"):
+                f.write(json.dumps({'smiles': row[0], 'model': row[1],
+                    'charges': json.loads(row[2]), 'wibergs': json.loads(row[3]),
+                    'last_used': row[4]}) + '\n')
+
+    def import_jsonl(self, infile):
+        """
+        Add the entries of a file written by export_jsonl to the cache.
+        """
+        with open(infile) as f:
+            for line in f:
+                if line.strip() == '':
+                    continue
+                entry = json.loads(line)
+                self._db.execute("INSERT OR REPLACE INTO charges VALUES "
+                    "(?,?,?,?,?,?)", (entry['smiles'], entry['model'],
+                    len(entry['charges']), json.dumps(entry['charges']),
+                    json.dumps(entry['wibergs']), entry['last_used']))
+        self._count = self._db.execute("SELECT COUNT(*) FROM charges").fetchone()[0]
+        self.evict()
+
+    def close(self):
+        self.evict()
+        self._db.close()
+
+
+### ------------------- Parser -------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage a cache of partial "
+        "charges and Wiberg bond orders.")
+
+    parser.add_argument("-d", "--dbfile", required=True,
+        help="Name of the cache file.")
+    parser.add_argument("--export",
+        help="Write all cache entries to this JSON-lines file.")
+    parser.add_argument("--import", dest="importfile",
+        help="Add the entries of this JSON-lines file to the cache.")
+    parser.add_argument("--max_entries", type=int, default=1000000,
+        help="Keep at most this many molecules, removing the least "
+             "recently used.")
+
+    args = parser.parse_args()
+
+    cache = ChargeCache(args.dbfile, args.max_entries)
+    if args.importfile is not None:
+        if not os.path.exists(args.importfile):
+            raise parser.error("Input file %s does not exist." % args.importfile)
+        cache.import_jsonl(args.importfile)
+    if args.export is not None:
+        cache.export_jsonl(args.export)
+    cache.evict()
+    print("Cache {} has {} molecule(s).".format(args.dbfile, len(cache)))
+    cache.close()
@@ -3,22 +3,159 @@
 """
 Charge the input molecules using the ELF10 charging model in OpenEye.
 
-Usage: python charge_mols.py -i inputfile.sdf -o outputfile.mol2
+Usage: python charge_mols.py -i inputfile.sdf -o outputfile.mol2 [-n 8]
+
+With more than one process, molecules are sent to a pool of workers as
+OEB bytes, with a bounded number in flight, and written in input order.
 
 By: Victoria T. Lim
 
 """
 
 import os, sys
-import openeye.oechem as oechem
-import openeye.oequacpac as oequacpac
 import argparse
+import parallel
+import journal
+import charge_cache
+
+# name of the charge model in the charge cache
+CACHE_MODEL = 'am1bccelf10'
 
 
 ### ------------------- Script -------------------
 
 
-def charge_mols(infile, outfile, reffile=None):
+def charge_elf10(record):
+    """
+    Charge one molecule with the AM1BCC ELF10 model. Run in worker processes.
+
+    Parameters
+    ----------
+    record : tuple of (string, bytes)
+        Title of the molecule, and the molecule in OEB format.
+
+    Returns
+    -------
+    tuple of (string, bool, bytes)
+        Title, whether charging succeeded, and the molecule in OEB format.
+
+    """
+    import openeye.oechem as oechem
+    import openeye.oequacpac as oequacpac
+
+    title, data = record
+    mol = oechem.OEMol()
+    oechem.OEReadMolFromBytes(mol, '.oeb', False, data)
+    status = oequacpac.OEAssignCharges(mol, oequacpac.OEAM1BCCELF10Charges())
+    return title, bool(status), oechem.OEWriteMolToBytes('.oeb', False, mol)
+
+
+def _charge_item(item):
+    """
+    Charge one work item with charge_func. Run in worker processes.
+    A charge_func that raises counts as a failure, so one bad molecule
+    does not stop the run.
+
+    Returns
+    -------
+    tuple of (string, bool, bytes, bool)
+        The return value of charge_func, and False for not from the cache.
+
+    """
+    charge_func, title, data, cached = item
+    try:
+        return charge_func((title, data)) + (False,)
+    except Exception as e:
+        print("Error charging mol {}: {}".format(title, e))
+        return title, False, data, False
+
+
+def _cached_item(item):
+    """
+    Pass through a work item that was charged from the cache,
+    or return None to charge it in a worker.
+    """
+    charge_func, title, data, cached = item
+    return (title, True, data, True) if cached else None
+
+
+def charge_records(records, charge_func=charge_elf10, nprocs=1,
+                   max_in_flight=None, failed=None):
+    """
+    Charge serialized molecules over a pool of processes. Does not use the
+    OpenEye toolkits itself, so it can run with a stub charge_func.
+
+    Parameters
+    ----------
+    records : iterable of (string, bytes, bool) tuples
+        Title, molecule in OEB format, and whether it was already charged
+        from the cache. Cached molecules are not sent to workers, so they
+        can be any object, which is returned as is. Consumed lazily.
+    charge_func : function (opt.)
+        Module-level function to charge one molecule, as charge_elf10.
+    nprocs : int (opt.)
+        Number of processes for charging molecules.
+    max_in_flight : int (opt.)
+        Maximum number of molecules read but not yet returned.
+        Default is four times nprocs.
+    failed : list (opt.)
+        Titles of molecules that failed to charge are appended to this list.
+
+    Returns
+    -------
+    generator of (string, bool, bytes, bool) tuples
+        Title, whether charging succeeded, the molecule, and whether it
+        came from the cache, in the same order as records
+
+    """
+    items = ((charge_func, title, data, cached) for title, data, cached in records)
+    for title, status, data, cached in parallel.ordered_imap(
+            _charge_item, items, nprocs, max_in_flight, local=_cached_item):
+        if not status and failed is not None:
+            failed.append(title)
+        yield title, status, data, cached
+
+
+def charge_mols(infile, outfile, reffile=None, nprocs=1, failfile=None,
+                charge_func=charge_elf10, journalfile=None, cachefile=None,
+                cache_model=CACHE_MODEL):
+    """
+    Parameters
+    ----------
+    infile : string
+        Name of the input molecules file.
+    outfile : string
+        Name of the output file of charged molecules.
+    reffile : string (opt.)
+        Name of a file of charged molecules to copy charges from, in the same
+        order as infile. No charges are computed if this is specified.
+    nprocs : int (opt.)
+        Number of processes for charging molecules.
+    failfile : string (opt.)
+        Name of a file for molecules that failed to charge. If not specified,
+        these are written to outfile without charges, as before.
+    charge_func : function (opt.)
+        Function to charge one molecule, with the same arguments and
+        return values as charge_elf10, e.g., a stub for testing.
+    journalfile : string (opt.)
+        Name of a journal file for checkpointing. Molecules are appended to
+        the output files as they finish, and if the journal already exists,
+        molecules it lists as finished are skipped. Output files may not
+        be compressed.
+    cachefile : string (opt.)
+        Name of a charge cache file. Molecules found in the cache are not
+        charged again, and newly charged molecules are added to it. Not used
+        with reffile, since the model of the reference charges is unknown.
+    cache_model : string (opt.)
+        Name of the charge model of charge_func in the cache.
+
+    Returns
+    -------
+    failed : list of strings
+        Titles of the molecules that failed to charge.
+
+    """
+    import openeye.oechem as oechem
 
     ### Read in molecules
     ifs = oechem.oemolistream()
@@ -26,21 +163,14 @@ def charge_mols(infile, outfile, reffile=None):
         oechem.OEThrow.Warning("Unable to open %s for reading" % infile)
         return
 
-    ### Open output file
-    ofs = oechem.oemolostream()
-    if not ofs.open(outfile):
-        oechem.OEThrow.Fatal("Unable to open %s for writing" % outfile)
-
-    ### Charge the molecules and write output
-    if reffile is None:
-        for mol in ifs.GetOEMols():
-            if not oequacpac.OEAssignCharges(mol, oequacpac.OEAM1BCCELF10Charges()):
-                oechem.OEThrow.Warning("Unable to charge mol {}".format(mol.GetTitle()))
-            oechem.OEWriteConstMolecule(ofs, mol)
-        ifs.close()
-        ofs.close()
-    else:
-        ### Read in molecules
+    ### Copy charges from the reference molecules
+    if reffile is not None:
+        if cachefile is not None:
+            print("WARNING: Charge cache {} is not used with a reference "
+                  "file.".format(cachefile))
+        ofs = oechem.oemolostream()
+        if not ofs.open(outfile):
+            oechem.OEThrow.Fatal("Unable to open %s for writing" % outfile)
         rfs = oechem.oemolistream()
         if not rfs.open(reffile):
             oechem.OEThrow.Warning("Unable to open %s for reading" % reffile)
@@ -51,8 +181,105 @@ def charge_mols(infile, outfile, reffile=None):
             oechem.OEWriteConstMolecule(ofs, ref_mol)
         ifs.close()
         ofs.close()
+        return []
+
+    cache = None
+    if cachefile is not None:
+        cache = charge_cache.ChargeCache(cachefile)
+
+    ### Open output files, continuing from the journal if given
+    jnl = None
+    failed = []
+    if journalfile is not None:
+        jnl = journal.Journal(journalfile)
+        failed = [e['title'] for e in jnl.entries if not e['results']['charged']]
+    write_out, ofs = _open_writer(outfile, jnl)
+    if failfile is not None:
+        write_fail, ffs = _open_writer(failfile, jnl)
 
+    ### Serialize molecules for workers, skipping any finished in an earlier run
+    ### and keeping any charged from the cache in this process
+    def records():
+        for idx, mol in enumerate(ifs.GetOEMols()):
+            if jnl is not None and idx < len(jnl):
+                jnl.check(idx, mol.GetTitle())
+                continue
+            if cache is not None and cache.lookup_mol(mol, cache_model):
+                yield mol.GetTitle(), oechem.OEMol(mol), True
+            else:
+                yield mol.GetTitle(), oechem.OEWriteMolToBytes('.oeb', False, mol), False
 
+    ### Charge the molecules and write output in input order
+    idx = 0 if jnl is None else len(jnl)
+    for title, status, data, cached in charge_records(records(), charge_func,
+                                                      nprocs, failed=failed):
+        if cached:
+            mol = data
+        else:
+            mol = oechem.OEMol()
+            oechem.OEReadMolFromBytes(mol, '.oeb', False, data)
+        if status:
+            write_out(mol)
+            if cache is not None and not cached:
+                cache.store_mol(mol, cache_model)
+        elif failfile is not None:
+            write_fail(mol)
+        else:
+            oechem.OEThrow.Warning("Unable to charge mol {}".format(title))
+            write_out(mol)
+        if jnl is not None:
+            jnl.record(idx, title, {'charged': bool(status)})
+        idx += 1
+
+    ifs.close()
+    if jnl is not None:
+        jnl.close()
+    else:
+        ofs.close()
+        if failfile is not None:
+            ffs.close()
+    if cache is not None:
+        print("Charge cache {}: {} hit(s), {} miss(es).".format(
+              cachefile, cache.hits, cache.misses))
+        cache.close()
+
+    ### Report molecules that failed to charge
+    if failed:
+        print("Unable to charge {} mol(s):\n  {}".format(len(failed), '\n  '.join(failed)))
+    return failed
+
+
+def _open_writer(filename, jnl=None):
+    """
+    Get a function that writes a molecule to filename. With a journal, the
+    file is opened through the journal and molecules are appended as bytes.
+
+    Returns
+    -------
+    write : function
+        Function that takes one molecule to write.
+    ofs : oemolostream, or None with a journal
+        Stream to close when done.
+
+    """
+    import openeye.oechem as oechem
+
+    if jnl is not None:
+        # compressed files cannot be truncated to the last journal entry
+        if oechem.OEIsGZip(filename):
+            oechem.OEThrow.Fatal("Compressed output %s is not supported with "
+                                 "a journal" % filename)
+        ext = oechem.OEGetFileExtension(filename)
+        if oechem.OEGetFileType(ext) == oechem.OEFormat_UNDEFINED:
+            oechem.OEThrow.Fatal("Unknown format of output file %s" % filename)
+        fmt = '.' + ext
+        f = jnl.open_output(filename)
+        return lambda mol: f.write(oechem.OEWriteMolToBytes(fmt, False, mol)), None
+
+    ofs = oechem.oemolostream()
+    if not ofs.open(filename):
+        oechem.OEThrow.Fatal("Unable to open %s for writing" % filename)
+    return lambda mol: oechem.OEWriteConstMolecule(ofs, mol), ofs
 
 
 if __name__ == "__main__":
@@ -64,6 +291,17 @@ if __name__ == "__main__":
         help="Name of output MOL2 file.")
     parser.add_argument("-r", "--reffile",
         help="Assign charges on input mols based on analogous reference file.")
+    parser.add_argument("-n", "--nprocs", type=int, default=1,
+        help="Number of processes for charging molecules.")
+    parser.add_argument("-f", "--failfile",
+        help="Write molecules that failed to charge to this file instead "
+             "of to the output file.")
+    parser.add_argument("-j", "--journal",
+        help="Checkpoint progress in this journal file. If the job is killed, "
+             "rerun the same command to continue where it stopped.")
+    parser.add_argument("-c", "--cache",
+        help="Look up and store charges in this charge cache file, "
+             "e.g., to reuse charges from earlier runs.")
 
     args = parser.parse_args()
 
@@ -74,5 +312,6 @@ if __name__ == "__main__":
     if os.path.splitext(args.outfile)[1] == '.sdf':
         raise parser.error("SDF file cannot store charges in output.")
 
-    charge_mols(args.infile, args.outfile, args.reffile)
+    charge_mols(args.infile, args.outfile, args.reffile, args.nprocs, args.failfile,
+                journalfile=args.journal, cachefile=args.cache)
 
@@ -1,46 +1,124 @@
 #!/usr/bin/env python
 
 # Purpose:  Combine multiple molecular structure files into a single SDF file.
+#           Files are read in sorted order by a pool of workers, and the
+#           output is written in that same order. With --dedup, molecules
+#           with the same canonical isomeric SMILES as an earlier one are
+#           skipped.
 # By:       Victoria T. Lim
-# Version:  Dec 10 2018
+# Version:  Oct 18 2026
 
 
 import os, sys, glob
-import openeye.oechem as oechem
+import time
+import hashlib
+import parallel
 
 
 # --------------------------- Main Function ------------------------- #
 
-def combineSDF(infiles, ftype, outfile):
-
-    ### Glob for input files to combine.
+def read_first_mol(record):
+    """
+    Read the first molecule of one file. Run in worker processes or threads.
+
+    Parameters
+    ----------
+    record : tuple of (string, bool)
+        Name of the file, and whether to compute the structure key.
+
+    Returns
+    -------
+    tuple of (string, bytes, string, string)
+        Name of the file, the molecule in SDF format titled by the file name,
+        SHA-1 hash of its canonical isomeric SMILES (or None), and an error
+        message (or None if the molecule was read).
+
+    """
+    import openeye.oechem as oechem
+
+    f, dedup = record
+    ifs = oechem.oemolistream()
+    if not ifs.open(f):
+        return f, None, None, "Unable to open for reading"
+    mol = oechem.OEMol()
+    status = oechem.OEReadMolecule(ifs, mol)
+    ifs.close()
+    if not status:
+        return f, None, None, "No mol loaded"
+    mol.SetTitle(os.path.basename(f).split('.')[0])
+    key = None
+    if dedup:
+        key = hashlib.sha1(oechem.OECreateIsoSmiString(mol).encode()).hexdigest()
+    return f, oechem.OEWriteMolToBytes('.sdf', False, mol), key, None
+
+
+def combineSDF(infiles, ftype, outfile, nprocs=1, threads=False, dedup=False):
+    """
+    Parameters
+    ----------
+    infiles : string
+        Path to directory containing all molecule files.
+    ftype : string
+        File extension of the molecule files, e.g., pdb or mol2.
+    outfile : string
+        Name of output SDF file.
+    nprocs : int (opt.)
+        Number of workers for reading files.
+    threads : bool (opt.)
+        Use a pool of threads instead of processes.
+    dedup : bool (opt.)
+        Skip molecules with the same canonical isomeric SMILES
+        as an earlier molecule.
+
+    Returns
+    -------
+    failed : list of (string, string) tuples
+        Name of each file that could not be read, and the error message.
+
+    """
+
+    ### Glob for input files to combine, in a reproducible order.
     ext = '*.'+ftype
-    molfiles = glob.glob(os.path.join(infiles, ext))
+    molfiles = sorted(glob.glob(os.path.join(infiles, ext)))
 
     ### Open output file to write molecules.
-    ofs = oechem.oemolostream()
     if os.path.exists(outfile) and os.path.getsize(outfile) > 10:
         sys.exit("Output .sdf file already exists. Exiting.\n")
         return
-    if not ofs.open(outfile):
-        oechem.OEThrow.Fatal("Unable to open %s for writing" % outfile)
-
-    ### Loop over mols.
-    for f in molfiles:
-        print(f)
 
-        ifs = oechem.oemolistream()
-        if not ifs.open(f):
-             oechem.OEThrow.Warning("Unable to open %s for reading" % f)
-        try:
-            mol = next(ifs.GetOEMols())
-        except StopIteration:
-            print('No mol loaded for %s' % mol.GetTitle())
-        ifs.close()
-        mol.SetTitle(f.split('/')[-1].split('.')[0])
-        oechem.OEWriteConstMolecule(ofs, mol)
-
-    ofs.close()
+    ### Read molecules in parallel, and write them in sorted file order.
+    start = time.time()
+    seen = set()
+    failed = []
+    nwritten = 0
+    ndup = 0
+    records = ((f, dedup) for f in molfiles)
+    with open(outfile, 'wb') as ofs:
+        for f, data, key, err in parallel.ordered_imap(read_first_mol, records,
+                                                       nprocs, threads=threads):
+            if err is not None:
+                failed.append((f, err))
+                continue
+            if dedup:
+                if key in seen:
+                    ndup += 1
+                    continue
+                seen.add(key)
+            ofs.write(data)
+            nwritten += 1
+
+    ### Report results.
+    elapsed = time.time() - start
+    print("Read {} files in {:.1f} s ({:.1f} files/s).".format(
+          len(molfiles), elapsed, len(molfiles)/max(elapsed, 1e-9)))
+    print("Wrote {} mol(s) to {}.".format(nwritten, outfile))
+    if dedup:
+        print("Skipped {} duplicate mol(s).".format(ndup))
+    if failed:
+        print("Unable to read {} file(s):".format(len(failed)))
+        for f, err in failed:
+            print("  {}: {}".format(f, err))
+    return failed
 
 
 # ------------------------- Parse Inputs ----------------------- #
@@ -61,6 +139,16 @@ if __name__ == "__main__":
     parser.add_argument('-o', '--outfile',
             help = "Name of output SDF file with all mols in input directory.")
 
-    args = parser.parse_args()
-    combineSDF(args.infiles, args.ftype, args.outfile)
+    parser.add_argument('-n', '--nprocs', type=int, default=1,
+            help = "Number of workers for reading files.")
 
+    parser.add_argument('--threads', action="store_true", default=False,
+            help = "Read files with threads instead of processes.")
+
+    parser.add_argument('--dedup', action="store_true", default=False,
+            help = "Skip molecules with the same canonical isomeric SMILES "
+                   "as an earlier molecule.")
+
+    args = parser.parse_args()
+    combineSDF(args.infiles, args.ftype, args.outfile, args.nprocs,
+               args.threads, args.dedup)
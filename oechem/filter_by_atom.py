@@ -2,15 +2,348 @@
 
 """
 Purpose:    Filter an input list of molecules to find ones with interesting atoms.
+            Criteria on elements, atom counts, net formal charge, and ring
+            count are combined into one predicate that stops at the first
+            failed check. For SDF and MOL2 input, elements are read from the
+            text of each record first, so records that fail (or, for
+            element-only criteria, pass) are decided without building a
+            molecule. Records are filtered in batches over a pool of processes.
 By:         Victoria T. Lim
-Version:    Dec 20 2018
+Version:    Oct 18 2026
 Example:    python filter_by_atom.py -i MiniDrugBank_filter00.mol2 -o MiniDrugBank_filter00_atomic.mol2 -b 1 6 7 8 16
+            python filter_by_atom.py -i input.sdf -o output.sdf --allowed 1 6 7 8 9 16 17 --max_heavy 30 -n 8
 
 """
 
-import openeye.oechem as oechem
+import os
+import sdf_reader
+import sdf_index
+import parallel
 
-def filter_by_atom(infile, outfile, boring_list):
+# element symbols by atomic number
+ELEMENTS = ('X H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn '
+            'Fe Co Ni Cu Zn Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd '
+            'In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu '
+            'Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn Fr Ra Ac Th Pa U Np Pu '
+            'Am Cm Bk Cf Es Fm Md No Lr').split()
+ATOMIC_NUMS = {sym.upper(): num for num, sym in enumerate(ELEMENTS)}
+
+# records per batch sent to a worker
+BATCHSIZE = 1000
+
+
+class MolFilter:
+    """
+    Criteria for keeping a molecule, compiled into a list of checks that
+    are run in order of cost. Criteria that are None are not checked.
+
+    Parameters
+    ----------
+    boring_list : list of ints (opt.)
+        Keep molecules with at least one atomic number outside of this list.
+    allowed : list of ints (opt.)
+        Keep molecules with only these atomic numbers.
+    forbidden : list of ints (opt.)
+        Keep molecules with none of these atomic numbers.
+    max_atoms : int (opt.)
+        Maximum number of atoms, including explicit hydrogens.
+    max_heavy : int (opt.)
+        Maximum number of non-hydrogen atoms.
+    charge : tuple of ints (opt.)
+        Minimum and maximum net formal charge.
+    max_rings : int (opt.)
+        Maximum number of rings, as the size of the smallest set of
+        smallest rings.
+
+    """
+    def __init__(self, boring_list=None, allowed=None, forbidden=None,
+                 max_atoms=None, max_heavy=None, charge=None, max_rings=None):
+        self.boring = None if boring_list is None else frozenset(boring_list)
+        self.allowed = None if allowed is None else frozenset(allowed)
+        self.forbidden = None if forbidden is None else frozenset(forbidden)
+        self.max_atoms = max_atoms
+        self.max_heavy = max_heavy
+        self.charge = charge
+        self.max_rings = max_rings
+        self._compile()
+
+    def _compile(self):
+        """
+        Build the lists of checks on atomic numbers and on molecules.
+        """
+        checks = []
+        if self.max_atoms is not None:
+            checks.append(lambda nums: len(nums) <= self.max_atoms)
+        if self.max_heavy is not None:
+            checks.append(lambda nums: len(nums) - nums.count(1) <= self.max_heavy)
+        if self.forbidden is not None:
+            checks.append(lambda nums: self.forbidden.isdisjoint(nums))
+        if self.allowed is not None:
+            checks.append(lambda nums: self.allowed.issuperset(nums))
+        if self.boring is not None:
+            checks.append(lambda nums: not self.boring.issuperset(nums))
+        self._element_checks = checks
+
+        checks = []
+        if self.charge is not None:
+            checks.append(self._check_charge)
+        if self.max_rings is not None:
+            checks.append(self._check_rings)
+        self._mol_checks = checks
+
+    def __getstate__(self):
+        # checks are rebuilt after unpickling in a worker
+        state = dict(self.__dict__)
+        del state['_element_checks'], state['_mol_checks']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+    @property
+    def elements_only(self):
+        """
+        Whether all criteria can be checked from atomic numbers alone.
+        """
+        return not self._mol_checks
+
+    def match_elements(self, nums):
+        """
+        Check the element criteria on a list of atomic numbers.
+        """
+        return all(check(nums) for check in self._element_checks)
+
+    def match_mol(self, mol):
+        """
+        Check all criteria on an OEMol.
+        """
+        if self.max_atoms is not None and mol.NumAtoms() > self.max_atoms:
+            return False
+        nums = [atom.GetAtomicNum() for atom in mol.GetAtoms()]
+        return self.match_elements(nums) and all(check(mol) for check in self._mol_checks)
+
+    def _check_charge(self, mol):
+        import openeye.oechem as oechem
+        return self.charge[0] <= oechem.OENetCharge(mol) <= self.charge[1]
+
+    def _check_rings(self, mol):
+        import openeye.oechem as oechem
+        nparts, parts = oechem.OEDetermineComponents(mol)
+        return mol.NumBonds() - mol.NumAtoms() + nparts <= self.max_rings
+
+
+def sdf_elements(rec):
+    """
+    Get the atomic numbers from the atom block of a V2000 SDF record.
+
+    Returns
+    -------
+    list of ints, or None if the record could not be read
+
+    """
+    lines = rec.split(b'\n')
+    try:
+        counts = lines[3]
+        if b'V3000' in counts:
+            return None
+        natoms = int(counts[:3])
+        symbols = [line[31:34].strip() for line in lines[4:4+natoms]]
+        return [ATOMIC_NUMS[s.decode().upper()] for s in symbols]
+    except (IndexError, ValueError, KeyError):
+        return None
+
+
+def mol2_elements(rec):
+    """
+    Get the atomic numbers from the SYBYL atom types of a MOL2 record.
+
+    Returns
+    -------
+    list of ints, or None if the record could not be read
+
+    """
+    start = rec.find(b'@<TRIPOS>ATOM')
+    if start < 0:
+        return None
+    end = rec.find(b'@<TRIPOS>', start + 1)
+    nums = []
+    try:
+        for line in rec[start:end if end >= 0 else len(rec)].split(b'\n')[1:]:
+            fields = line.split()
+            if fields:
+                symbol = fields[5].split(b'.')[0]
+                nums.append(ATOMIC_NUMS[symbol.decode().upper()])
+    except (IndexError, KeyError):
+        return None
+    return nums
+
+
+def iter_mol2_records(f, chunksize=sdf_reader.CHUNKSIZE):
+    """
+    Split an open binary MOL2 file into records, each starting at its
+    @<TRIPOS>MOLECULE line.
+
+    Returns
+    -------
+    generator of bytes of each record
+
+    """
+    key = b'@<TRIPOS>MOLECULE'
+    buf = b''
+    eof = False
+    while not eof:
+        chunk = f.read(chunksize)
+        eof = not chunk
+        buf += chunk
+        start = buf.find(key)
+        while start >= 0:
+            stop = buf.find(key, start + 1)
+            if stop < 0:
+                break
+            yield buf[start:stop]
+            start = stop
+        # without a key, keep enough bytes to find one split across chunks
+        buf = buf[start:] if start >= 0 else buf[-(len(key)-1):]
+    if buf.startswith(key):
+        yield buf
+
+
+def filter_batch(batch):
+    """
+    Filter a batch of records. Run in worker processes.
+
+    Parameters
+    ----------
+    batch : tuple of (list of bytes, string, string, MolFilter)
+        Records, input format (.sdf or .mol2), output format, and criteria.
+
+    Returns
+    -------
+    list of bytes of the molecules to keep, in the output format
+
+    """
+    records, fmt, outfmt, molfilter = batch
+    get_elements = sdf_elements if fmt == '.sdf' else mol2_elements
+    keep = []
+    for rec in records:
+        nums = get_elements(rec)
+        if nums is not None:
+            if not molfilter.match_elements(nums):
+                continue
+            if molfilter.elements_only and fmt == outfmt:
+                keep.append(rec + b'$$$$\n' if fmt == '.sdf' else rec)
+                continue
+        out = _filter_mol_bytes(rec, fmt, outfmt, molfilter)
+        if out is not None:
+            keep.append(out)
+    return keep
+
+
+def _filter_mol_bytes(rec, fmt, outfmt, molfilter):
+    """
+    Build a molecule from one record and check all criteria.
+
+    Returns
+    -------
+    bytes of the molecule in the output format, or None if not kept
+
+    """
+    import openeye.oechem as oechem
+    if fmt == '.sdf':
+        rec = rec + b'$$$$\n'
+    mol = oechem.OEMol()
+    if not oechem.OEReadMolFromBytes(mol, fmt, False, rec):
+        return None
+    if not molfilter.match_mol(mol):
+        return None
+    return oechem.OEWriteMolToBytes(outfmt, False, mol)
+
+
+def filter_byte_range(batch):
+    """
+    Read and filter the SDF records in a byte range of a file. Run in worker
+    processes, so records do not have to be read and sent by the main process.
+
+    Parameters
+    ----------
+    batch : tuple of (string, tuple of ints, string, MolFilter)
+        Name of the SD file, start and end byte offsets of the records
+        as from sdf_index.SDFIndex.byte_range, output format, and criteria.
+
+    Returns
+    -------
+    list of bytes of the molecules to keep, in the output format
+
+    """
+    filename, byte_range, outfmt, molfilter = batch
+    with open(filename, 'rb') as f:
+        f.seek(byte_range[0])
+        records = [rec for rec in sdf_reader.iter_record_bytes(
+                   f, nbytes=byte_range[1]-byte_range[0]) if rec.strip()]
+    return filter_batch((records, '.sdf', outfmt, molfilter))
+
+
+def _byte_range_batches(filename, outfmt, molfilter):
+    idx = sdf_index.SDFIndex(filename)
+    for start in range(0, len(idx), BATCHSIZE):
+        byte_range = idx.byte_range(start, min(start + BATCHSIZE, len(idx)))
+        yield filename, byte_range, outfmt, molfilter
+
+
+def _batches(records, fmt, outfmt, molfilter):
+    batch = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) == BATCHSIZE:
+            yield batch, fmt, outfmt, molfilter
+            batch = []
+    if batch:
+        yield batch, fmt, outfmt, molfilter
+
+
+def filter_by_atom(infile, outfile, boring_list=None, molfilter=None, nprocs=1):
+    """
+    Parameters
+    ----------
+    infile : string
+        Name of input molecules file.
+    outfile : string
+        Name of output molecules file.
+    boring_list : list of ints (opt.)
+        Keep molecules with an atomic number outside of this list.
+    molfilter : MolFilter (opt.)
+        Criteria for keeping molecules. If not given, only boring_list is used.
+    nprocs : int (opt.)
+        Number of processes for SDF and MOL2 input. With more than one for
+        SDF input, the file is indexed with sdf_index and each worker reads
+        its own batch of records.
+
+    """
+    if molfilter is None:
+        molfilter = MolFilter(boring_list)
+
+    fmt = os.path.splitext(infile)[1].lower()
+    outfmt = os.path.splitext(outfile)[1].lower()
+    if fmt in ('.sdf', '.mol2') and outfmt in ('.sdf', '.mol2'):
+        ### With an index of the SD file, workers read their own records
+        if fmt == '.sdf' and nprocs > 1:
+            with open(outfile, 'wb') as ofs:
+                batches = _byte_range_batches(infile, outfmt, molfilter)
+                for keep in parallel.ordered_imap(filter_byte_range, batches, nprocs):
+                    ofs.write(b''.join(keep))
+            return
+        with open(infile, 'rb') as f, open(outfile, 'wb') as ofs:
+            if fmt == '.sdf':
+                records = (rec for rec in sdf_reader.iter_record_bytes(f) if rec.strip())
+            else:
+                records = iter_mol2_records(f)
+            batches = _batches(records, fmt, outfmt, molfilter)
+            for keep in parallel.ordered_imap(filter_batch, batches, nprocs):
+                ofs.write(b''.join(keep))
+        return
+
+    import openeye.oechem as oechem
 
     ### Read in molecules
     ifs = oechem.oemolistream()
@@ -25,11 +358,7 @@ def filter_by_atom(infile, outfile, boring_list):
 
     ### Go through all molecules
     for mol in ifs.GetOEMols():
-        save_mol = False
-        for atom in mol.GetAtoms():
-            if atom.GetAtomicNum() not in boring_list:
-                save_mol = True
-        if save_mol:
+        if molfilter.match_mol(mol):
             oechem.OEWriteConstMolecule(ofs, mol)
     ifs.close()
     ofs.close()
@@ -44,7 +373,22 @@ if __name__ == "__main__":
         help="Name of output molecules file.")
     parser.add_argument("-b", "--boring_list", nargs='*', type=int,
         help="Look for atomic numbers outside of this list")
+    parser.add_argument("--allowed", nargs='*', type=int,
+        help="Keep molecules with only these atomic numbers.")
+    parser.add_argument("--forbidden", nargs='*', type=int,
+        help="Keep molecules with none of these atomic numbers.")
+    parser.add_argument("--max_atoms", type=int,
+        help="Maximum number of atoms, including explicit hydrogens.")
+    parser.add_argument("--max_heavy", type=int,
+        help="Maximum number of non-hydrogen atoms.")
+    parser.add_argument("--charge", nargs=2, type=int, metavar=('MIN', 'MAX'),
+        help="Minimum and maximum net formal charge.")
+    parser.add_argument("--max_rings", type=int,
+        help="Maximum number of rings.")
+    parser.add_argument("-n", "--nprocs", type=int, default=1,
+        help="Number of processes for SDF and MOL2 input.")
 
     args = parser.parse_args()
-    filter_by_atom(args.infile, args.outfile, args.boring_list)
-
+    molfilter = MolFilter(args.boring_list, args.allowed, args.forbidden,
+        args.max_atoms, args.max_heavy, args.charge, args.max_rings)
+    filter_by_atom(args.infile, args.outfile, molfilter=molfilter, nprocs=args.nprocs)
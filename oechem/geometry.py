@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+"""
+Purpose:    Batched geometry of atom centers with three neighbors, such as
+            invertible nitrogens, for all conformers of a molecule at once.
+            Takes coordinates as a NumPy array of shape (nconfs, natoms, 3)
+            and index arrays of centers and neighbors, so it does not depend
+            on the OpenEye toolkits.
+Version:    Oct 18 2026
+Example:    import geometry
+            sums = geometry.angle_sums(coords, centers, nbors)
+            heights = geometry.pyramid_heights(coords, centers, nbors)
+
+"""
+
+import numpy as np
+
+
+def _bond_vectors(coords, centers, nbors):
+    """
+    Vectors from each center to each of its neighbors.
+
+    Returns
+    -------
+    numpy array of shape (nconfs, ncenters, 3, 3)
+
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.intp)
+    nbors = np.asarray(nbors, dtype=np.intp)
+    return coords[:, nbors, :] - coords[:, centers, np.newaxis, :]
+
+
+def angle_sums(coords, centers, nbors):
+    """
+    Sum of the three angles around each center, which is 360 degrees for
+    a planar center and smaller for a pyramidal one.
+
+    Parameters
+    ----------
+    coords : numpy array
+        Coordinates of shape (nconfs, natoms, 3).
+    centers : list or array of ints
+        Atom indices of the centers.
+    nbors : list or array of ints
+        Atom indices of the three neighbors of each center, shape (ncenters, 3).
+
+    Returns
+    -------
+    numpy array of angle sums in degrees, shape (nconfs, ncenters)
+
+    """
+    vecs = _bond_vectors(coords, centers, nbors)
+    vecs /= np.linalg.norm(vecs, axis=-1, keepdims=True)
+
+    # angles between neighbor pairs 0-1, 1-2, 2-0
+    rolled = np.roll(vecs, -1, axis=-2)
+    cosines = np.clip(np.sum(vecs * rolled, axis=-1), -1., 1.)
+    return np.degrees(np.arccos(cosines)).sum(axis=-1)
+
+
+def pyramid_heights(coords, centers, nbors):
+    """
+    Out-of-plane height of each center, as its distance from the plane
+    through its three neighbors.
+
+    Parameters
+    ----------
+    coords : numpy array
+        Coordinates of shape (nconfs, natoms, 3).
+    centers : list or array of ints
+        Atom indices of the centers.
+    nbors : list or array of ints
+        Atom indices of the three neighbors of each center, shape (ncenters, 3).
+
+    Returns
+    -------
+    numpy array of heights in the units of coords, shape (nconfs, ncenters)
+
+    """
+    vecs = _bond_vectors(coords, centers, nbors)
+    normal = np.cross(vecs[..., 1, :] - vecs[..., 0, :],
+                      vecs[..., 2, :] - vecs[..., 0, :])
+    normal /= np.linalg.norm(normal, axis=-1, keepdims=True)
+    return np.abs(np.sum(vecs[..., 0, :] * normal, axis=-1))
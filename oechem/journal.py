@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+"""
+Purpose:    Checkpoint long molecule-processing jobs so that they can resume
+            after being killed, e.g., by a cluster scheduler. The journal is a
+            JSON-lines file with one entry per finished molecule, recording its
+            index, title, optional results, and the size of each output file
+            after that molecule was written. On restart, outputs are truncated
+            back to the last recorded sizes and finished molecules are skipped.
+Version:    Oct 18 2026
+Example:    jnl = journal.Journal('job.journal')
+            out = jnl.open_output('output.mol2')
+            for i, mol in enumerate(mols):
+                if i < len(jnl):
+                    jnl.check(i, mol.GetTitle())
+                    continue
+                out.write(...)
+                jnl.record(i, mol.GetTitle())
+            jnl.close()
+
+"""
+
+import os
+import json
+
+
+class Journal:
+    """
+    Parameters
+    ----------
+    filename : string
+        Name of the journal file. It is created if it does not exist,
+        otherwise its finished entries are loaded.
+
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = []
+        self._outputs = []
+
+        # load entries, dropping an incomplete last line from a crash
+        good_size = 0
+        if os.path.exists(filename):
+            with open(filename, 'rb') as f:
+                for line in f:
+                    try:
+                        self.entries.append(json.loads(line))
+                    except ValueError:
+                        break
+                    good_size += len(line)
+        self._f = open(filename, 'ab')
+        self._f.truncate(good_size)
+
+        if self.entries:
+            print("Resuming from journal {}: {} molecule(s) already "
+                  "finished.".format(filename, len(self.entries)))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def open_output(self, filename):
+        """
+        Open an output file in binary mode for appending, after truncating
+        any data that was written after the last journal entry.
+
+        Returns
+        -------
+        file object
+
+        """
+        size = 0
+        if self.entries:
+            size = self.entries[-1]['sizes'].get(filename, 0)
+        mode = 'r+b' if os.path.exists(filename) else 'wb'
+        f = open(filename, mode)
+        f.truncate(size)
+        f.seek(size)
+        self._outputs.append((filename, f))
+        return f
+
+    def check(self, index, title):
+        """
+        Make sure the molecule at index is the same one that was journaled.
+        """
+        if self.entries[index]['title'] != title:
+            raise ValueError("Journal {} does not match input: expected mol {} "
+                "at index {} but found {}.".format(self.filename,
+                self.entries[index]['title'], index, title))
+
+    def results(self):
+        """
+        List of the results recorded for each finished molecule.
+        """
+        return [e.get('results') for e in self.entries]
+
+    def record(self, index, title, results=None):
+        """
+        Mark a molecule as finished, after its output has been written.
+
+        Parameters
+        ----------
+        index : int
+            Index of the molecule in the input.
+        title : string
+            Title of the molecule.
+        results : JSON-serializable object (opt.)
+            Results to keep for the end of the job, e.g., for a summary.
+
+        """
+        sizes = {}
+        for filename, f in self._outputs:
+            f.flush()
+            os.fsync(f.fileno())
+            sizes[filename] = f.tell()
+        entry = {'index': index, 'title': title, 'sizes': sizes}
+        if results is not None:
+            entry['results'] = results
+        self._f.write((json.dumps(entry) + '\n').encode())
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self.entries.append(entry)
+
+    def close(self):
+        for filename, f in self._outputs:
+            f.close()
+        self._f.close()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+"""
+Purpose:    Map a function over a stream of work items with a pool of
+            processes (or threads), yielding results in input order while
+            keeping only a bounded number of items in flight. Does not depend
+            on the OpenEye toolkits, so molecules are passed to workers as
+            serialized bytes by the calling script.
+Version:    Oct 18 2026
+Example:    import parallel
+            for result in parallel.ordered_imap(func, items, nprocs=8):
+                ...
+
+"""
+
+import collections
+import concurrent.futures
+
+
+def ordered_imap(func, iterable, nprocs=1, max_in_flight=None, threads=False,
+                 local=None):
+    """
+    Apply func to each item of iterable in parallel.
+
+    Parameters
+    ----------
+    func : function
+        Module-level function of one argument (so it can be pickled).
+    iterable : iterable
+        Work items, which are consumed lazily.
+    nprocs : int (opt.)
+        Number of workers. With 1, func is called in this process.
+    max_in_flight : int (opt.)
+        Maximum number of items read but not yet yielded.
+        Default is four times nprocs.
+    threads : bool (opt.)
+        Use a pool of threads instead of processes, such as for
+        work that is mostly file I/O.
+    local : function (opt.)
+        Function of one item that returns its result without a worker,
+        or None to send the item to a worker, e.g., for items found in
+        a cache. Its results are yielded in order with the others.
+
+    Returns
+    -------
+    generator of the results of func, in the same order as iterable
+
+    """
+    if nprocs <= 1:
+        for item in iterable:
+            result = None if local is None else local(item)
+            yield func(item) if result is None else result
+        return
+
+    if max_in_flight is None:
+        max_in_flight = 4 * nprocs
+    if threads:
+        executor = concurrent.futures.ThreadPoolExecutor(nprocs)
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(nprocs)
+
+    with executor:
+        # (future, None) for items sent to workers, (None, result) for local ones
+        pending = collections.deque()
+        for item in iterable:
+            result = None if local is None else local(item)
+            if result is None:
+                pending.append((executor.submit(func, item), None))
+            else:
+                pending.append((None, result))
+            while pending and (pending[0][0] is None or len(pending) >= max_in_flight):
+                future, result = pending.popleft()
+                yield result if future is None else future.result()
+        while pending:
+            future, result = pending.popleft()
+            yield result if future is None else future.result()
@@ -2,34 +2,29 @@
 # By: Victoria T. Lim
 
 import os
-import openeye.oechem as oechem
 import numpy as np
 import argparse
 import collections
-
-import matplotlib as mpl
-import matplotlib.pyplot as plt
+import itertools
+import sdf_reader
 
 
 ### ------------------- Script -------------------
 
 def extractXY(fname, tag):
 
-    ifs = oechem.oemolistream()
-    ifs.SetConfTest( oechem.OEAbsoluteConfTest() )
-    if not ifs.open(fname):
-        oechem.OEThrow.Warning("Unable to open %s for reading" % fname)
-
     xlist = []
     ylist = []
 
-    for mol in ifs.GetOEMols():
-        for j, conf in enumerate( mol.GetConfs() ):
-            xlist.append(int(mol.GetTitle()))
+    ### Read tag of each conformer, grouping conformers by molecule title
+    values = sdf_reader.iter_tag_values(fname, tag)
+    for title, confs in itertools.groupby(values, key=lambda tv: tv[0]):
+        for j, (t, value) in enumerate(confs):
+            xlist.append(int(title))
             try:
-                ylist.append(float(oechem.OEGetSDData(conf, tag)))
+                ylist.append(float(value))
             except ValueError as e:
-                print("Missing tag data for mol {}, conf {}! Skipping.".format(mol.GetTitle(),j))
+                print("Missing tag data for mol {}, conf {}! Skipping.".format(title,j))
                 print(e)
                 xlist.pop()
 
@@ -45,6 +40,9 @@ def plotMultSDF(wholedict, figname,verbose):
     Parameters
     ----------
     """
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+
     numFiles = len(wholedict)
     xarray = []
     yarray = []
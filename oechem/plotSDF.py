@@ -2,11 +2,10 @@
 # By: Victoria T. Lim
 
 import os
-import openeye.oechem as oechem
 import numpy as np
 import argparse
-
-import matplotlib.pyplot as plt
+import itertools
+import sdf_reader
 
 
 ### ------------------- Script -------------------
@@ -16,23 +15,20 @@ def plotSDF(infile, tag,figname='lineplot.png'):
     Parameters
     ----------
     """
-
-    ### Read in .sdf file and distinguish each molecule's conformers
-    ifs = oechem.oemolistream()
-    ifs.SetConfTest( oechem.OEAbsoluteConfTest() )
-    if not ifs.open(infile):
-        oechem.OEThrow.Warning("Unable to open %s for reading" % infile)
-        return
+    import matplotlib.pyplot as plt
 
     xlist = []
     ylist = []
 
-    for mol in ifs.GetOEMols():
-        print(mol.GetTitle(), mol.NumConfs())
-        for j, conf in enumerate( mol.GetConfs() ):
+    ### Read tag of each conformer, grouping conformers by molecule title
+    values = sdf_reader.iter_tag_values(infile, tag)
+    for title, confs in itertools.groupby(values, key=lambda tv: tv[0]):
+        confs = [value for t, value in confs]
+        print(title, len(confs))
+        for value in confs:
             try:
-                ylist.append(float(oechem.OEGetSDData(conf, tag)))
-                xlist.append(int(mol.GetTitle()))
+                ylist.append(float(value))
+                xlist.append(int(title))
             except ValueError as err:
                 pass  # mols not converged may not have tag
 
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+
+"""
+Purpose:    Byte-offset index of the records of an SD file, for random access
+            by record number or title and for splitting a file into balanced
+            shards for parallel workers. The index (record offsets, titles, and
+            atom counts) is built in one pass over a memory map of the file and
+            saved to a sidecar file, which is reused as long as the size and
+            modification time of the SD file have not changed. If records were
+            only appended, just the new part of the file is scanned.
+Version:    Oct 18 2026
+Usage:      python sdf_index.py -i input.sdf
+            python sdf_index.py -i input.sdf --get 1500
+            python sdf_index.py -i input.sdf --title benzene
+            python sdf_index.py -i input.sdf --split 8 -o shard
+Example:    import sdf_index
+            idx = sdf_index.SDFIndex('input.sdf')
+            rec = idx.record(1500)
+            for start, stop in idx.shards(8):
+                ...
+
+"""
+
+import os
+import mmap
+import zlib
+import argparse
+import numpy as np
+
+INDEX_VERSION = 1
+# bytes before the end of the indexed part used to check that it is unchanged
+TAIL_BYTES = 4096
+
+
+def index_name(filename):
+    """
+    Name of the sidecar index file of filename.
+    """
+    return filename + '.idx.npz'
+
+
+def _file_key(filename):
+    st = os.stat(filename)
+    return st.st_size, st.st_mtime_ns
+
+
+def _scan(mm, start):
+    """
+    Find the records of a memory-mapped SD file from byte start onward.
+
+    Returns
+    -------
+    offsets : list of ints
+        Byte offset of the start of each record, then of the end of the
+        last record.
+    titles : list of strings
+    natoms : list of ints
+
+    """
+    offsets = [start]
+    size = len(mm)
+    pos = start
+    while True:
+        i = mm.find(b'$$$$', pos)
+        if i < 0:
+            break
+        # only a $$$$ at the start of a line ends a record
+        if i > offsets[-1] and mm[i-1:i] != b'\n':
+            pos = i + 4
+            continue
+        j = mm.find(b'\n', i)
+        pos = size if j < 0 else j + 1
+        offsets.append(pos)
+    # last record may be missing its $$$$ line
+    if mm[offsets[-1]:].strip():
+        offsets.append(size)
+
+    titles = []
+    natoms = []
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        head = mm[start:min(stop, start + 1024)].split(b'\n', 4)
+        titles.append(head[0].rstrip(b'\r').decode('utf-8', errors='replace'))
+        natoms.append(_count_atoms(head, mm, start, stop))
+    return offsets, titles, natoms
+
+
+def _count_atoms(head, mm, start, stop):
+    """
+    Number of atoms from the counts line of a V2000 or V3000 record.
+    """
+    if len(head) < 4:
+        return 0
+    if b'V3000' in head[3]:
+        i = mm.find(b'M  V30 COUNTS', start, stop)
+        if i < 0:
+            return 0
+        return int(mm[i:mm.find(b'\n', i)].split()[3])
+    try:
+        return int(head[3][:3])
+    except ValueError:
+        return 0
+
+
+class SDFIndex:
+    """
+    Parameters
+    ----------
+    filename : string
+        Name of an uncompressed SD file.
+    rebuild : bool (opt.)
+        Rescan the whole file even if a valid index exists.
+    save : bool (opt.)
+        Save the index to the sidecar file after building it.
+
+    Attributes
+    ----------
+    offsets : numpy array of ints
+        Byte offset of each record, followed by the end of the last record.
+    titles : numpy array of strings
+    natoms : numpy array of ints
+
+    """
+    def __init__(self, filename, rebuild=False, save=True):
+        if filename.lower().endswith('.gz'):
+            raise ValueError("Cannot index gzipped file %s" % filename)
+        self.filename = filename
+        size, mtime_ns = _file_key(filename)
+
+        old = None if rebuild else self._load()
+        if old is not None and old['size'] == size and old['mtime_ns'] == mtime_ns:
+            self.offsets, self.titles, self.natoms = old['offsets'], old['titles'], old['natoms']
+            return
+
+        with open(filename, 'rb') as f:
+            if size == 0:
+                offsets, titles, natoms = [0], [], []
+            else:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                offsets, titles, natoms = self._build(mm, old)
+                mm.close()
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.titles = np.array(titles, dtype=str)
+        self.natoms = np.array(natoms, dtype=np.int32)
+        if save:
+            self._save(size, mtime_ns)
+
+    def _build(self, mm, old):
+        """
+        Scan the file, keeping the records of an old index if the file
+        was only appended to since it was built.
+        """
+        if old is not None and len(old['titles']) > 0 and old['size'] < len(mm):
+            end = int(old['offsets'][-1])
+            tail = mm[max(end - TAIL_BYTES, 0):end]
+            if (end == old['size'] and tail.rstrip().endswith(b'$$$$')
+                    and zlib.crc32(tail) == old['tail_crc']):
+                offsets, titles, natoms = _scan(mm, end)
+                return (list(old['offsets']) + offsets[1:],
+                        list(old['titles']) + titles, list(old['natoms']) + natoms)
+        return _scan(mm, 0)
+
+    def _load(self):
+        try:
+            with np.load(index_name(self.filename)) as npz:
+                if int(npz['version']) != INDEX_VERSION:
+                    return None
+                return {k: npz[k] for k in npz.files}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, size, mtime_ns):
+        end = int(self.offsets[-1])
+        with open(self.filename, 'rb') as f:
+            f.seek(max(end - TAIL_BYTES, 0))
+            tail_crc = zlib.crc32(f.read(min(end, TAIL_BYTES)))
+        tmpname = "{}.{}.tmp.npz".format(index_name(self.filename), os.getpid())
+        try:
+            np.savez(tmpname, version=INDEX_VERSION, size=size, mtime_ns=mtime_ns,
+                     tail_crc=tail_crc, offsets=self.offsets, titles=self.titles,
+                     natoms=self.natoms)
+            os.replace(tmpname, index_name(self.filename))
+        except OSError as e:
+            print("WARNING: Unable to save SDF index: {}".format(e))
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def record(self, k):
+        """
+        Get the bytes of record k, including its $$$$ line.
+        """
+        start, stop = int(self.offsets[k]), int(self.offsets[k+1])
+        with open(self.filename, 'rb') as f:
+            f.seek(start)
+            return f.read(stop - start)
+
+    def mol(self, k):
+        """
+        Read record k as an OEMol.
+        """
+        import openeye.oechem as oechem
+        mol = oechem.OEMol()
+        oechem.OEReadMolFromBytes(mol, '.sdf', False, self.record(k))
+        return mol
+
+    def find(self, title):
+        """
+        Get the numbers of the records with the given title.
+        """
+        return np.flatnonzero(self.titles == title)
+
+    def byte_range(self, start, stop):
+        """
+        Byte offsets of the start of record start and the end of record stop-1.
+        """
+        return int(self.offsets[start]), int(self.offsets[stop])
+
+    def shards(self, n):
+        """
+        Split the records into n contiguous shards of about equal size in bytes.
+
+        Returns
+        -------
+        list of (start, stop) record numbers of each nonempty shard
+
+        """
+        targets = np.linspace(self.offsets[0], self.offsets[-1], n + 1)[1:-1]
+        bounds = np.searchsorted(self.offsets[:-1], targets)
+        bounds = np.unique(np.concatenate([[0], bounds, [len(self)]]))
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def split_file(filename, n, prefix):
+    """
+    Write n shard files of about equal size, named prefix_000.sdf, ...
+
+    Returns
+    -------
+    list of the names of the files written
+
+    """
+    idx = SDFIndex(filename)
+    outfiles = []
+    with open(filename, 'rb') as f:
+        for i, (start, stop) in enumerate(idx.shards(n)):
+            begin, end = idx.byte_range(start, stop)
+            f.seek(begin)
+            outfile = "{}_{:03d}.sdf".format(prefix, i)
+            with open(outfile, 'wb') as out:
+                remaining = end - begin
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 1 << 24))
+                    out.write(chunk)
+                    remaining -= len(chunk)
+            outfiles.append(outfile)
+    return outfiles
+
+
+
+
+### ------------------- Parser -------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index the records of an "
+        "SD file for random access and sharding.")
+
+    parser.add_argument("-i", "--infile", required=True,
+        help="Name of input SDF file.")
+    parser.add_argument("--rebuild", action="store_true", default=False,
+        help="Rebuild the index even if it is up to date.")
+    parser.add_argument("--get", type=int,
+        help="Print the record with this number, counting from 0.")
+    parser.add_argument("--title",
+        help="Print the numbers of the records with this title.")
+    parser.add_argument("--shards", type=int,
+        help="Print the record and byte ranges of this many balanced shards.")
+    parser.add_argument("--split", type=int,
+        help="Write this many balanced shard files.")
+    parser.add_argument("-o", "--outprefix", default='shard',
+        help="Prefix of shard files written with --split.")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.infile):
+        raise parser.error("Input file %s does not exist." % args.infile)
+
+    idx = SDFIndex(args.infile, rebuild=args.rebuild)
+    print("{} records in {}".format(len(idx), args.infile))
+    if args.get is not None:
+        print(idx.record(args.get).decode('utf-8', errors='replace'), end='')
+    if args.title is not None:
+        print(' '.join(str(k) for k in idx.find(args.title)))
+    if args.shards is not None:
+        for start, stop in idx.shards(args.shards):
+            print("records {} to {}, bytes {} to {}".format(start, stop,
+                  *idx.byte_range(start, stop)))
+    if args.split is not None:
+        for outfile in split_file(args.infile, args.split, args.outprefix):
+            print("Wrote", outfile)
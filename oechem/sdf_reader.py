@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+
+"""
+Purpose:    Scan SD files for record titles and SD tag data without building
+            molecules or needing an OpenEye license. The file is read in large
+            binary chunks and split on the $$$$ lines, and only the requested
+            tags are searched for in each record. Gzipped files (.sdf.gz) are
+            supported. For other molecule formats, iter_tag_values falls back
+            to OEChem.
+Version:    Oct 18 2026
+Example:    import sdf_reader
+            for title, data in sdf_reader.iter_records('qm.sdf', ['Energy']):
+                print(title, data.get('Energy'))
+
+"""
+
+import os
+import gzip
+
+# bytes to read at a time
+CHUNKSIZE = 1 << 22
+SDF_EXTS = ('.sdf', '.sd', '.mdl')
+
+
+def is_sdf(filename):
+    """
+    Whether filename has an SD file extension, optionally gzipped.
+    """
+    base, ext = os.path.splitext(filename.lower())
+    if ext == '.gz':
+        ext = os.path.splitext(base)[1]
+    return ext in SDF_EXTS
+
+
+def open_sdf(filename):
+    """
+    Open an SD file, or a gzipped one, for reading bytes.
+    """
+    if filename.lower().endswith('.gz'):
+        return gzip.open(filename, 'rb')
+    return open(filename, 'rb')
+
+
+def iter_record_bytes(f, chunksize=CHUNKSIZE, nbytes=None):
+    """
+    Split an open binary SD file into records.
+
+    Parameters
+    ----------
+    f : file object
+        File opened for reading bytes, positioned at the start of a record.
+    chunksize : int (opt.)
+        Number of bytes to read at a time.
+    nbytes : int (opt.)
+        Number of bytes to read in total, e.g., to the end of a shard.
+        Default is to read to the end of the file.
+
+    Returns
+    -------
+    generator of bytes of each record, without its $$$$ line
+
+    """
+    buf = b''
+    eof = False
+    while not eof:
+        if nbytes is not None:
+            chunksize = min(chunksize, nbytes)
+        chunk = f.read(chunksize)
+        if nbytes is not None:
+            nbytes -= len(chunk)
+        eof = not chunk
+        buf += chunk
+        start = pos = 0
+        while True:
+            i = buf.find(b'$$$$', pos)
+            if i < 0:
+                break
+            # only a $$$$ at the start of a line ends a record
+            if i > start and buf[i-1] != ord('\n'):
+                pos = i + 4
+                continue
+            j = buf.find(b'\n', i)
+            if j < 0:
+                if not eof:
+                    break
+                j = len(buf)
+            yield buf[start:i]
+            start = pos = j + 1
+        buf = buf[start:]
+
+    # last record may be missing its $$$$ line
+    if buf.strip():
+        yield buf
+
+
+def parse_record(rec, tags=None):
+    """
+    Get the title and SD tag data of one record.
+
+    Parameters
+    ----------
+    rec : bytes
+        One SD file record.
+    tags : list of strings (opt.)
+        Names of SD tags to get. Default is all tags in the record.
+
+    Returns
+    -------
+    title : string
+    data : dict
+        Value of each SD tag found, with multiple lines joined by newlines.
+
+    """
+    end = rec.find(b'\n')
+    title = _decode(rec[:end if end >= 0 else len(rec)])
+
+    # SD data comes after the connection table
+    ctab_end = rec.find(b'M  END')
+    ctab_end = 0 if ctab_end < 0 else ctab_end
+    data = {}
+    if tags is None:
+        lines = rec[ctab_end:].split(b'\n')
+        for k, line in enumerate(lines):
+            if line.startswith(b'>') and b'<' in line:
+                lt = line.find(b'<')
+                name = line[lt+1:line.find(b'>', lt)]
+                data[_decode(name)] = _value(lines, k+1)
+        return title, data
+
+    for tag in tags:
+        key = b'<' + tag.encode() + b'>'
+        pos = rec.find(key, ctab_end)
+        while pos >= 0:
+            line_start = rec.rfind(b'\n', 0, pos) + 1
+            if rec.startswith(b'>', line_start):
+                value_start = rec.find(b'\n', pos)
+                if value_start < 0:
+                    break
+                lines = rec[value_start+1:].split(b'\n\n', 1)[0].split(b'\n')
+                data[tag] = _value(lines, 0)
+                break
+            pos = rec.find(key, pos + 1)
+    return title, data
+
+
+def _value(lines, first):
+    """
+    Join the lines of an SD tag value, which ends at a blank line.
+    """
+    value = []
+    for line in lines[first:]:
+        line = line.rstrip(b'\r')
+        if line == b'':
+            break
+        value.append(_decode(line))
+    return '\n'.join(value)
+
+
+def _decode(b):
+    return b.rstrip(b'\r').decode('utf-8', errors='replace')
+
+
+def _record_start(f, pos, chunksize=CHUNKSIZE):
+    """
+    Find the first record that starts at or after byte pos, i.e., right
+    after a $$$$ line.
+
+    Returns
+    -------
+    int byte offset, or None if no record starts there
+
+    """
+    if pos <= 0:
+        return 0
+    # look back far enough to see a $$$$ line that ends right before pos
+    base = max(pos - 80, 0)
+    f.seek(base)
+    buf = f.read(pos - base)
+    search = 0
+    while True:
+        i = buf.find(b'$$$$', search)
+        j = -1 if i < 0 else buf.find(b'\n', i)
+        if j >= 0:
+            at_line_start = buf[i-1] == ord('\n') if i > 0 else base == 0
+            if at_line_start and base + j + 1 >= pos:
+                return base + j + 1
+            search = i + 4
+            continue
+        # read more, searching again from a $$$$ that may be split
+        search = i if i >= 0 else max(len(buf) - 4, 0)
+        chunk = f.read(chunksize)
+        if not chunk:
+            return None
+        buf += chunk
+
+
+def iter_records(filename, tags=None, chunksize=CHUNKSIZE, byte_range=None):
+    """
+    Get the title and SD tag data of each record of an SD file.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the SD file, optionally gzipped.
+    tags : list of strings (opt.)
+        Names of SD tags to get. Default is all tags.
+    chunksize : int (opt.)
+        Number of bytes to read at a time.
+    byte_range : tuple of ints (opt.)
+        Start and end byte offsets (of the uncompressed data) of the records
+        to read, e.g., from sdf_index.SDFIndex.byte_range. Offsets that are
+        not record boundaries are moved to the next boundary, so records
+        are read if they start in the range, and each record is read once
+        from consecutive ranges.
+
+    Returns
+    -------
+    generator of (title, data) tuples, as from parse_record
+
+    """
+    nbytes = None
+    with open_sdf(filename) as f:
+        if byte_range is not None:
+            boundary_chunksize = min(chunksize, 1 << 16)
+            start = _record_start(f, byte_range[0], boundary_chunksize)
+            stop = _record_start(f, byte_range[1], boundary_chunksize)
+            if start is None:
+                return
+            f.seek(start)
+            nbytes = None if stop is None else stop - start
+        for rec in iter_record_bytes(f, chunksize, nbytes):
+            if rec.strip():
+                yield parse_record(rec, tags)
+
+
+def iter_tag_values(filename, tag):
+    """
+    Get the value of an SD tag for each conformer in a file. SD files are
+    scanned directly; other formats are read with OEChem.
+
+    Returns
+    -------
+    generator of (title, value) tuples, where value is an empty string
+    if the conformer does not have the tag, as from OEGetSDData
+
+    """
+    if is_sdf(filename):
+        for title, data in iter_records(filename, [tag]):
+            yield title, data.get(tag, '')
+        return
+
+    import openeye.oechem as oechem
+    ifs = oechem.oemolistream()
+    ifs.SetConfTest( oechem.OEAbsoluteConfTest() )
+    if not ifs.open(filename):
+        oechem.OEThrow.Warning("Unable to open %s for reading" % filename)
+        return
+    for mol in ifs.GetOEMols():
+        for conf in mol.GetConfs():
+            yield mol.GetTitle(), oechem.OEGetSDData(conf, tag)
+    ifs.close()
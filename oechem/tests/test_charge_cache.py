@@ -0,0 +1,43 @@
+import sqlite3
+import charge_cache
+
+
+def count_rows(filename):
+    with sqlite3.connect(filename) as db:
+        return db.execute("SELECT COUNT(*) FROM charges").fetchone()[0]
+
+
+def test_put_get_and_count(tmp_path):
+    filename = str(tmp_path / 'charges.db')
+    cache = charge_cache.ChargeCache(filename)
+    cache.put('CC', 'm', [0.1, -0.1], [1.0])
+    cache.put('CC', 'm', [0.2, -0.2])
+    cache.put('CO', 'm', [0.3, -0.3])
+    assert len(cache) == 2
+    assert cache.get('CC', 'm') == ([0.2, -0.2], None)
+    assert cache.get('CN', 'm') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    cache = charge_cache.ChargeCache(filename)
+    assert len(cache) == 2 == count_rows(filename)
+    cache.close()
+
+
+def test_evict_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(charge_cache, 'COMMIT_EVERY', 4)
+    filename = str(tmp_path / 'charges.db')
+    cache = charge_cache.ChargeCache(filename, max_entries=3)
+    for i in range(3):
+        cache.put('C' * (i+1), 'm', [0.0], last_used=i)
+    # reading the oldest entry keeps it
+    assert cache.get('C', 'm') is not None
+    cache.put('CCCC', 'm', [0.0])
+    # evicted at the commit after COMMIT_EVERY writes
+    assert len(cache) == 3
+    cache.close()
+    cache = charge_cache.ChargeCache(filename)
+    assert cache.get('CC', 'm') is None
+    assert cache.get('C', 'm') is not None
+    assert len(cache) == 3 == count_rows(filename)
+    cache.close()
@@ -0,0 +1,150 @@
+import time
+import threading
+import pytest
+import charge_mols
+
+
+def stub_charge(record):
+    """
+    Stub charging backend: fails molecules whose data is b'fail', raises
+    for b'raise', and takes longer for earlier molecules so that workers
+    finish out of order.
+    """
+    title, data = record
+    if data == b'raise':
+        raise RuntimeError("stub error")
+    time.sleep(0.02 / (1 + int(title[3:])))
+    return title, data != b'fail', data + b' charged'
+
+
+def make_records(n, bad=()):
+    return [("mol{}".format(i), bad[i] if i in bad else b'mol', False) for i in range(n)]
+
+
+@pytest.mark.parametrize('nprocs', [1, 4])
+def test_output_order(nprocs):
+    records = make_records(20)
+    out = list(charge_mols.charge_records(records, stub_charge, nprocs))
+    assert [r[0] for r in out] == [r[0] for r in records]
+    assert all(status and data == b'mol charged' and not cached
+               for title, status, data, cached in out)
+
+
+@pytest.mark.parametrize('nprocs', [1, 3])
+def test_max_in_flight(nprocs):
+    max_in_flight = 5
+    nread = 0
+
+    def records():
+        nonlocal nread
+        for rec in make_records(30):
+            nread += 1
+            yield rec
+
+    nout = 0
+    for _ in charge_mols.charge_records(records(), stub_charge, nprocs, max_in_flight):
+        nout += 1
+        assert nread - nout < max_in_flight
+    assert nout == 30
+
+
+def test_failures_go_to_fail_list():
+    failed = []
+    records = make_records(8, bad={2: b'fail', 5: b'raise'})
+    out = list(charge_mols.charge_records(records, stub_charge, 2, failed=failed))
+    assert failed == ['mol2', 'mol5']
+    assert [r[1] for r in out] == [i not in (2, 5) for i in range(8)]
+    # a failed molecule is returned uncharged
+    assert out[5][2] == b'raise'
+
+
+@pytest.mark.parametrize('nprocs', [1, 2])
+def test_cached_records_stay_local(nprocs):
+    # a lock cannot be pickled, so this fails if a cached record is sent to a worker
+    lock = threading.Lock()
+    records = make_records(12)
+    records[0] = ('mol0', lock, True)
+    records[7] = ('mol7', lock, True)
+    out = list(charge_mols.charge_records(records, stub_charge, nprocs, max_in_flight=3))
+    assert [r[0] for r in out] == [r[0] for r in records]
+    assert out[0] == ('mol0', True, lock, True)
+    assert out[7] == ('mol7', True, lock, True)
+    assert all(r[2] == b'mol charged' and not r[3] for i, r in enumerate(out) if i not in (0, 7))
+
+
+def stub_oe_charge(record):
+    """
+    Stub charging backend with OEChem: sets every partial charge to 0.25.
+    """
+    import openeye.oechem as oechem
+    title, data = record
+    mol = oechem.OEMol()
+    oechem.OEReadMolFromBytes(mol, '.oeb', False, data)
+    for atom in mol.GetAtoms():
+        atom.SetPartialCharge(0.25)
+    return title, True, oechem.OEWriteMolToBytes('.oeb', False, mol)
+
+
+def test_reffile_charges_not_cached(tmp_path):
+    oechem = pytest.importorskip('openeye.oechem')
+
+    def write_mols(filename, charge):
+        ofs = oechem.oemolostream(filename)
+        for i, smiles in enumerate(['CCO', 'c1ccccc1N']):
+            mol = oechem.OEMol()
+            oechem.OESmilesToMol(mol, smiles)
+            mol.SetTitle('mol{}'.format(i))
+            for atom in mol.GetAtoms():
+                atom.SetPartialCharge(charge)
+            oechem.OEWriteMolecule(ofs, mol)
+        ofs.close()
+
+    def read_charges(filename):
+        return [[atom.GetPartialCharge() for atom in mol.GetAtoms()]
+                for mol in oechem.oemolistream(filename).GetOEMols()]
+
+    infile, reffile = str(tmp_path / 'in.mol2'), str(tmp_path / 'ref.mol2')
+    cachefile = str(tmp_path / 'charges.db')
+    write_mols(infile, 0.0)
+    write_mols(reffile, 0.5)
+
+    charge_mols.charge_mols(infile, str(tmp_path / 'out_ref.mol2'), reffile,
+                            cachefile=cachefile)
+    assert all(q == 0.5 for qs in read_charges(str(tmp_path / 'out_ref.mol2')) for q in qs)
+
+    outfile = str(tmp_path / 'out.mol2')
+    charge_mols.charge_mols(infile, outfile, charge_func=stub_oe_charge,
+                            cachefile=cachefile)
+    assert all(q == 0.25 for qs in read_charges(outfile) for q in qs)
+
+
+def test_journal_oeb_round_trip(tmp_path):
+    oechem = pytest.importorskip('openeye.oechem')
+
+    infile, outfile = str(tmp_path / 'in.oeb'), str(tmp_path / 'out.oeb')
+    smiles = ['CCO', 'c1ccccc1N', 'CC(=O)O']
+    ofs = oechem.oemolostream(infile)
+    for i, smi in enumerate(smiles):
+        mol = oechem.OEMol()
+        oechem.OESmilesToMol(mol, smi)
+        mol.SetTitle('mol{}'.format(i))
+        oechem.OEWriteMolecule(ofs, mol)
+    ofs.close()
+
+    def read_mols():
+        return [oechem.OEMol(mol) for mol in oechem.oemolistream(outfile).GetOEMols()]
+
+    journalfile = str(tmp_path / 'charge.jnl')
+    charge_mols.charge_mols(infile, outfile, charge_func=stub_oe_charge,
+                            journalfile=journalfile)
+    # resuming with every molecule journaled leaves the output as it was
+    charge_mols.charge_mols(infile, outfile, charge_func=stub_oe_charge,
+                            journalfile=journalfile)
+
+    mols = read_mols()
+    assert [mol.GetTitle() for mol in mols] == ['mol0', 'mol1', 'mol2']
+    for mol, smi in zip(mols, smiles):
+        ref = oechem.OEMol()
+        oechem.OESmilesToMol(ref, smi)
+        assert oechem.OEMolToSmiles(mol) == oechem.OEMolToSmiles(ref)
+        assert all(atom.GetPartialCharge() == 0.25 for atom in mol.GetAtoms())
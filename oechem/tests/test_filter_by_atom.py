@@ -0,0 +1,26 @@
+import io
+import pytest
+import filter_by_atom
+
+RECORD = (b"@<TRIPOS>MOLECULE\nmol{}\n 2 1 0 0 0\nSMALL\nNO_CHARGES\n\n"
+          b"@<TRIPOS>ATOM\n"
+          b"      1 C1          0.0000    0.0000    0.0000 C.3     1  LIG1        0.0000\n"
+          b"      2 O1          1.4000    0.0000    0.0000 O.3     1  LIG1        0.0000\n"
+          b"@<TRIPOS>BOND\n     1     1     2    1\n")
+
+
+@pytest.mark.parametrize('chunksize', [1, 5, 16, 17, 100, 1 << 20])
+@pytest.mark.parametrize('header', [b'', b'# comment\n' * 10])
+def test_iter_mol2_records_small_chunks(chunksize, header):
+    records = [RECORD.replace(b'{}', str(i).encode()) for i in range(3)]
+    f = io.BytesIO(header + b''.join(records))
+    assert list(filter_by_atom.iter_mol2_records(f, chunksize)) == records
+
+
+def test_iter_mol2_records_no_molecules():
+    f = io.BytesIO(b'# nothing here\n' * 5)
+    assert list(filter_by_atom.iter_mol2_records(f, 4)) == []
+
+
+def test_mol2_elements():
+    assert filter_by_atom.mol2_elements(RECORD) == [6, 8]
@@ -0,0 +1,151 @@
+import os
+import numpy as np
+import pytest
+import sdf_index
+import filter_by_atom
+
+
+def record(title, symbols=('C', 'O'), energy=None):
+    """
+    Text of one V2000 SDF record, with its $$$$ line.
+    """
+    lines = [title, '  test', '', '{:3d}  0  0  0  0  0  0  0  0  0999 V2000'.format(len(symbols))]
+    for i, sym in enumerate(symbols):
+        lines.append('{:10.4f}    0.0000    0.0000 {:<3} 0  0  0  0  0  0  0  0  0  0  0  0'.format(1.4*i, sym))
+    lines.append('M  END')
+    if energy is not None:
+        lines += ['>  <Energy>', str(energy), '']
+    lines.append('$$$$')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def write_sdf(filename, titles, mode='wb'):
+    with open(filename, mode) as f:
+        for title in titles:
+            f.write(record(title, energy=len(title)))
+
+
+def bump_mtime(filename):
+    # make sure the modification time changes even on coarse file systems
+    st = os.stat(filename)
+    os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_build_and_reload(tmp_path, monkeypatch):
+    fn = str(tmp_path / 'in.sdf')
+    titles = ['mol{}'.format(i) for i in range(20)]
+    write_sdf(fn, titles)
+
+    idx = sdf_index.SDFIndex(fn)
+    assert len(idx) == 20
+    assert list(idx.titles) == titles
+    assert list(idx.natoms) == [2] * 20
+    assert idx.offsets[0] == 0 and idx.offsets[-1] == os.path.getsize(fn)
+    assert idx.record(7) == record('mol7', energy=4)
+    assert list(idx.find('mol13')) == [13]
+    assert os.path.exists(sdf_index.index_name(fn))
+
+    # an unchanged file is loaded from the sidecar without scanning
+    def fail(*args):
+        raise AssertionError("file was scanned again")
+    monkeypatch.setattr(sdf_index, '_scan', fail)
+    again = sdf_index.SDFIndex(fn)
+    np.testing.assert_array_equal(again.offsets, idx.offsets)
+    assert list(again.titles) == titles
+
+
+def test_append_scans_only_new_records(tmp_path, monkeypatch):
+    fn = str(tmp_path / 'in.sdf')
+    write_sdf(fn, ['a', 'b', 'c'])
+    old = sdf_index.SDFIndex(fn)
+    end = int(old.offsets[-1])
+
+    starts = []
+    orig = sdf_index._scan
+    def scan(mm, start):
+        starts.append(start)
+        return orig(mm, start)
+    monkeypatch.setattr(sdf_index, '_scan', scan)
+
+    write_sdf(fn, ['d', 'e'], mode='ab')
+    bump_mtime(fn)
+    idx = sdf_index.SDFIndex(fn)
+    assert starts == [end]
+    assert list(idx.titles) == ['a', 'b', 'c', 'd', 'e']
+    assert idx.record(4) == record('e', energy=1)
+    np.testing.assert_array_equal(idx.offsets[:4], old.offsets)
+
+
+def test_stale_index_is_rebuilt(tmp_path, monkeypatch):
+    fn = str(tmp_path / 'in.sdf')
+    write_sdf(fn, ['a', 'b', 'c'])
+    sdf_index.SDFIndex(fn)
+
+    starts = []
+    orig = sdf_index._scan
+    def scan(mm, start):
+        starts.append(start)
+        return orig(mm, start)
+    monkeypatch.setattr(sdf_index, '_scan', scan)
+
+    # same size but different records
+    write_sdf(fn, ['x', 'y', 'z'])
+    bump_mtime(fn)
+    assert list(sdf_index.SDFIndex(fn).titles) == ['x', 'y', 'z']
+
+    # rewritten and longer, so the tail no longer matches the old index
+    write_sdf(fn, ['p', 'q', 'r', 's'])
+    bump_mtime(fn)
+    assert list(sdf_index.SDFIndex(fn).titles) == ['p', 'q', 'r', 's']
+    assert starts == [0, 0]
+
+    # shorter
+    write_sdf(fn, ['only'])
+    bump_mtime(fn)
+    assert list(sdf_index.SDFIndex(fn).titles) == ['only']
+
+
+def test_missing_final_delimiter(tmp_path):
+    fn = str(tmp_path / 'in.sdf')
+    write_sdf(fn, ['a', 'b'])
+    with open(fn, 'ab') as f:
+        f.write(record('c')[:-len(b'$$$$\n')])
+    idx = sdf_index.SDFIndex(fn, save=False)
+    assert list(idx.titles) == ['a', 'b', 'c']
+    assert idx.offsets[-1] == os.path.getsize(fn)
+
+
+def test_gzip_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        sdf_index.SDFIndex(str(tmp_path / 'in.sdf.gz'))
+
+
+@pytest.mark.parametrize('n', [1, 3, 7, 50])
+def test_split_file(tmp_path, n):
+    fn = str(tmp_path / 'in.sdf')
+    titles = ['mol{}'.format(i) for i in range(23)]
+    write_sdf(fn, titles)
+
+    outfiles = sdf_index.split_file(fn, n, str(tmp_path / 'shard'))
+    assert len(outfiles) == min(n, 23)
+    assert outfiles[0] == str(tmp_path / 'shard_000.sdf')
+    shards = [open(f, 'rb').read() for f in outfiles]
+    assert all(shard.endswith(b'$$$$\n') for shard in shards)
+    assert b''.join(shards) == open(fn, 'rb').read()
+    # each shard boundary is within one record of its target
+    target = os.path.getsize(fn) / len(shards)
+    assert all(abs(len(shard) - target) <= len(record('mol10', energy=5))
+               for shard in shards)
+
+
+@pytest.mark.parametrize('nprocs', [1, 2])
+def test_filter_by_atom_byte_ranges(tmp_path, monkeypatch, nprocs):
+    monkeypatch.setattr(filter_by_atom, 'BATCHSIZE', 4)
+    fn, out = str(tmp_path / 'in.sdf'), str(tmp_path / 'out.sdf')
+    recs = [record('mol{}'.format(i), ('C', 'Cl') if i % 3 == 0 else ('C', 'O'))
+            for i in range(17)]
+    with open(fn, 'wb') as f:
+        f.write(b''.join(recs))
+
+    filter_by_atom.filter_by_atom(fn, out, boring_list=[1, 6, 7, 8], nprocs=nprocs)
+    assert open(out, 'rb').read() == b''.join(recs[::3])
@@ -0,0 +1,113 @@
+import gzip
+import io
+import pytest
+import sdf_reader
+
+
+def record(title, tags=(), nl='\n'):
+    """
+    Text of one V2000 SDF record with SD tags, without its $$$$ line.
+    """
+    lines = [title, '  test', '',
+             '  2  1  0  0  0  0  0  0  0  0999 V2000',
+             '    0.0000    0.0000    0.0000 C   0  0  0  0  0  0  0  0  0  0  0  0',
+             '    1.4000    0.0000    0.0000 O   0  0  0  0  0  0  0  0  0  0  0  0',
+             '  1  2  1  0  0  0  0',
+             'M  END']
+    for name, value in tags:
+        lines += ['>  <{}>'.format(name)] + value.split('\n') + ['']
+    return nl.join(lines + ['']).encode()
+
+
+def sdf(records, nl='\n', final=True):
+    delim = '$$$${}'.format(nl).encode()
+    text = delim.join(records) + delim
+    return text if final else text[:-len(delim)]
+
+
+RECORDS = [record('mol{}'.format(i), [('Energy', str(-1.5*i)), ('Note', 'line one\nline two')])
+           for i in range(12)]
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 100, 1 << 20])
+@pytest.mark.parametrize('final', [True, False])
+def test_iter_record_bytes(chunksize, final):
+    f = io.BytesIO(sdf(RECORDS, final=final))
+    assert list(sdf_reader.iter_record_bytes(f, chunksize)) == RECORDS
+
+
+def test_iter_record_bytes_nbytes():
+    f = io.BytesIO(sdf(RECORDS))
+    nbytes = len(sdf(RECORDS[:3]))
+    assert list(sdf_reader.iter_record_bytes(f, 10, nbytes)) == RECORDS[:3]
+
+
+def test_dollars_inside_record():
+    rec = record('mol', [('Name', 'costs $$$$ a lot')])
+    f = io.BytesIO(sdf([rec, rec]))
+    assert list(sdf_reader.iter_record_bytes(f, 5)) == [rec, rec]
+
+
+@pytest.mark.parametrize('nl', ['\n', '\r\n'])
+def test_parse_record(nl):
+    rec = record('benzene', [('Energy', '-12.5'), ('Note', 'line one\nline two'),
+                             ('Empty', '')], nl=nl)
+    title, data = sdf_reader.parse_record(rec)
+    assert title == 'benzene'
+    assert data == {'Energy': '-12.5', 'Note': 'line one\nline two', 'Empty': ''}
+
+    title, data = sdf_reader.parse_record(rec, ['Note', 'Missing'])
+    assert title == 'benzene'
+    assert data == {'Note': 'line one\nline two'}
+
+
+def test_parse_record_tag_name_in_value():
+    rec = record('mol', [('Comment', 'see <Energy>'), ('Energy', '3.0')])
+    assert sdf_reader.parse_record(rec, ['Energy'])[1] == {'Energy': '3.0'}
+
+
+@pytest.mark.parametrize('nl', ['\n', '\r\n'])
+@pytest.mark.parametrize('compress', [False, True])
+@pytest.mark.parametrize('final', [True, False])
+def test_iter_records(tmp_path, nl, compress, final):
+    records = [record('mol{}'.format(i), [('Energy', str(i)), ('Note', 'a\nb')], nl=nl)
+               for i in range(5)]
+    text = sdf(records, nl=nl, final=final)
+    filename = str(tmp_path / ('in.sdf.gz' if compress else 'in.sdf'))
+    with (gzip.open if compress else open)(filename, 'wb') as f:
+        f.write(text)
+
+    out = list(sdf_reader.iter_records(filename, chunksize=64))
+    assert out == [('mol{}'.format(i), {'Energy': str(i), 'Note': 'a\nb'}) for i in range(5)]
+    assert list(sdf_reader.iter_tag_values(filename, 'Note')) == [
+        ('mol{}'.format(i), 'a\nb') for i in range(5)]
+
+
+@pytest.mark.parametrize('nl', ['\n', '\r\n'])
+@pytest.mark.parametrize('compress', [False, True])
+@pytest.mark.parametrize('final', [True, False])
+def test_byte_ranges_mid_record(tmp_path, nl, compress, final):
+    records = [record('mol{}'.format(i), [('Energy', str(i))], nl=nl) for i in range(12)]
+    text = sdf(records, nl=nl, final=final)
+    filename = str(tmp_path / ('in.sdf.gz' if compress else 'in.sdf'))
+    with (gzip.open if compress else open)(filename, 'wb') as f:
+        f.write(text)
+
+    def titles(byte_range):
+        return [t for t, _ in sdf_reader.iter_records(filename, ['Energy'], 16, byte_range)]
+
+    # consecutive ranges with any boundaries read each record once, in order
+    for step in [1, 37, 100, 251, len(text) // 3, len(text)]:
+        bounds = list(range(0, len(text), step)) + [len(text)]
+        got = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            got += titles((start, stop))
+        assert got == ['mol{}'.format(i) for i in range(12)]
+
+    # a record is read by the range it starts in
+    start = text.index(b'mol3')
+    assert titles((start, start + 1)) == ['mol3']
+    assert titles((start + 1, start + 2)) == []
+    assert titles((start - 1, start)) == []
+    assert titles((start - 3, len(text) + 100)) == ['mol{}'.format(i) for i in range(3, 12)]
+    assert titles((len(text), len(text) + 100)) == []
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+"""
+Purpose:    Statistical inefficiency and subsampling of correlated timeseries,
+            computed for all columns of a 2D array at once using FFT-based
+            autocorrelation functions. Follows the same estimator as
+            pymbar.timeseries.statisticalInefficiency (with fast=False) and
+            pymbar.timeseries.subsampleCorrelatedData, without pymbar.
+Version:    Oct 18 2026
+Example:    import autocorr
+            g = autocorr.statistical_inefficiency(y_mat)
+            indices = autocorr.subsample_indices(len(y_mat), g[0])
+
+References:
+- Chodera, J. Chem. Theory Comput. 12:1799, 2016
+- https://github.com/choderalab/pymbar/blob/master/pymbar/timeseries.py
+
+"""
+
+import numpy as np
+
+def autocorrelation(y_mat):
+    """
+    Normalized autocorrelation function of each column, where C(t) is the
+    average of dy(s)*dy(s+t) over the T-t available pairs, divided by the
+    variance.
+
+    Parameters
+    ----------
+    y_mat : numpy array
+        1D array of one series, or 2D array with one series per column.
+
+    Returns
+    -------
+    numpy array of the same shape as y_mat. Columns with zero variance
+    have C(t) of zero.
+
+    """
+    y = np.asarray(y_mat, dtype=np.float64)
+    T = y.shape[0]
+    dy = y - y.mean(axis=0)
+
+    # zero-pad to avoid circular correlation, then use Wiener-Khinchin
+    nfft = 1 << (2*T - 1).bit_length()
+    fy = np.fft.rfft(dy, n=nfft, axis=0)
+    acov = np.fft.irfft(fy * np.conj(fy), n=nfft, axis=0)[:T]
+
+    counts = np.arange(T, 0, -1, dtype=np.float64)
+    if y.ndim > 1:
+        counts = counts[:, np.newaxis]
+    sigma2 = acov[0] / T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acf = np.where(sigma2 > 0, acov / counts / sigma2, 0.)
+    return acf
+
+
+def statistical_inefficiency(y_mat, mintime=3):
+    """
+    Statistical inefficiency g of each column, from integrating the
+    autocorrelation function until it first drops to zero after mintime.
+
+    Parameters
+    ----------
+    y_mat : numpy array
+        1D array of one series, or 2D array with one series per column.
+    mintime : int (opt.)
+        Minimum lag at which the autocorrelation may be cut off.
+
+    Returns
+    -------
+    float for 1D input, or 1D numpy array of g for each column.
+    g is at least 1.
+
+    """
+    y = np.asarray(y_mat, dtype=np.float64)
+    T = y.shape[0]
+    acf = autocorrelation(y)
+
+    # lags t = 1 ... T-2 are used by pymbar
+    t = np.arange(1, max(T-1, 1), dtype=np.float64)
+    if y.ndim > 1:
+        t = t[:, np.newaxis]
+    C = acf[1:T-1]
+
+    # keep terms before the first lag where C <= 0 and t > mintime
+    stop = (C <= 0.) & (t > mintime)
+    keep = np.cumsum(stop, axis=0) == 0
+    g = 1. + 2. * np.sum(C * (1. - t/T) * keep, axis=0)
+    g = np.maximum(g, 1.)
+
+    if y.ndim == 1:
+        return float(g)
+    return g
+
+
+def subsample_indices(T, g):
+    """
+    Indices of approximately uncorrelated samples, spaced g apart.
+
+    Parameters
+    ----------
+    T : int
+        Length of the timeseries.
+    g : float
+        Statistical inefficiency of the timeseries.
+
+    Returns
+    -------
+    1D numpy array of ints
+
+    """
+    n = np.arange(int(np.ceil(T / g)) + 1)
+    indices = np.round(n * g).astype(int)
+    return np.unique(indices[indices < T])
@@ -9,32 +9,92 @@ combine all dependent variable columns into a single file,
 and also create a new column of the average of the dependent columns.
 
 By:         Victoria T. Lim
-Version:    Feb 3 2020
+Version:    Oct 18 2026
 
 """
 
+import os
+import sys
+import itertools
 import numpy as np
-
-def combine_and_avg(infiles, outfile):
-
-    # load data, combine to single array, delete x columns
-    arrays = [np.loadtxt(f) for f in infiles]
-    combined = np.concatenate(arrays, axis=1)
-    trimmed = np.delete(combined, np.s_[::2], 1)
-
-    # calculate average across rows
-    avg = np.mean(trimmed, axis=1)
-
-    # generate new x column
-    x = np.arange(0, trimmed.shape[0])
-
-    # combine all columns together
-    full = np.column_stack((x, trimmed, avg))
-
-    # save output
-    np.savetxt(outfile, full, fmt='%1.3f', delimiter='\t',
-        header="Columns in order of x, y1, y2, ..., avg(y)")
-
+import column_reader
+
+def combine_and_avg(infiles, outfile, std=False, sem=False,
+                    chunksize=column_reader.CHUNKSIZE):
+    """
+    Read all input files in lockstep blocks of rows and write the combined
+    columns to the output file as each block is processed.
+
+    Parameters
+    ----------
+    infiles : list of strings
+        Names of the input files, each with x in the first column and y in
+        the second column.
+    outfile : string
+        Name of the output file.
+    std : bool (opt.)
+        Also write the sample standard deviation of the y columns of each row.
+    sem : bool (opt.)
+        Also write the standard error of the mean of the y columns of each row.
+    chunksize : int (opt.)
+        Number of rows to read from each file at a time.
+
+    The output is written to a temporary file that replaces outfile only
+    when all rows have been written, so an error never leaves a partial
+    output file behind.
+
+    """
+    if (std or sem) and len(infiles) < 2:
+        sys.exit("ERROR: --std and --sem need at least two input files.")
+
+    header = "Columns in order of x, y1, y2, ..., avg(y)"
+    if std:
+        header += ", std(y)"
+    if sem:
+        header += ", sem(y)"
+
+    readers = [column_reader.iter_blocks(f, usecols=[0, 1], chunksize=chunksize)
+               for f in infiles]
+    nrows = 0
+
+    tmpname = "{}.{}.tmp".format(outfile, os.getpid())
+    try:
+        with open(tmpname, 'w') as out:
+            out.write("# {}\n".format(header))
+
+            for blocks in itertools.zip_longest(*readers):
+
+                # check that all files have the same rows and the same x values
+                if any(b is None or b.shape[0] != blocks[0].shape[0] for b in blocks):
+                    sys.exit("ERROR: Input files have different numbers of data rows.")
+                x_ref = blocks[0][:,0]
+                for f, b in zip(infiles[1:], blocks[1:]):
+                    mismatch = ~np.isclose(b[:,0], x_ref)
+                    if np.any(mismatch):
+                        sys.exit("ERROR: x column of {} does not match {} at data "
+                                 "row {}.".format(f, infiles[0], nrows + np.argmax(mismatch)))
+
+                # combine the y columns and calculate average across rows
+                trimmed = np.column_stack([b[:,1] for b in blocks])
+                columns = [trimmed, trimmed.mean(axis=1)]
+                if std or sem:
+                    stds = trimmed.std(axis=1, ddof=1)
+                if std:
+                    columns.append(stds)
+                if sem:
+                    columns.append(stds / np.sqrt(trimmed.shape[1]))
+
+                # generate new x column
+                x = np.arange(nrows, nrows + trimmed.shape[0])
+                nrows += trimmed.shape[0]
+
+                # save output
+                full = np.column_stack([x] + columns)
+                np.savetxt(out, full, fmt='%1.3f', delimiter='\t')
+    except BaseException:
+        os.remove(tmpname)
+        raise
+    os.replace(tmpname, outfile)
 
 
 if __name__ == "__main__":
@@ -47,6 +107,14 @@ if __name__ == "__main__":
     parser.add_argument("-o", "--outfile", default='output.dat',
                         help="Name of the output file.")
 
+    parser.add_argument("--std", action="store_true", default=False,
+                        help="Add a column of the sample standard deviation "
+                             "across input files.")
+
+    parser.add_argument("--sem", action="store_true", default=False,
+                        help="Add a column of the standard error of the mean "
+                             "across input files.")
+
     args = parser.parse_args()
 
-    combine_and_avg(args.infiles, args.outfile)
+    combine_and_avg(args.infiles, args.outfile, args.std, args.sem)
@@ -0,0 +1,222 @@
+#!/usr/bin/python
+
+"""
+Purpose:    Read whitespace-delimited numeric columns from large text data
+            files (e.g., GROMACS .xvg or VMD .dat output) in fixed-size chunks.
+            Only the selected columns are converted to floats.
+            With cache=True, the parsed data are also saved to a binary
+            sidecar file that is memory-mapped on later reads, as long as the
+            size and modification time of the text file have not changed.
+Version:    Oct 18 2026
+Example:    import column_reader
+            for block in column_reader.iter_blocks('rmsd.dat', usecols=[0,2]):
+                ...
+            data = column_reader.load_columns('rmsd.dat', cache=True)
+
+"""
+
+import os
+import json
+import itertools
+import numpy as np
+
+COMMENTS = ('#', '@')
+CHUNKSIZE = 100000
+CACHE_VERSION = 1
+
+def parse_columns(colstr):
+    """
+    Convert a column string from the command line into a list of indices.
+
+    Parameters
+    ----------
+    colstr : string or None
+        Column indices separated by semicolons, e.g., "2;3;4"
+
+    Returns
+    -------
+    list of ints, or None if colstr is None
+
+    """
+    if colstr is None:
+        return None
+    return [int(c) for c in colstr.split(';') if c.strip() != '']
+
+
+def _data_lines(f, comments):
+    """
+    Generator of split data lines from an open file. Each line is cut at
+    the first of any of the comment characters, and lines with nothing
+    left are skipped.
+    """
+    for line in f:
+        for c in comments:
+            i = line.find(c)
+            if i >= 0:
+                line = line[:i]
+        fields = line.split()
+        if fields:
+            yield fields
+
+
+def _cache_names(filename):
+    """
+    Names of the binary data and metadata sidecar files of filename.
+    """
+    return filename + '.cache.bin', filename + '.cache.json'
+
+
+def _cache_key(filename, comments):
+    """
+    Metadata identifying the current version of filename.
+    """
+    st = os.stat(filename)
+    return {'version': CACHE_VERSION, 'path': os.path.abspath(filename),
+            'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+            'comments': list(comments)}
+
+
+def open_cache(filename, comments=COMMENTS):
+    """
+    Memory-map the cached data of filename.
+
+    Returns
+    -------
+    2D numpy memmap of all columns, or None if there is no valid cache
+
+    """
+    binname, jsonname = _cache_names(filename)
+    try:
+        with open(jsonname) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    shape = tuple(meta.pop('shape'))
+    if meta != _cache_key(filename, comments):
+        return None
+    # the binary file may be missing or cut short even if the metadata is valid
+    try:
+        if os.path.getsize(binname) != 8 * int(np.prod(shape)):
+            return None
+    except OSError:
+        return None
+    if shape[0] == 0:
+        return np.empty(shape)
+    return np.memmap(binname, dtype='<f8', mode='r', shape=shape)
+
+
+def build_cache(filename, chunksize=CHUNKSIZE, comments=COMMENTS):
+    """
+    Parse all columns of filename and write them to the binary sidecar.
+    Blocks are written as they are parsed, so memory use is bounded.
+
+    Returns
+    -------
+    2D numpy memmap of all columns
+
+    """
+    binname, jsonname = _cache_names(filename)
+    meta = _cache_key(filename, comments)
+    tmpname = "{}.{}.tmp".format(binname, os.getpid())
+    nrows = 0
+    ncols = 0
+    try:
+        with open(tmpname, 'wb') as f:
+            for block in iter_blocks(filename, None, chunksize, comments):
+                if nrows > 0 and block.shape[1] != ncols:
+                    raise ValueError("Inconsistent number of columns in %s" % filename)
+                block.astype('<f8').tofile(f)
+                nrows += block.shape[0]
+                ncols = block.shape[1]
+    except Exception:
+        os.remove(tmpname)
+        raise
+    os.replace(tmpname, binname)
+
+    # write metadata last so an interrupted build is never seen as valid
+    meta['shape'] = [nrows, ncols]
+    with open(tmpname, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmpname, jsonname)
+    return open_cache(filename, comments)
+
+
+def _cached_data(filename, chunksize, comments):
+    """
+    Get the memory-mapped data of filename, building the cache if needed.
+    Returns None if the cache cannot be written.
+    """
+    data = open_cache(filename, comments)
+    if data is not None:
+        return data
+    try:
+        return build_cache(filename, chunksize, comments)
+    except OSError as e:
+        print("WARNING: Unable to write cache for {}: {}".format(filename, e))
+        return None
+
+
+def iter_blocks(filename, usecols=None, chunksize=CHUNKSIZE, comments=COMMENTS,
+                cache=False):
+    """
+    Read a text data file in blocks of at most chunksize data rows.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the input file.
+    usecols : list of ints (opt.)
+        Indices of the columns to read, with the first column being index ZERO.
+        Columns not listed are never converted to floats.
+        If not specified, all columns are read.
+    chunksize : int (opt.)
+        Maximum number of data rows in each returned block.
+    comments : tuple of strings (opt.)
+        Text from any of these to the end of a line is skipped.
+    cache : bool (opt.)
+        Read from the binary sidecar of filename, building it if needed.
+
+    Returns
+    -------
+    generator of 2D numpy arrays of shape (rows, columns)
+
+    Raises
+    ------
+    IndexError
+        If a column in usecols does not exist in the file.
+
+    """
+    data = _cached_data(filename, chunksize, comments) if cache else None
+    if data is not None:
+        for start in range(0, data.shape[0], chunksize):
+            block = data[start:start+chunksize]
+            yield block if usecols is None else block[:, usecols]
+        return
+
+    with open(filename) as f:
+        rows = _data_lines(f, comments)
+        while True:
+            chunk = list(itertools.islice(rows, chunksize))
+            if not chunk:
+                break
+            if usecols is not None:
+                chunk = [[fields[i] for i in usecols] for fields in chunk]
+            yield np.array(chunk, dtype=np.float64)
+
+
+def load_columns(filename, usecols=None, chunksize=CHUNKSIZE, comments=COMMENTS,
+                 cache=False):
+    """
+    Read the selected columns of a whole file into a single 2D array.
+    Parameters are the same as for iter_blocks. With cache=True and no
+    usecols, the returned array is a read-only memmap of the sidecar.
+    """
+    data = _cached_data(filename, chunksize, comments) if cache else None
+    if data is not None:
+        return data if usecols is None else data[:, usecols]
+
+    blocks = list(iter_blocks(filename, usecols, chunksize, comments))
+    if not blocks:
+        ncols = 0 if usecols is None else len(usecols)
+        return np.empty((0, ncols))
+    return np.concatenate(blocks)
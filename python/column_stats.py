@@ -1,71 +1,165 @@
 #!/usr/bin/python
 
 """
-Purpose:    Take average/stdev or min/max of each of the specified columns.
+Purpose:    Take average/stdev, min/max, or quantiles of each of the specified columns.
 By:         Victoria T. Lim
-Version:    Dec 6 2018
-Example:    python column_stats.py -i countClose1.dat -c "1;2;3" -o
+Version:    Oct 18 2026
+Example:    python column_stats.py -i countClose1.dat -c "1;2;3"
+            python column_stats.py -i 'lambda_*/rmsd.dat' -c "1;2" -o summary.dat
 
 """
 
-import numpy as np
 import sys
+import glob
+import multiprocessing
+import column_reader
+import running_stats
+
+def expand_infiles(patterns):
+    """
+    Expand file names and quoted glob patterns into a list of files,
+    keeping the order given on the command line.
+    """
+    infiles = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            sys.exit("ERROR: No files found matching {}.".format(pattern))
+        infiles.extend(matches)
+    return infiles
+
+
+def file_stats(filename, cols=None, quantiles=False, cache=False):
+    """
+    Take stats of the specified columns of a single file in one pass.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the input file.
+    cols : list of ints (opt.)
+        Indices of the columns, with the first column being index ZERO.
+    quantiles : bool (opt.)
+        Whether to track approximate quantiles.
+    cache : bool (opt.)
+        Whether to read from (and create) the binary cache of the file.
+
+    Returns
+    -------
+    running_stats.RunningStats
+
+    """
+    stats = running_stats.RunningStats(quantiles=quantiles)
+    for block in column_reader.iter_blocks(filename, cols, cache=cache):
+        stats.update(block)
+    return stats
+
+
+def _file_stats_star(job):
+    """
+    Unpack arguments for file_stats, for use with Pool.imap.
+    """
+    return file_stats(*job)
+
+
+def format_rows(label, stats, cols, minmax=False, qs=None):
+    """
+    Format the stats of each column as tab-separated rows of
+    label, column, count, mean, stdev, [min, max], [quantiles].
+    """
+    cols = range(len(stats.mean)) if cols is None else cols
+    fields = [[label]*len(cols), [str(c) for c in cols],
+              [str(stats.count)]*len(cols),
+              ["%.4f" % v for v in stats.mean],
+              ["%.4f" % v for v in stats.std]]
+    if minmax:
+        fields.append(["%.4f" % v for v in stats.min])
+        fields.append(["%.4f" % v for v in stats.max])
+    if qs is not None:
+        for vals in stats.quantile(qs):
+            fields.append(["%.4f" % v for v in vals])
+    return ['\t'.join(row) for row in zip(*fields)]
+
 
 def column_stats(args):
 
-    ### Read in data from file.
-    filename = args.infile
-    data = np.loadtxt(filename)
-
-    ### Get the columns.
-    if args.columns is not None:
-        cols = list(map(int,args.columns.split(';')))
-        try:
-            y_mat = np.asarray([data[:,i] for i in cols]).T
-        except IndexError:
-            sys.exit("ERROR: Index of specified columns is greater than number of columns in file.")
-    else:
-        y_mat = data[:,0:]
-    num_cols = y_mat.shape[1] # how many columns in orig data set
-
-    ### Loop over columns and take stats.
-    avgs = np.mean(y_mat, axis=0)
-    stds = np.std(y_mat, axis=0)
-    np.set_printoptions(precision=4,suppress=True)
-    print("# Avgs: {}".format(avgs))
-    print("# Stds: {}\n".format(stds))
+    infiles = expand_infiles(args.infile)
+    cols = column_reader.parse_columns(args.columns)
+    qs = None
+    if args.quantiles is not None:
+        qs = [float(q) for q in args.quantiles.split(';')]
 
-    ### Save output.
-    if args.output:
-        with open(filename, 'a') as f:
-            f.write("# Avgs: {}\n".format(avgs))
-            f.write("# Stds: {}\n".format(stds))
+    ### Take stats of each file in one pass, over a pool of processes.
+    jobs = [(f, cols, qs is not None, args.cache) for f in infiles]
+    nprocs = min(args.nprocs or multiprocessing.cpu_count(), len(jobs))
+    try:
+        if nprocs > 1:
+            with multiprocessing.Pool(nprocs) as pool:
+                allstats = pool.map(_file_stats_star, jobs)
+        else:
+            allstats = [_file_stats_star(job) for job in jobs]
+    except IndexError:
+        sys.exit("ERROR: Index of specified columns is greater than number of columns in file.")
 
-    ### Compute minimum and maximum values of column.
+    ### Merge stats of all files.
+    total = running_stats.RunningStats(quantiles=qs is not None)
+    for f, stats in zip(infiles, allstats):
+        if stats.count == 0:
+            sys.exit("ERROR: No data found in {}.".format(f))
+        if total.count > 0 and len(stats.mean) != len(total.mean):
+            sys.exit("ERROR: {} has a different number of columns than "
+                     "{}.".format(f, infiles[0]))
+        total.merge(stats)
+
+    ### Print per-file rows then the merged aggregate.
+    header = "# file\tcolumn\tcount\tavg\tstdev"
     if args.minmax:
-        cmin = np.amin(y_mat, axis=0)
-        cmax = np.amax(y_mat, axis=0)
-        print("# Min: {}".format(cmin))
-        print("# Max: {}\n".format(cmax))
+        header += "\tmin\tmax"
+    if qs is not None:
+        header += ''.join("\tq{:g}".format(q) for q in qs)
+    lines = [header]
+    for f, stats in zip(infiles, allstats):
+        lines.extend(format_rows(f, stats, cols, args.minmax, qs))
+    if len(infiles) > 1:
+        lines.extend(format_rows('ALL', total, cols, args.minmax, qs))
+    print('\n'.join(lines))
+
+    ### Save output.
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
 
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("-i", "--infile",
-                        help="Name of the input file. Comments denoted with #")
+    parser.add_argument("-i", "--infile", nargs='+',
+                        help="Name(s) of the input file(s). Quoted glob "
+                        "patterns are expanded, e.g., 'win*/rmsd.dat'. "
+                        "Comments denoted with # or @")
     parser.add_argument("-c", "--columns",default=None,
                         help="Specify particular data columns to avg. First "
                         "column is considered index ZERO. Separate arguments "
                         "with semicolon and place in quotes (bc bash). "
                         "Ex. \"2;3;4\". If not specified, will avg all columns.")
-    parser.add_argument("-o", "--output",action="store_true",default=False,
-                        help="Write output as comments at end of file?")
+    parser.add_argument("-o", "--output",default=None,
+                        help="Name of tab-separated summary file with a row "
+                        "for each column of each file, and of all files merged.")
     parser.add_argument("-m", "--minmax",action="store_true",default=False,
                         help="Compute minimum and maximum of each column "
                         "in addition to average and standard deviation.")
+    parser.add_argument("-q", "--quantiles",default=None,
+                        help="Also compute approximate quantiles of each "
+                        "column. Separate values with semicolon and place in "
+                        "quotes. Ex. \"0.05;0.5;0.95\"")
+    parser.add_argument("-n", "--nprocs",default=None,type=int,
+                        help="Number of processes for reading multiple files. "
+                        "Default is the number of CPUs.")
+    parser.add_argument("--cache",action="store_true",default=False,
+                        help="Save parsed data to a binary file next to each "
+                        "input, and reuse it on later runs if the input has "
+                        "not changed.")
 
     args = parser.parse_args()
     column_stats(args)
-
@@ -3,29 +3,22 @@
 # Sum input columns as a new series and write out file.
 
 import numpy as np
+import column_reader
 
 def sumSeries(**kwargs):
 
-    ### Read in data from file.
+    ### Get the y-columns. The 0th column is x.
     filename = opt['input']
-    data = np.loadtxt(filename)
-    x = data[:,0]
+    cols = column_reader.parse_columns(opt['columns'])
+    usecols = None if cols is None else [0] + cols
 
-    ### Get the y-columns.
-    if opt['columns'] is not None:
-        cols = list(map(int,opt['columns'].split(';')))
-        y_mat = np.asarray([data[:,i] for i in cols]).T
-    else:
-        y_mat = data[:,1:]
-    num_cols = y_mat.shape[1] # how many columns in orig data set
-    if num_cols == 1: y_mat = y_mat.flatten()
-
-    ### Loop over y-columns
-    newdata = y_mat.sum(axis=1)
-
-    # Save output.
-    together = np.array([x, newdata]).T
-    np.savetxt(opt['output'], together)
+    ### Read data from file in blocks, sum y-columns, and save output.
+    with open(opt['output'], 'w') as f:
+        for data in column_reader.iter_blocks(filename, usecols, cache=opt['cache']):
+            x = data[:,0]
+            newdata = data[:,1:].sum(axis=1)
+            together = np.array([x, newdata]).T
+            np.savetxt(f, together)
 
 
 if __name__ == "__main__":
@@ -41,6 +34,10 @@ if __name__ == "__main__":
                         "0. If not specified, will sum all data columns.")
     parser.add_argument("-o", "--output",
                         help="Name of the output file.")
+    parser.add_argument("--cache",action="store_true",default=False,
+                        help="Save parsed data to a binary file next to the "
+                        "input, and reuse it on later runs if the input has "
+                        "not changed.")
 
     args = parser.parse_args()
     opt = vars(args)
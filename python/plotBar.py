@@ -2,9 +2,10 @@
 # By: Victoria T. Lim
 
 import os
+import sys
 import numpy as np
 import argparse
-import matplotlib.pyplot as plt
+import plot_jobs
 
 
 ### ------------------- Script -------------------
@@ -44,6 +45,8 @@ def initiate_plot(xlabel, ylabel, publish):
     publish : Bool
         Format figure for article publication.
     """
+    import matplotlib.pyplot as plt
+
     if publish:
         fig = plt.figure()
         #fig.set_size_inches(3.37,1.7)
@@ -189,13 +192,15 @@ def plot_line(plt, xlist, ylist, horiz=False):
     return plt
 
 
-def finalize_and_save(plt, xlist, ylist, llist, figname, horiz):
+def finalize_and_save(plt, xlist, ylist, llist, figname, horiz, show=True):
     """
     Customize plot with grid, labels, and/or other features.
     Then save and show figure.
 
     Parameters
     ----------
+    show : Bool
+        Display the figure after saving. Set False for batch mode.
 
     """
 
@@ -244,14 +249,50 @@ def finalize_and_save(plt, xlist, ylist, llist, figname, horiz):
 #    plt.ylim(0, 9.2)
 
     plt.savefig(figname,bbox_inches='tight')
-    plt.show()
+    if show:
+        plt.show()
+    plt.close()
+
+
+def plotBar(opt):
+    """
+    Read the input file and save the bar plot.
+
+    Parameters
+    ----------
+    opt : dict
+        Command-line arguments from get_parser.
+
+    """
+    xlist, ylist, llist, elist = parse_file(opt['infile'])
+    fig, plt = initiate_plot(opt['xlabel'], opt['ylabel'], opt['publish'])
+    if opt['group']:
+        plt = plot_bar_group(plt, xlist, ylist, elist, opt['horiz'])
+    elif opt['line']:
+        plt = plot_line(plt, xlist, ylist, opt['horiz'])
+    else:
+        plt = plot_bar(plt, xlist, ylist, elist, opt['horiz'])
+    finalize_and_save(plt, xlist, ylist, llist, opt['output'], opt['horiz'],
+        show=not opt['batch'])
+
+
+def run_job(argv):
+    """
+    Save one figure in batch mode from a list of command-line arguments.
+    """
+    parser = get_parser()
+    opt = vars(parser.parse_args(argv))
+    if not os.path.exists(opt['infile']):
+        raise parser.error("Input file %s does not exist." % opt['infile'])
+    opt['batch'] = True
+    plotBar(opt)
 
 
 
 
 ### ------------------- Parser -------------------
 
-if __name__ == "__main__":
+def get_parser():
     parser = argparse.ArgumentParser()
 
     # input data
@@ -279,19 +320,30 @@ if __name__ == "__main__":
     parser.add_argument("--publish",action="store_true",default=False,
         help="Format for publishing in article.")
 
+    # batch mode
+    parser.add_argument("--batch",action="store_true",default=False,
+        help="Save the figure without displaying it, using the "+
+        "non-interactive Agg backend.")
+    parser.add_argument("--jobs",default=None,
+        help="File with the arguments for one figure on each line. "+
+        "All figures are saved in batch mode.")
+    parser.add_argument("-n", "--nprocs",default=None,type=int,
+        help="Number of processes for --jobs. Default is the number of CPUs.")
 
+    return parser
+
+
+if __name__ == "__main__":
+    parser = get_parser()
     args = parser.parse_args()
     opt = vars(args)
-    if not os.path.exists(opt['infile']):
-        raise parser.error("Input file %s does not exist." % opt['infile'])
-
-    xlist, ylist, llist, elist = parse_file(opt['infile'])
-    fig, plt = initiate_plot(opt['xlabel'], opt['ylabel'], opt['publish'])
-    if opt['group']:
-        plt = plot_bar_group(plt, xlist, ylist, elist, opt['horiz'])
-    elif opt['line']:
-        plt = plot_line(plt, xlist, ylist, opt['horiz'])
+    if opt['jobs'] is not None:
+        failed = plot_jobs.run_jobs(run_job, plot_jobs.read_jobs(opt['jobs']), opt['nprocs'])
+        if failed:
+            sys.exit(1)
     else:
-        plt = plot_bar(plt, xlist, ylist, elist, opt['horiz'])
-    finalize_and_save(plt, xlist, ylist, llist, opt['output'], opt['horiz'])
-
+        if not os.path.exists(opt['infile']):
+            raise parser.error("Input file %s does not exist." % opt['infile'])
+        if opt['batch']:
+            plot_jobs.use_agg()
+        plotBar(opt)
@@ -6,16 +6,20 @@
 #   Then replace variable number of spaces with this cmd :%s/ \{2,}/ /g
 
 import os
+import sys
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-import matplotlib.patches as mpatches
-from pymbar import timeseries
+import plot_jobs
 
 # ===========================================
 
 
 def plotScatter(**kwargs):
+    import matplotlib.pyplot as plt
+    import matplotlib as mpl
+    import matplotlib.patches as mpatches
+
+    opt = kwargs
     filename = opt['input']
     xlabel = opt['xlabel']
     ylabel = opt['ylabel']
@@ -99,11 +103,21 @@ def plotScatter(**kwargs):
     # Save then show figure.
     plt.grid()
     plt.savefig(figname, bbox_inches='tight')
-    plt.show()
+    if not opt.get('batch'):
+        plt.show()
+    plt.close(fig)
 
 
-if __name__ == "__main__":
-    import argparse
+def run_job(argv):
+    """
+    Save one figure in batch mode from a list of command-line arguments.
+    """
+    opt = vars(get_parser().parse_args(argv))
+    opt['batch'] = True
+    plotScatter(**opt)
+
+
+def get_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--input",
                         help="Name of the input file.")
@@ -118,7 +132,26 @@ if __name__ == "__main__":
                         help="Label for plot title.")
     parser.add_argument("-o", "--output",
                         help="Name of the output figure.")
+    parser.add_argument("--batch", action="store_true", default=False,
+                        help="Save the figure without displaying it, using "
+                        "the non-interactive Agg backend.")
+    parser.add_argument("--jobs", default=None,
+                        help="File with the arguments for one figure on each "
+                        "line. All figures are saved in batch mode.")
+    parser.add_argument("-n", "--nprocs", default=None, type=int,
+                        help="Number of processes for --jobs. Default is the "
+                        "number of CPUs.")
+    return parser
+
 
-    args = parser.parse_args()
+if __name__ == "__main__":
+    args = get_parser().parse_args()
     opt = vars(args)
-    plotScatter(**opt)
+    if opt['jobs'] is not None:
+        failed = plot_jobs.run_jobs(run_job, plot_jobs.read_jobs(opt['jobs']), opt['nprocs'])
+        if failed:
+            sys.exit(1)
+    else:
+        if opt['batch']:
+            plot_jobs.use_agg()
+        plotScatter(**opt)
@@ -12,10 +12,13 @@ This script can also be imported for subsampling in other scripts/plots.
   - sys.path.insert(0,'/DFS-L/DATA/mobley/limvt/analysis')
   - import plotXY
   - plotXY.moving_average(ydata, N)
+  - xavg, yavg = plotXY.running_average(ydata, N, 'center', x=xdata)
 
 Notes:
   - Subsampling with grouped data works by first separating the data into
     the specified number of groups, THEN subsampling.
+  - For cluster jobs, --batch saves the figure without a display, and
+    --jobs renders many figures over a process pool (see plot_jobs.py).
   - If combining data together from multiple files, Google Sheets can help.
     Then copy from sheets into vim window.
     Then replace variable number of spaces with this cmd :%s/ \{2,}/ /g
@@ -28,10 +31,12 @@ TODO:
 """
 
 import sys
+import argparse
 import numpy as np
 from functools import reduce
-import matplotlib.pyplot as plt
-import matplotlib as mpl
+import column_reader
+import autocorr
+import plot_jobs
 
 # ===========================================
 
@@ -56,7 +61,7 @@ def find_num_cols(y_mat):
     return num_cols
 
 
-def subsample(x, y_mat, num_cols=None):
+def subsample(x, y_mat, num_cols=None, backend='fft'):
     """
     Parameters
     ----------
@@ -71,6 +76,10 @@ def subsample(x, y_mat, num_cols=None):
         over the input data, since it can be formatted as 1- or N-dimensional
         list or numpy array. If num_cols not specified, the value will be
         extracted from input data using find_num_cols function.
+    backend : string (opt.)
+        How to compute correlation times. 'fft' computes them for all columns
+        of a multidimensional array at once using the autocorr module.
+        'pymbar' calls pymbar.timeseries for each column, as a reference.
 
     Returns
     -------
@@ -80,7 +89,10 @@ def subsample(x, y_mat, num_cols=None):
         multi-dimesional array in which z_mat[i][j] is the jth value in the ith data series.
 
     """
-    from pymbar import timeseries
+    if backend == 'pymbar':
+        from pymbar import timeseries
+    elif backend != 'fft':
+        raise ValueError("Unknown subsampling backend: {}".format(backend))
 
     x_mat = []
     z_mat = [] # subsampled y_mat
@@ -88,6 +100,11 @@ def subsample(x, y_mat, num_cols=None):
     if num_cols is None:
         num_cols = find_num_cols(y_mat)
 
+    # compute correlation times of all columns in a single batch
+    g_all = None
+    if backend == 'fft' and type(y_mat) is np.ndarray and len(y_mat.shape) == 2:
+        g_all = autocorr.statistical_inefficiency(y_mat[:,:num_cols])
+
     for i in range(num_cols):
 
         # list of np arrays
@@ -103,8 +120,15 @@ def subsample(x, y_mat, num_cols=None):
             y = y_mat[:,i]
 
         # compute correlation times
-        g = timeseries.statisticalInefficiency(y)
-        indices = timeseries.subsampleCorrelatedData(y, g)
+        if backend == 'pymbar':
+            g = timeseries.statisticalInefficiency(y)
+            indices = timeseries.subsampleCorrelatedData(y, g)
+        else:
+            if g_all is not None:
+                g = g_all[i]
+            else:
+                g = autocorr.statistical_inefficiency(y)
+            indices = autocorr.subsample_indices(len(y), g)
 
         # subsample data
         y_sub = y[indices]
@@ -118,7 +142,82 @@ def subsample(x, y_mat, num_cols=None):
     return x_mat, z_mat
 
 
-def moving_average(y_mat, N, num_cols=None):
+def running_average(y, N, kind='center', x=None, axis=0):
+    """
+    Take the moving average of all series of y at once, in O(len(y)) time.
+
+    Parameters
+    ----------
+    y : numpy array
+        1D array of one series, or N-dimensional array of many series.
+    N : int
+        Bin width over which to take the moving average. For kind='ema',
+        the smoothing factor is 2/(N+1).
+    kind : string (opt.)
+        - 'center' : average of each window of N points, located at the
+          average x of the window
+        - 'trailing' : average of each point and the N-1 points before it,
+          located at the x of that point
+        - 'ema' : exponential moving average, located at the original x
+        - 'block' : average of consecutive non-overlapping blocks of N
+          points, located at the average x of the block. Points left
+          over at the end are discarded.
+    x : numpy array (opt.)
+        1D array of x values along the averaged axis. If not specified,
+        the indices of y are used.
+    axis : int (opt.)
+        Axis of y along which to take the average.
+
+    Returns
+    -------
+    x_avg : numpy array
+        1D array of x values of the averaged data
+    y_avg : numpy array
+        Averaged data, of the same shape as y except along axis
+
+    """
+    y = np.moveaxis(np.asarray(y, dtype=np.float64), axis, 0)
+    T = y.shape[0]
+    if x is None:
+        x = np.arange(T, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+
+    if kind in ('center', 'trailing'):
+        # difference of cumulative sums gives the sum over each window
+        csum = np.cumsum(y, axis=0)
+        y_avg = np.concatenate((csum[N-1:N], csum[N:] - csum[:-N])) / N
+        if kind == 'center':
+            xsum = np.cumsum(x)
+            x_avg = np.concatenate((xsum[N-1:N], xsum[N:] - xsum[:-N])) / N
+        else:
+            x_avg = x[N-1:]
+
+    elif kind == 'block':
+        num_blocks = T // N
+        y_avg = y[:num_blocks*N].reshape((num_blocks, N) + y.shape[1:]).mean(axis=1)
+        x_avg = x[:num_blocks*N].reshape(num_blocks, N).mean(axis=1)
+
+    elif kind == 'ema':
+        # s[t] = (1-a)*s[t-1] + a*y[t] with s[0] = y[0], solved as a prefix
+        # scan that doubles its stride until (1-a)**stride is negligible
+        a = 2. / (N + 1)
+        y_avg = a * y
+        y_avg[0] = y[0]
+        decay = 1. - a
+        stride = 1
+        while stride < T and decay > np.finfo(np.float64).eps:
+            y_avg[stride:] = y_avg[stride:] + decay * y_avg[:-stride]
+            decay = decay * decay
+            stride *= 2
+        x_avg = x
+
+    else:
+        raise ValueError("Unknown moving average kind: {}".format(kind))
+
+    return x_avg, np.moveaxis(y_avg, 0, axis)
+
+
+def moving_average(y_mat, N, num_cols=None, kind='center'):
     """
     Parameters
     ----------
@@ -133,39 +232,30 @@ def moving_average(y_mat, N, num_cols=None):
         over the input data, since it can be formatted as 1- or N-dimensional
         list or numpy array. If num_cols not specified, the value will be
         extracted from input data using find_num_cols function.
+    kind : string (opt.)
+        Type of moving average. See running_average.
 
     Returns
     -------
     z_mat : list
         multi-dimensional array in which z_mat[i][j] is the jth value in the ith data series.
 
-    Reference
-    ---------
-    http://stackoverflow.com/questions/13728392/moving-average-or-running-mean
     """
 
-    z_mat = [] # for subsampled y_mat
-
     if num_cols is None:
         num_cols = find_num_cols(y_mat)
 
-    for i in range(num_cols):
-
-        # list of np arrays
-        if type(y_mat) is list and len(y_mat[0]) > 1:
-            y = y_mat[i]
-
-        # 1D np array
-        elif type(y_mat) is np.ndarray and len(y_mat.shape) == 1:
-            y = y_mat
+    # list of np arrays
+    if type(y_mat) is list and len(y_mat[0]) > 1:
+        z_mat = [running_average(y, N, kind)[1] for y in y_mat[:num_cols]]
 
-        # multidimensional np array
-        else:
-            y = y_mat[:,i]
+    # 1D np array
+    elif type(y_mat) is np.ndarray and len(y_mat.shape) == 1:
+        z_mat = [running_average(y_mat, N, kind)[1]]
 
-        # calculate moving average
-        y_mean = np.convolve(y, np.ones((N,))/N,mode='valid')
-        z_mat.append(y_mean)
+    # multidimensional np array, all columns at once
+    else:
+        z_mat = list(running_average(y_mat[:,:num_cols], N, kind)[1].T)
 
     if num_cols == 1:
         z_mat = z_mat[0]
@@ -173,6 +263,49 @@ def moving_average(y_mat, N, num_cols=None):
     return z_mat
 
 
+def decimate_indices(y, num_bins, max_points=None):
+    """
+    Choose points of a long series to plot, keeping the minimum and maximum
+    of each of num_bins consecutive bins so peaks remain visible. With
+    num_bins about the width of the figure in pixels, the plotted line looks
+    the same as when every point is plotted.
+
+    Parameters
+    ----------
+    y : numpy array
+        1D array of the data series.
+    num_bins : int
+        Number of bins to split the series into.
+    max_points : int (opt.)
+        Return at most this many indices (but at least four), using fewer
+        bins than num_bins if needed.
+
+    Returns
+    -------
+    1D numpy array of sorted indices, including the first and last points
+
+    """
+    T = len(y)
+    if max_points is not None:
+        # two points per bin plus the first and last points
+        num_bins = max(1, min(num_bins, (max_points - 2) // 2))
+    if T <= 2*num_bins:
+        return np.arange(T)
+
+    per_bin = int(np.ceil(T / num_bins))
+    num_bins = int(np.ceil(T / per_bin))
+    pad = num_bins*per_bin - T
+    offsets = per_bin * np.arange(num_bins)
+
+    # pad the last bin with values that are never chosen
+    y_lo = np.concatenate((y, np.full(pad, np.inf))).reshape(num_bins, per_bin)
+    y_hi = np.concatenate((y, np.full(pad, -np.inf))).reshape(num_bins, per_bin)
+    imin = np.argmin(y_lo, axis=1) + offsets
+    imax = np.argmax(y_hi, axis=1) + offsets
+
+    return np.unique(np.concatenate(([0, T-1], imin, imax)))
+
+
 def factorize(n):
     """
     Reference
@@ -187,6 +320,8 @@ def factorize(n):
 def format_fig(ax1, plt, fig, **kwargs):
     """
     """
+    opt = kwargs
+
     # plot limits
     #ax1.set_xlim([min(x)-2,max(x)+2])
     #ax1.set_ylim([3, 8])
@@ -239,6 +374,13 @@ def format_fig(ax1, plt, fig, **kwargs):
 def xyPlot(**kwargs):
     """
     """
+    opt = dict(kwargs)
+
+    # import here so that other scripts can use the data processing
+    # functions of plotXY without loading matplotlib
+    import matplotlib.pyplot as plt
+    import matplotlib as mpl
+
     # ================================================
     # INPUT STAGE
     # ================================================
@@ -256,9 +398,9 @@ def xyPlot(**kwargs):
         sys.exit("You can subsample data or take the running average, but not both.")
 
     ### Read in data from file.
-    data = np.loadtxt(filename)
+    data = column_reader.load_columns(filename, cache=opt['cache'])
     if uncertf is not None:
-        uncerts = np.loadtxt(uncertf)
+        uncerts = column_reader.load_columns(uncertf, cache=opt['cache'])
     x = data[:,0]
 
     ### Check that first column of uncertainties match first column of data
@@ -302,19 +444,14 @@ def xyPlot(**kwargs):
 
     ### subsample data (may not want to if not timeseries data!)
     if doSubsample:
-        x_mat, y_mat = subsample(x, y_mat, num_cols)
+        x_mat, y_mat = subsample(x, y_mat, num_cols, opt['subsample_backend'])
 
     elif 'doMean' in locals(): # if False, doMean variable does not exist
-        y_mat = moving_average(y_mat,mean_period,num_cols)
-
-        # since x and y are not 1:1 due to computing moving average,
-        # regenerate x data based on scaling factor, e.g., to convert
-        # frame number to ns.
-        scale_x = 0.02
-        try:
-            x = scale_x * np.asarray(range(len(y_mat[0])), dtype=np.float32)
-        except TypeError:
-            x = scale_x * np.asarray(range(len(y_mat)), dtype=np.float32)
+        if num_groups != 0:
+            y_mat = moving_average(y_mat, mean_period, num_cols, opt['mean_kind'])
+        else:
+            # keep the x values that correspond to each averaged point
+            x, y_mat = running_average(y_mat, mean_period, opt['mean_kind'], x=x)
 
     # scale the x-axis (for if doSubsample and doMean are false)
     x = 0.000002 * x
@@ -331,11 +468,17 @@ def xyPlot(**kwargs):
     num_plots = 1
     if num_groups != 0:
         factors = factorize(num_groups)
-        num_plots = int(input("\nInput with {} data points will be separated "
-              "into {} groups for plotting.\nDo you want to separate these "
-              "groups into separate subplots?\nType 1 for no, or type an "
-              "integer for the number of subplots desired.\nTo evenly distribute "
-              "the lines, use one of {}. ".format(len(x),num_groups,factors)))
+        if opt.get('nplots') is not None:
+            num_plots = opt['nplots']
+        elif opt.get('batch'):
+            print("No --nplots specified in batch mode; plotting all groups "
+                  "in one subplot.")
+        else:
+            num_plots = int(input("\nInput with {} data points will be separated "
+                  "into {} groups for plotting.\nDo you want to separate these "
+                  "groups into separate subplots?\nType 1 for no, or type an "
+                  "integer for the number of subplots desired.\nTo evenly distribute "
+                  "the lines, use one of {}. ".format(len(x),num_groups,factors)))
         lines_per_plot = int(num_groups/num_plots)
 
         # color map
@@ -351,6 +494,12 @@ def xyPlot(**kwargs):
         opt['legend'] = ';'.join(str(i) for i in range(1,1+lines_per_plot))
         curr_ax = axs[idx]
 
+    # width of the saved figure in pixels, for decimating long series
+    if opt['publish']:
+        width_px = 3.37 * 300
+    else:
+        width_px = 8 * fig.dpi
+
     for i in range(num_cols):
 
         ### Determine which data to plot.
@@ -379,22 +528,30 @@ def xyPlot(**kwargs):
             x = x_mat[i]
             c = colors[i]
 
-        elif 'doMean' in locals():
-            y = y_mat[i]
-            c = colors[i]
-
         else:
             y = y_mat[:,i]
             c = colors[i]
 
+        ### Reduce very long series to about the figure width in pixels.
+        x_plot, y_plot = x, y
+        if uncertf is not None:
+            yerr = uncerts[:,i]
+        if opt['max_points'] > 0 and len(y) > opt['max_points']:
+            keep = decimate_indices(y, int(width_px), opt['max_points'])
+            x_plot, y_plot = x[keep], y[keep]
+            if uncertf is not None:
+                yerr = yerr[keep]
+            print("Decimated series {}: dropped {} of {} points".format(
+                i, len(y)-len(keep), len(y)))
+
         ### Plot the data.
         plot_args = {'color':c, 'lw':1.0, 'alpha':0.8}
-        print(i, len(x), y.shape)
+        print(i, len(x_plot), y_plot.shape)
 
         if uncertf is not None:
-            curr_ax.errorbar(x, y, yerr=uncerts[:,i], capsize=1.5, **plot_args)
+            curr_ax.errorbar(x_plot, y_plot, yerr=yerr, capsize=1.5, **plot_args)
         else:
-            curr_ax.plot(x, y, **plot_args)
+            curr_ax.plot(x_plot, y_plot, **plot_args)
 
             # add points with the line plot
             #curr_ax.scatter(x, y, **plot_args, s=2)
@@ -412,11 +569,21 @@ def xyPlot(**kwargs):
         plt.savefig(opt['output'], bbox_inches='tight', dpi=300)
     else:
         plt.savefig(opt['output'], bbox_inches='tight')
-    plt.show()
+    if not opt.get('batch'):
+        plt.show()
+    plt.close(fig)
 
 
-if __name__ == "__main__":
-    import argparse
+def run_job(argv):
+    """
+    Save one figure in batch mode from a list of command-line arguments.
+    """
+    opt = vars(get_parser().parse_args(argv))
+    opt['batch'] = True
+    xyPlot(**opt)
+
+
+def get_parser():
     parser = argparse.ArgumentParser()
 
     # DATA INPUT
@@ -435,13 +602,31 @@ if __name__ == "__main__":
                         " groups to plot separately. E.g., a datafile might"
                         " be 100 lines long but you may want to plot 5 lines of"
                         " 20. Then use an argument of 5.")
+    parser.add_argument("--nplots", default=None, type=int,
+                        help="Number of subplots to separate the groups of "
+                        "--group into. If not specified, you will be asked, "
+                        "or all groups go in one subplot in batch mode.")
+    parser.add_argument("--cache", action="store_true", default=False,
+                        help="Save parsed data to a binary file next to the "
+                        "input, and reuse it on later runs if the input has "
+                        "not changed.")
 
     # DATA PROCESSING
     parser.add_argument("-m", "--mean", default=0, type=int,
                         help="If not default=0, take moving averages over the "
                         + "specified number of data points for each column.")
+    parser.add_argument("--mean_kind", default="center",
+                        choices=["center", "trailing", "ema", "block"],
+                        help="Type of moving average: window centered on each "
+                        "point, trailing window ending at each point, "
+                        "exponential moving average, or non-overlapping blocks.")
     parser.add_argument("-s", "--subsample", action="store_true",default=False,
                         help="Subsample y data based on correlation times.")
+    parser.add_argument("--subsample_backend", default="fft",
+                        choices=["fft", "pymbar"],
+                        help="Compute correlation times for all columns at "
+                        "once with FFTs (default), or with pymbar.timeseries "
+                        "for each column.")
 
     # PLOT LABELING AND FORMATTING
     parser.add_argument("-x", "--xlabel", default="",
@@ -460,7 +645,33 @@ if __name__ == "__main__":
                         help="Name of the output figure.")
     parser.add_argument("--publish", action="store_true",default=False,
                         help="Reduce figure/font sizes for publications.")
+    parser.add_argument("--max_points", default=20000, type=int,
+                        help="Series longer than this are decimated to at most "
+                        "this many points, the min and max of each pixel-wide "
+                        "bin, before plotting, "
+                        "which keeps peaks visible. Use 0 to plot every point.")
+
+    # BATCH MODE
+    parser.add_argument("--batch", action="store_true", default=False,
+                        help="Save the figure without displaying it or asking "
+                        "for input, using the non-interactive Agg backend.")
+    parser.add_argument("--jobs", default=None,
+                        help="File with the arguments for one figure on each "
+                        "line. All figures are saved in batch mode.")
+    parser.add_argument("-n", "--nprocs", default=None, type=int,
+                        help="Number of processes for --jobs. Default is the "
+                        "number of CPUs.")
+    return parser
 
-    args = parser.parse_args()
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
     opt = vars(args)
-    xyPlot(**opt)
+    if opt['jobs'] is not None:
+        failed = plot_jobs.run_jobs(run_job, plot_jobs.read_jobs(opt['jobs']), opt['nprocs'])
+        if failed:
+            sys.exit(1)
+    else:
+        if opt['batch']:
+            plot_jobs.use_agg()
+        xyPlot(**opt)
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+
+"""
+Purpose:    Run many non-interactive plotting jobs in one process pool, for
+            use by plotXY.py, plotBar.py, and plotScatter.py in batch mode.
+            Each worker selects the Agg backend and imports matplotlib once,
+            then renders all the figures assigned to it.
+Version:    Oct 18 2026
+Example:    python plotXY.py --jobs jobs.in -n 8
+
+            where each line of jobs.in has the command-line arguments of one
+            figure, such as:
+            -i win01.dat -m 100 -o win01.png
+            -i win02.dat -m 100 -o win02.svg
+
+"""
+
+import shlex
+import multiprocessing
+import traceback
+
+def read_jobs(jobfile):
+    """
+    Read a job file with the arguments for one figure per line.
+    Blank lines and lines starting with # are skipped.
+
+    Returns
+    -------
+    list of lists of argument strings
+
+    """
+    jobs = []
+    with open(jobfile) as f:
+        for line in f:
+            if line.strip() == '' or line.lstrip().startswith('#'):
+                continue
+            jobs.append(shlex.split(line))
+    return jobs
+
+
+def use_agg():
+    """
+    Select the non-interactive Agg backend so no display is needed.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _run_one(job):
+    """
+    Run one job, catching errors so that other jobs still finish.
+    """
+    func, argv = job
+    try:
+        func(argv)
+    except (Exception, SystemExit) as e:
+        return ' '.join(argv), "{}\n{}".format(repr(e), traceback.format_exc())
+    return ' '.join(argv), None
+
+
+def run_jobs(func, jobs, nprocs=None):
+    """
+    Run func on the arguments of each job over a pool of processes.
+
+    Parameters
+    ----------
+    func : function
+        Module-level function that takes a list of argument strings and
+        saves one figure.
+    jobs : list of lists of strings
+        Arguments for each figure, e.g., from read_jobs.
+    nprocs : int (opt.)
+        Number of processes. Default is the number of CPUs.
+
+    Returns
+    -------
+    failed : list of (string, string) tuples
+        Arguments and error message of each job that failed.
+
+    """
+    nprocs = min(nprocs or multiprocessing.cpu_count(), max(len(jobs), 1))
+    tasks = [(func, argv) for argv in jobs]
+
+    if nprocs > 1:
+        with multiprocessing.Pool(nprocs, initializer=use_agg) as pool:
+            results = list(pool.imap(_run_one, tasks))
+    else:
+        use_agg()
+        results = [_run_one(t) for t in tasks]
+
+    failed = [(argv, err) for argv, err in results if err is not None]
+    print("Finished {} of {} plotting jobs.".format(len(jobs)-len(failed), len(jobs)))
+    for argv, err in failed:
+        print("FAILED: {}\n{}".format(argv, err))
+    return failed
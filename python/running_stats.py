@@ -0,0 +1,197 @@
+#!/usr/bin/python
+
+"""
+Purpose:    Single-pass, mergeable statistics over blocks of column data.
+            Partial results from different files or worker processes can be
+            combined with merge() into one global summary.
+Version:    Oct 18 2026
+Example:    import column_reader, running_stats
+            stats = running_stats.RunningStats(quantiles=True)
+            for block in column_reader.iter_blocks('data.dat'):
+                stats.update(block)
+            print(stats.mean, stats.std, stats.quantile([0.05, 0.5, 0.95]))
+
+References:
+- Chan, Golub, LeVeque, "Algorithms for computing the sample variance"
+- Karnin, Lang, Liberty, "Optimal quantile approximation in streams"
+
+"""
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles of each column with bounded memory using a stack
+    of compactors. Level i holds items that each represent 2**i inputs.
+    While fewer than `capacity` values have been seen, quantiles are exact.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of rows held in each level before it is compacted.
+        Larger values give more accurate quantiles.
+    seed : int
+        Seed for the random offset used in compaction.
+
+    """
+    def __init__(self, capacity=2048, seed=0):
+        self.capacity = capacity
+        self.levels = []
+        self._rng = np.random.default_rng(seed)
+
+    def _compress(self):
+        i = 0
+        while i < len(self.levels):
+            level = self.levels[i]
+            if level.shape[0] > self.capacity:
+                level = np.sort(level, axis=0)
+                num_pairs = level.shape[0] // 2
+                offset = self._rng.integers(2)
+                promoted = level[offset:2*num_pairs:2]
+                self.levels[i] = level[2*num_pairs:]
+                if i + 1 == len(self.levels):
+                    self.levels.append(promoted)
+                else:
+                    self.levels[i+1] = np.concatenate((self.levels[i+1], promoted))
+            i += 1
+
+    def update(self, block):
+        """
+        Add a 2D block of shape (rows, columns) to the sketch.
+        """
+        if not self.levels:
+            self.levels.append(np.array(block, dtype=np.float64))
+        else:
+            self.levels[0] = np.concatenate((self.levels[0], block))
+        self._compress()
+
+    def merge(self, other):
+        """
+        Combine another sketch of the same columns into this one.
+        """
+        for i, level in enumerate(other.levels):
+            if i < len(self.levels):
+                self.levels[i] = np.concatenate((self.levels[i], level))
+            else:
+                self.levels.append(level.copy())
+        self._compress()
+        return self
+
+    def quantile(self, qs):
+        """
+        Parameters
+        ----------
+        qs : float or list of floats
+            Quantiles to compute, each between 0 and 1.
+
+        Returns
+        -------
+        numpy array of shape (len(qs), columns), or (columns,) for a single q
+
+        """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.shape[0], 2.**i)
+                                  for i, level in enumerate(self.levels)])
+        order = np.argsort(items, axis=0)
+        cum_weights = np.cumsum(weights[order], axis=0)
+        sorted_items = np.take_along_axis(items, order, axis=0)
+
+        qs_arr = np.atleast_1d(qs)
+        result = np.empty((len(qs_arr), items.shape[1]))
+        for j, q in enumerate(qs_arr):
+            idx = np.sum(cum_weights < q*cum_weights[-1], axis=0)
+            idx = np.minimum(idx, items.shape[0]-1)
+            result[j] = sorted_items[idx, np.arange(items.shape[1])]
+
+        if np.ndim(qs) == 0:
+            return result[0]
+        return result
+
+
+class RunningStats:
+    """
+    Count, mean, variance, minimum, and maximum of each column, accumulated
+    one block at a time. Optionally also tracks approximate quantiles.
+
+    Parameters
+    ----------
+    quantiles : bool
+        Whether to keep a QuantileSketch of the data.
+
+    """
+    def __init__(self, quantiles=False):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch() if quantiles else None
+
+    def _combine(self, count, mean, m2, cmin, cmax):
+        """
+        Merge partial results using the pairwise update of Chan et al.
+        """
+        if count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = count, mean, m2
+            self.min, self.max = cmin, cmax
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta**2 * (self.count * count / total)
+        self.min = np.minimum(self.min, cmin)
+        self.max = np.maximum(self.max, cmax)
+        self.count = total
+
+    def update(self, block):
+        """
+        Add a 2D block of shape (rows, columns) to the running statistics.
+        """
+        block = np.asarray(block, dtype=np.float64)
+        if block.shape[0] == 0:
+            return
+        bmean = block.mean(axis=0)
+        bm2 = ((block - bmean)**2).sum(axis=0)
+        self._combine(block.shape[0], bmean, bm2,
+                      block.min(axis=0), block.max(axis=0))
+        if self.sketch is not None:
+            self.sketch.update(block)
+
+    def merge(self, other):
+        """
+        Combine the statistics of another RunningStats into this one.
+        """
+        # quantiles are only kept if every merged part tracked them
+        if self.count == 0 and other.sketch is not None:
+            self.sketch = QuantileSketch(other.sketch.capacity)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        elif other.count > 0:
+            self.sketch = None
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """
+        Population variance of each column, as computed by np.var.
+        """
+        return self.m2 / self.count
+
+    @property
+    def std(self):
+        """
+        Population standard deviation of each column, as computed by np.std.
+        """
+        return np.sqrt(self.variance)
+
+    def quantile(self, qs):
+        """
+        Approximate quantiles of each column. See QuantileSketch.quantile.
+        """
+        if self.sketch is None:
+            raise ValueError("Quantiles were not tracked for these statistics.")
+        return self.sketch.quantile(qs)
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+import autocorr
+import plotXY
+
+# g and number of samples of the seeded series in test_pinned_ar1,
+# from reference_g, the loop of the pymbar estimator
+PINNED_G = 10.440167765908
+PINNED_NSAMPLES = 1916
+
+
+def ar1(n, phi, ncols=1, seed=0):
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(size=(n, ncols))
+    y = np.empty((n, ncols))
+    y[0] = noise[0]
+    for i in range(1, n):
+        y[i] = phi*y[i-1] + noise[i]
+    return y
+
+
+def reference_g(y, mintime=3):
+    """
+    Loop from pymbar.timeseries.statisticalInefficiency with fast=False.
+    """
+    N = len(y)
+    dy = y - y.mean()
+    sigma2 = np.mean(dy**2)
+    g = 1.
+    t = 1
+    while t < N - 1:
+        C = np.sum(dy[:N-t] * dy[t:]) / ((N-t) * sigma2)
+        if C <= 0. and t > mintime:
+            break
+        g += 2. * C * (1. - t/N)
+        t += 1
+    return max(g, 1.)
+
+
+def reference_indices(T, g):
+    """
+    Loop from pymbar.timeseries.subsampleCorrelatedData.
+    """
+    indices = []
+    n = 0
+    while int(round(n*g)) < T:
+        t = int(round(n*g))
+        if n == 0 or t != indices[-1]:
+            indices.append(t)
+        n += 1
+    return indices
+
+
+def test_matches_reference_loop():
+    y = ar1(2000, 0.8, ncols=3)
+    g = autocorr.statistical_inefficiency(y)
+    for i in range(3):
+        assert g[i] == pytest.approx(reference_g(y[:, i]), rel=1e-10)
+        assert autocorr.subsample_indices(len(y), g[i]).tolist() == \
+            reference_indices(len(y), g[i])
+
+
+def test_pinned_ar1():
+    # AR(1) with phi=0.8 has g = (1+phi)/(1-phi) = 9 for long series
+    y = ar1(20000, 0.8)[:, 0]
+    g = autocorr.statistical_inefficiency(y)
+    assert g == pytest.approx(PINNED_G, rel=1e-8)
+    assert g == pytest.approx(9., rel=0.25)
+    assert len(autocorr.subsample_indices(len(y), g)) == PINNED_NSAMPLES
+
+
+def test_constant_and_white_noise():
+    y = np.column_stack([np.ones(500), np.random.default_rng(1).normal(size=500)])
+    g = autocorr.statistical_inefficiency(y)
+    assert g[0] == 1.
+    assert g[1] == pytest.approx(1., abs=0.3)
+
+
+def test_matches_pymbar():
+    timeseries = pytest.importorskip('pymbar.timeseries')
+    y = ar1(2000, 0.8)[:, 0]
+    # pymbar 4 renamed the functions
+    stat_ineff = getattr(timeseries, 'statistical_inefficiency', None) or \
+        timeseries.statisticalInefficiency
+    subsample = getattr(timeseries, 'subsample_correlated_data', None) or \
+        timeseries.subsampleCorrelatedData
+    g_ref = stat_ineff(y, fast=False)
+    g = autocorr.statistical_inefficiency(y)
+    assert g == pytest.approx(g_ref, rel=1e-8)
+    assert autocorr.subsample_indices(len(y), g).tolist() == \
+        list(subsample(y, g_ref))
+
+
+def test_plotxy_subsample_backends_agree():
+    y = ar1(1000, 0.6, ncols=2)
+    x = np.arange(1000.)
+    x_batch, z_batch = plotXY.subsample(x, y, backend='fft')
+    x_cols, z_cols = plotXY.subsample(x, [y[:, 0], y[:, 1]], 2, backend='fft')
+    for i in range(2):
+        indices = reference_indices(1000, reference_g(y[:, i]))
+        np.testing.assert_array_equal(x_batch[i], x[indices])
+        np.testing.assert_array_equal(z_batch[i], y[indices, i])
+        np.testing.assert_array_equal(z_cols[i], z_batch[i])
@@ -0,0 +1,42 @@
+import os
+import numpy as np
+import pytest
+import column_combine_avg
+
+
+def write_files(tmp_path, columns):
+    names = []
+    for i, (x, y) in enumerate(columns):
+        name = str(tmp_path / 'in{}.dat'.format(i))
+        np.savetxt(name, np.column_stack([x, y]))
+        names.append(name)
+    return names
+
+
+def test_combine(tmp_path):
+    x = np.arange(5.)
+    infiles = write_files(tmp_path, [(x, x), (x, 3*x)])
+    outfile = str(tmp_path / 'out.dat')
+    column_combine_avg.combine_and_avg(infiles, outfile, std=True, chunksize=2)
+    out = np.loadtxt(outfile)
+    np.testing.assert_allclose(out[:, 3], 2*x)
+    np.testing.assert_allclose(out[:, 4], np.std([x, 3*x], axis=0, ddof=1), atol=1e-3)
+
+
+@pytest.mark.parametrize('second', [(np.arange(5.) + 1, np.ones(5)),
+                                    (np.arange(3.), np.ones(3))])
+def test_error_leaves_no_output(tmp_path, second):
+    x = np.arange(5.)
+    infiles = write_files(tmp_path, [(x, x), second])
+    outfile = str(tmp_path / 'out.dat')
+    with pytest.raises(SystemExit):
+        column_combine_avg.combine_and_avg(infiles, outfile, chunksize=2)
+    assert sorted(os.listdir(tmp_path)) == ['in0.dat', 'in1.dat']
+
+
+def test_std_needs_two_files(tmp_path):
+    infiles = write_files(tmp_path, [(np.arange(3.), np.ones(3))])
+    outfile = str(tmp_path / 'out.dat')
+    with pytest.raises(SystemExit, match="at least two"):
+        column_combine_avg.combine_and_avg(infiles, outfile, sem=True)
+    assert not os.path.exists(outfile)
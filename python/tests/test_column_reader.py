@@ -0,0 +1,46 @@
+import os
+import numpy as np
+import pytest
+import column_reader
+
+
+def write(tmp_path, text):
+    filename = tmp_path / 'data.dat'
+    filename.write_text(text)
+    return str(filename)
+
+
+def test_inline_comments_and_blank_lines(tmp_path):
+    filename = write(tmp_path, "# header\n@ legend\n\n1 2 # trailing\n3 4@x\n   \n5 6\n# 7 8\n")
+    data = column_reader.load_columns(filename)
+    np.testing.assert_array_equal(data, [[1, 2], [3, 4], [5, 6]])
+
+
+def test_inline_comments_match_loadtxt(tmp_path):
+    filename = write(tmp_path, "0 1.5 2 # a\n\n1 2.5 3\n2 3.5 4 #\n")
+    expected = np.loadtxt(filename, comments='#')
+    blocks = list(column_reader.iter_blocks(filename, usecols=[0, 2], chunksize=2))
+    assert [len(b) for b in blocks] == [2, 1]
+    np.testing.assert_array_equal(np.concatenate(blocks), expected[:, [0, 2]])
+
+
+def test_inline_comments_cache(tmp_path):
+    filename = write(tmp_path, "1 2 # trailing\n\n3 4\n")
+    data = column_reader.load_columns(filename, cache=True)
+    np.testing.assert_array_equal(data, [[1, 2], [3, 4]])
+    np.testing.assert_array_equal(column_reader.load_columns(filename, cache=True), data)
+
+
+@pytest.mark.parametrize('damage', ['delete', 'truncate'])
+def test_broken_cache_is_rebuilt(tmp_path, damage):
+    filename = write(tmp_path, "1 2\n3 4\n5 6\n")
+    column_reader.load_columns(filename, cache=True)
+    binname = filename + '.cache.bin'
+    if damage == 'delete':
+        os.remove(binname)
+    else:
+        with open(binname, 'r+b') as f:
+            f.truncate(20)
+    data = column_reader.load_columns(filename, cache=True)
+    np.testing.assert_array_equal(data, [[1, 2], [3, 4], [5, 6]])
+    assert os.path.getsize(binname) == 6 * 8
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from plotXY import decimate_indices
+
+
+def series(n, seed=0):
+    return np.random.default_rng(seed).normal(size=n).cumsum()
+
+
+@pytest.mark.parametrize('n,num_bins', [(10, 10), (1000, 7), (1001, 100), (20000, 640)])
+def test_sorted_unique_endpoints(n, num_bins):
+    keep = decimate_indices(series(n), num_bins)
+    assert np.all(np.diff(keep) > 0)
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert len(keep) <= max(n, 2*num_bins + 2)
+
+
+def test_short_series_unchanged():
+    np.testing.assert_array_equal(decimate_indices(series(20), 10), np.arange(20))
+
+
+@pytest.mark.parametrize('n', [1000, 1001, 9999])
+def test_global_extrema(n):
+    y = series(n, seed=n)
+    keep = decimate_indices(y, 13)
+    assert np.argmin(y) in keep
+    assert np.argmax(y) in keep
+
+
+@pytest.mark.parametrize('where', [1, 500, 4321, 9998])
+def test_single_point_spikes(where):
+    y = np.sin(np.linspace(0, 20, 10000))
+    up, down = y.copy(), y.copy()
+    up[where] += 5.
+    down[where] -= 5.
+    assert where in decimate_indices(up, 50)
+    assert where in decimate_indices(down, 50)
+
+
+@pytest.mark.parametrize('max_points', [4, 5, 100, 101, 20000])
+@pytest.mark.parametrize('num_bins', [1, 640, 50000])
+def test_max_points_budget(max_points, num_bins):
+    y = series(100000)
+    keep = decimate_indices(y, num_bins, max_points)
+    assert len(keep) <= max_points
+    assert np.all(np.diff(keep) > 0)
+    assert np.argmin(y) in keep and np.argmax(y) in keep
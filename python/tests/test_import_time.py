@@ -0,0 +1,30 @@
+import os
+import sys
+import subprocess
+import pytest
+
+PYTHON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# heavy modules that the plotting scripts import only when plotting
+HEAVY = ['matplotlib', 'scipy']
+
+SCRIPTS = {
+    'plotXY': "plotXY.moving_average(np.arange(100.).reshape(50, 2), 5)",
+    'plotBar': "plotBar.get_parser()",
+    'plotScatter': "plotScatter.get_parser()",
+}
+
+
+@pytest.mark.parametrize('module', sorted(SCRIPTS))
+def test_import_is_lazy(module):
+    code = "\n".join([
+        "import sys",
+        "import numpy as np",
+        f"import {module}",
+        SCRIPTS[module],
+        f"print(' '.join(m for m in {HEAVY!r} if m in sys.modules))",
+    ])
+    out = subprocess.run([sys.executable, '-c', code], cwd=PYTHON_DIR,
+                         capture_output=True, text=True, check=True).stdout
+    loaded = out.split()
+    assert loaded == [], f"import {module} loaded {', '.join(loaded)}"
@@ -0,0 +1,18 @@
+import os
+import sys
+import subprocess
+import pytest
+
+PYTHON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+@pytest.mark.parametrize('script', ['plotXY.py', 'plotBar.py', 'plotScatter.py'])
+def test_failed_job_exits_nonzero(tmp_path, script):
+    jobfile = tmp_path / 'jobs.in'
+    jobfile.write_text("-i {} -o {}\n".format(tmp_path / 'nope.dat', tmp_path / 'nope.png'))
+    proc = subprocess.run([sys.executable, os.path.join(PYTHON_DIR, script),
+                           '--jobs', str(jobfile), '-n', '1'],
+                          cwd=PYTHON_DIR, capture_output=True, text=True)
+    assert proc.returncode == 1
+    assert 'FAILED' in proc.stdout
+    assert not (tmp_path / 'nope.png').exists()
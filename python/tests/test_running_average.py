@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from plotXY import running_average, moving_average
+
+
+def series(n=50, ncols=None, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=n if ncols is None else (n, ncols)).cumsum(axis=0)
+
+
+def reference_ema(y, N):
+    a = 2. / (N + 1)
+    s = np.empty_like(y)
+    s[0] = y[0]
+    for t in range(1, len(y)):
+        s[t] = (1 - a)*s[t-1] + a*y[t]
+    return s
+
+
+@pytest.mark.parametrize('N', [1, 2, 7, 50])
+def test_center_and_trailing(N):
+    y = series()
+    x = np.linspace(0., 4.9, 50)
+    expected = np.convolve(y, np.ones(N)/N, 'valid')
+
+    x_avg, y_avg = running_average(y, N, 'center', x=x)
+    np.testing.assert_allclose(y_avg, expected)
+    np.testing.assert_allclose(x_avg, np.convolve(x, np.ones(N)/N, 'valid'))
+
+    x_avg, y_avg = running_average(y, N, 'trailing', x=x)
+    np.testing.assert_allclose(y_avg, expected)
+    np.testing.assert_array_equal(x_avg, x[N-1:])
+
+
+@pytest.mark.parametrize('N', [1, 3, 10, 200])
+def test_ema(N):
+    y = series()
+    x_avg, y_avg = running_average(y, N, 'ema')
+    np.testing.assert_allclose(y_avg, reference_ema(y, N), rtol=1e-12, atol=1e-12)
+    np.testing.assert_array_equal(x_avg, np.arange(50.))
+
+
+@pytest.mark.parametrize('N', [1, 4, 7])
+def test_block(N):
+    y = series()
+    nblocks = 50 // N
+    x_avg, y_avg = running_average(y, N, 'block')
+    np.testing.assert_allclose(y_avg, y[:nblocks*N].reshape(nblocks, N).mean(axis=1))
+    np.testing.assert_allclose(x_avg, np.arange(nblocks*N).reshape(nblocks, N).mean(axis=1))
+
+
+@pytest.mark.parametrize('kind', ['center', 'trailing', 'block'])
+def test_window_longer_than_series(kind):
+    x_avg, y_avg = running_average(series(5), 6, kind)
+    assert x_avg.shape == (0,)
+    assert y_avg.shape == (0,)
+
+
+def test_window_longer_than_series_ema():
+    y = series(5)
+    np.testing.assert_allclose(running_average(y, 6, 'ema')[1], reference_ema(y, 6))
+
+
+@pytest.mark.parametrize('kind', ['center', 'trailing', 'ema', 'block'])
+def test_axis(kind):
+    y = series(40, ncols=3)
+    _, by_rows = running_average(y, 5, kind, axis=0)
+    _, by_cols = running_average(y.T, 5, kind, axis=1)
+    np.testing.assert_allclose(by_cols, by_rows.T)
+    for i in range(3):
+        np.testing.assert_allclose(by_rows[:, i], running_average(y[:, i], 5, kind)[1])
+
+
+def test_moving_average_columns():
+    y = series(40, ncols=2)
+    z = moving_average(y, 4, kind='center')
+    for i in range(2):
+        np.testing.assert_allclose(z[i], np.convolve(y[:, i], np.ones(4)/4, 'valid'))
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        running_average(series(), 3, 'median')
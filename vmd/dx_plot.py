@@ -3,114 +3,293 @@
 Generate contour plots of data from .dx files generated in VMD.
 
 By:         Justin C. Smith, Victoria T. Lim
-Version:    27 April 2020
+Version:    18 October 2026
 
 Example:
-$ python dx_plot.py -i infile.dx -o outfile.png --view_dim x --view_dim_val 0
+$ python dx_plot.py -i infile.dx -o outfile.png --view_dim x --view_dim_val 0 --xlim -40 40 --ylim -40 40
+$ python dx_plot.py -i infile.dx -o outfile.png --view_dim x --view_dim_val ::10 --stack panels
+$ python dx_plot.py -i infile.dx -o outfile.png --view_dim x --slab -5 5
+$ python dx_plot.py -i density.dx -o profile.png --view_dim z --profile --raw
+$ python dx_plot.py -i density.dx --box -10 10 -10 10 -5 5
+$ python dx_plot.py -i holo.dx --diff apo.dx -o diff.png --view_dim x --view_dim_val 50
 
 Resources:
 - https://www.ks.uiuc.edu/Research/vmd/plugins/molfile/dxplugin.html
 
 Check / edit before using:
-- vmin, vmax values of color bar
-- X, Y arrays defined for contourf
-- xlim and ylim of plot
+- vmin, vmax values of color bar (--vrange)
+- xlim and ylim of plot (--xlim, --ylim)
 - xlabel and ylabel of plot
 
 """
 
+import os
 import numpy as np
-import matplotlib.pyplot as plt
-from gridData import Grid
+import dxio
 
-def dx_plot(infile, outfile, dim, dim_val):
-    """
-    """
+# axis of the grid for each view dimension
+AXES = {'x': 0, 'y': 1, 'z': 2}
 
-    # load data from dx file
-    data = Grid(infile)
-    box_lens = []
 
-    # print info from dx file
-    print(f"Shape of grid data: {data.grid.shape}")
-    for i in range(3):
-        this_len = data.edges[i].shape[0] - 1
-        box_lens.append(this_len)
-        print(f"Shape of edge {i}: {this_len}")
-    print(f"Origin: {data.origin}")
-    print(f"Delta: {data.delta}")
+def get_slices(grid, dim, indices):
+    """
+    Get 2D planes of a 3D grid as a view, without copying.
+
+    Parameters
+    ----------
+    grid : 3D numpy array
+    dim : string
+        Dimension from which to view the planes: 'x' for yz planes,
+        'y' for xz planes, or 'z' for xy planes.
+    indices : int, slice, or list of ints
+        Index or indices of the planes along dim.
+
+    Returns
+    -------
+    numpy array of one plane of shape (n_vertical, n_horizontal), or of
+    planes of shape (n_planes, n_vertical, n_horizontal) if indices is
+    a slice or list
 
-    # prep list containing points to be contour plotted
-    points = []
+    """
+    axis = AXES[dim]
+    planes = np.moveaxis(grid, axis, 0)[indices]
+    # put the higher remaining axis first so it is vertical in the plot
+    return np.swapaxes(planes, -1, -2)
 
-    # view from x to see the yz plane
-    if dim == 'x':
 
-        # iterate over z
-        for zi in range(box_lens[2]):
-            subpoints = []
+def parse_indices(spec, n):
+    """
+    Convert a string of plane indices from the command line.
 
-            # iterate over y
-            for yi in range(box_lens[1]):
-                subpoints.append(data.grid[dim_val, yi, zi])
+    Parameters
+    ----------
+    spec : string
+        Either start:stop:step, with any of them optional as for a Python
+        slice (e.g., "::5" for every 5th plane), or a single index.
+    n : int
+        Number of planes along the view dimension.
 
-            points.append(subpoints)
+    Returns
+    -------
+    list of ints
 
-    # view from y to see the xz plane
-    elif dim == 'y':
+    """
+    if ':' not in spec:
+        return [int(spec)]
+    parts = [int(p) if p.strip() else None for p in spec.split(':')]
+    return list(range(n))[slice(*parts)]
 
-        # iterate over z
-        for zi in range(box_lens[2]):
-            subpoints = []
 
-            # iterate over x
-            for xi in range(box_lens[0]):
-                subpoints.append(data.grid[xi, dim_val, zi])
+def load_grid(infile, cache=False, diff=None):
+    """
+    Read a dx file and print its grid information.
+
+    Parameters
+    ----------
+    infile : string
+        Name of input dx file.
+    cache : bool (opt.)
+        Read the grid from a binary sidecar file of infile, which is
+        written on the first read, instead of parsing the text each time.
+    diff : string (opt.)
+        Name of a dx file on the same grid to subtract from infile.
+
+    Returns
+    -------
+    dxio.DXGrid
+
+    """
+    # load data from dx file
+    data = dxio.read_dx(infile, cache=cache)
+    if diff is not None:
+        data = data.subtract(dxio.read_dx(diff, cache=cache))
 
-            points.append(subpoints)
+    # print info from dx file
+    print(f"Shape of grid data: {data.grid.shape}")
+    for i in range(3):
+        print(f"Shape of edge {i}: {data.edges[i].shape[0] - 1}")
+    print(f"Origin: {data.origin}")
+    print(f"Delta: {data.delta}")
+    return data
 
-    # view from z to see the xy plane
-    elif dim == 'z':
 
-        # iterate over y
-        for yi in range(box_lens[1]):
-            subpoints = []
+def to_units(values, raw=False):
+    """
+    Convert electrostatic potential from kT/e to mV, with the min set to
+    zero, or return raw values unchanged, e.g., for density maps.
 
-            # iterate over x
-            for xi in range(box_lens[0]):
-                subpoints.append(data.grid[xi, yi, dim_val])
+    Returns
+    -------
+    values : numpy array
+    units : string
 
-            points.append(subpoints)
+    """
+    if raw:
+        return np.asarray(values), ''
 
     # convert units of kT/e to mV, 1 kT/e = 25.7 mV at 298 K
     # http://bionano.physics.illinois.edu/sites/default/files/ion-tutorial.pdf
-    points = 25.7 * np.array(points)
+    values = 25.7 * np.asarray(values)
 
     # min should be bulk water, assign this as zero
     # todo: maybe handle better without making this assumption
-    points = points - np.amin(points)
-    print(f"Min and max of potential: {np.amin(points)} {np.amax(points)}")
+    values = values - np.amin(values)
+    print(f"Min and max of potential: {np.amin(values)} {np.amax(values)}")
+    return values, 'mV'
 
-    # define x and y ranges to use in contourf
-    x = np.arange(points.shape[1])
-    y = np.arange(points.shape[0])
 
-    # subtract midpoints such that middle is defined as zero
-    x = x - np.median(x)
-    y = y - np.median(y)
+def dx_plot(data, outfile, dim, dim_val=None, stack=None, vrange=None,
+            slab=None, raw=False, xlim=None, ylim=None):
+    """
+    Parameters
+    ----------
+    data : dxio.DXGrid
+        Grid, e.g., from load_grid.
+    outfile : string
+        Name of output image file. For stack='frames', the plane index
+        is added before the extension of each file.
+    dim : string
+        Dimension from which to view the planes, 'x' 'y' or 'z'.
+    dim_val : int, list of ints, or string
+        Index or indices of the planes along dim, or a string of
+        indices as for parse_indices.
+    stack : string (opt.)
+        For multiple planes, 'panels' to plot them as subplots of one
+        figure, or 'frames' to save one figure per plane.
+    vrange : tuple of floats (opt.)
+        Minimum and maximum of the color scale, in mV, or in the units
+        of the grid if raw. Default is the range of all planes plotted.
+    slab : tuple of floats (opt.)
+        Plot the average of the planes with coordinates from slab[0]
+        to slab[1] along dim, in Angstroms, instead of dim_val.
+    raw : bool (opt.)
+        Plot values as they are instead of as potential in mV.
+    xlim, ylim : tuples of floats (opt.)
+        Horizontal and vertical ranges of the plot, in Angstroms.
+        Default is the whole grid.
 
-    # generate plot
-    plt.contourf(x, y, points, levels=6, vmin=0, vmax=900, cmap='cividis')
+    """
+    import matplotlib.pyplot as plt
+
+    # get planes to be contour plotted, as shape (n_planes, n_vert, n_horiz)
+    axis = AXES[dim]
+    if slab is not None:
+        points = np.swapaxes(data.slab_average(axis, *slab), 0, 1)[np.newaxis]
+        indices = [0]
+        titles = [rf"{dim} from {slab[0]} to {slab[1]} $\mathrm{{\AA}}$"]
+    else:
+        if isinstance(dim_val, str):
+            indices = parse_indices(dim_val, data.grid.shape[axis])
+        elif np.isscalar(dim_val):
+            indices = [dim_val]
+        else:
+            indices = list(dim_val)
+        points = get_slices(data.grid, dim, indices)
+        coords = data.midpoints[axis]
+        titles = [rf"{dim} = {coords[i]:.2f} $\mathrm{{\AA}}$" for i in indices]
+    points, units = to_units(points, raw)
+
+    # shared color scale for all planes
+    if vrange is None:
+        vrange = (np.amin(points), np.amax(points))
+        if vrange[1] <= vrange[0]:
+            vrange = (vrange[0] - 0.5, vrange[0] + 0.5)
+    levels = np.linspace(vrange[0], vrange[1], 7)
+
+    # positions of grid points along the two remaining dimensions
+    hdim, vdim = [d for d in 'xyz' if d != dim]
+    x = data.midpoints[AXES[hdim]]
+    y = data.midpoints[AXES[vdim]]
+
+    # label the two remaining dimensions
+    xlabel = rf'${hdim}$ position in membrane ($\mathrm{{\AA}}$)'
+    ylabel = rf'${vdim}$ position in membrane ($\mathrm{{\AA}}$)'
+
+    def plot_plane(ax, plane, title=None):
+        cs = ax.contourf(x, y, plane, levels=levels, extend='both', cmap='cividis')
+        if xlim is not None:
+            ax.set_xlim(*xlim)
+        if ylim is not None:
+            ax.set_ylim(*ylim)
+        if title is not None:
+            ax.set_title(title)
+        return cs
+
+    # one figure with all planes as panels
+    if stack == 'panels' and len(indices) > 1:
+        ncols = int(np.ceil(np.sqrt(len(indices))))
+        nrows = int(np.ceil(len(indices) / ncols))
+        fig, axes = plt.subplots(nrows, ncols, sharex=True, sharey=True,
+                                 figsize=(3*ncols, 3*nrows), squeeze=False)
+        for ax, plane, title in zip(axes.flat, points, titles):
+            cs = plot_plane(ax, plane, title)
+        for ax in axes.flat[len(indices):]:
+            ax.set_visible(False)
+        for ax in axes[-1]:
+            ax.set_xlabel(xlabel)
+        for ax in axes[:, 0]:
+            ax.set_ylabel(ylabel)
+        cb = fig.colorbar(cs, ax=axes.ravel().tolist())
+        cb.ax.set_title(units)
+        fig.savefig(outfile)
+        plt.show()
+        return
+
+    # one figure per plane
+    for plane, idx in zip(points, indices):
+        fig, ax = plt.subplots()
+        cs = plot_plane(ax, plane)
+
+        # add plot features
+        cb = fig.colorbar(cs)
+        cb.ax.set_title(units)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+
+        if len(indices) > 1:
+            base, ext = os.path.splitext(outfile)
+            fig.savefig(f"{base}_{idx:04d}{ext}")
+            plt.close(fig)
+        else:
+            fig.savefig(outfile)
+            plt.show()
+
+
+def dx_profile(data, outfile, dim='z', box=None, raw=False):
+    """
+    Plot and save the profile of a grid along one dimension, averaged
+    over the other two.
+
+    Parameters
+    ----------
+    data : dxio.DXGrid
+        Grid, e.g., from load_grid.
+    outfile : string
+        Name of output image file. The profile is also written to a
+        text file with the same name but the extension .dat.
+    dim : string (opt.)
+        Dimension of the profile, 'x' 'y' or 'z'.
+    box : list of 3 (lo, hi) tuples or None (opt.)
+        Only average over the part of the grid inside this box, in Angstroms.
+    raw : bool (opt.)
+        Plot values as they are instead of as potential in mV.
 
-    # add plot features
-    cb = plt.colorbar()
-    cb.ax.set_title('mV')
-    plt.xlim(-40, 40)
-    plt.ylim(-40, 40)
-    plt.xlabel(r'$y$ position in membrane ($\mathrm{\AA}$)')
-    plt.ylabel(r'$z$ position in membrane ($\mathrm{\AA}$)')
+    """
+    import matplotlib.pyplot as plt
 
-    plt.savefig(outfile)
+    coords, values = data.profile(AXES[dim], box)
+    values, units = to_units(values, raw)
+
+    datfile = os.path.splitext(outfile)[0] + '.dat'
+    np.savetxt(datfile, np.column_stack([coords, values]), fmt='%.6f',
+               delimiter='\t', header=f"{dim} (Angstrom)\tvalue ({units or 'raw'})")
+
+    fig, ax = plt.subplots()
+    ax.plot(coords, values)
+    ax.set_xlabel(rf'${dim}$ position in membrane ($\mathrm{{\AA}}$)')
+    ax.set_ylabel(f'average ({units})' if units else 'average')
+    ax.grid()
+    fig.savefig(outfile)
     plt.show()
 
 
@@ -128,12 +307,74 @@ if __name__ == "__main__":
                         help="Dimension from which to view 2D potential; "
                              "valid options are 'x' 'y' 'z'")
 
-    parser.add_argument("-w", "--view_dim_val", type=int,
+    parser.add_argument("-w", "--view_dim_val",
                         help="Where on the view_dim dimension to generate "
                              "2D snapshot. E.g., if you have 100 points in x "
                              "dimension and you want to see the yz plane at "
-                             "the halfway point in xrange, specify value of 50")
+                             "the halfway point in xrange, specify value of 50. "
+                             "For a stack of planes, give start:stop:step, "
+                             "e.g., 20:80:10 or ::5 for every 5th plane.")
+
+    parser.add_argument("-s", "--stack", choices=['panels', 'frames'],
+                        default='frames',
+                        help="For a stack of planes, plot them as 'panels' "
+                             "of one figure, or save 'frames' as separate "
+                             "files named with the plane index.")
+
+    parser.add_argument("--vrange", nargs=2, type=float,
+                        help="Min and max of the color scale, in mV, or in "
+                             "the units of the grid with --raw. Default is "
+                             "the range of all planes plotted.")
+
+    parser.add_argument("--cache", action="store_true", default=False,
+                        help="Save the grid to a binary file next to the "
+                             "dx file on the first run, and memory-map it "
+                             "on later runs.")
+
+    parser.add_argument("--slab", nargs=2, type=float, metavar=('LO', 'HI'),
+                        help="Plot the average of the planes from LO to HI "
+                             "along view_dim, in Angstroms, instead of the "
+                             "plane at view_dim_val.")
+
+    parser.add_argument("--profile", action="store_true", default=False,
+                        help="Plot the profile along view_dim, averaged over "
+                             "the other two dimensions (within --box if "
+                             "given), and save it to a .dat file.")
+
+    parser.add_argument("--box", nargs=6, type=float,
+                        metavar=('X0', 'X1', 'Y0', 'Y1', 'Z0', 'Z1'),
+                        help="Print the integral of the grid inside this box "
+                             "in Angstroms, e.g., the number of waters from a "
+                             "density map.")
+
+    parser.add_argument("--diff",
+                        help="Name of a dx file on the same grid to subtract "
+                             "from the input before anything else.")
+
+    parser.add_argument("--raw", action="store_true", default=False,
+                        help="Use values as they are, e.g., for density maps, "
+                             "instead of converting potential from kT/e to mV "
+                             "and setting the minimum to zero.")
+
+    parser.add_argument("--xlim", nargs=2, type=float,
+                        help="Horizontal range of the plot in Angstroms.")
+
+    parser.add_argument("--ylim", nargs=2, type=float,
+                        help="Vertical range of the plot in Angstroms.")
 
     args = parser.parse_args()
-    dx_plot(args.infile, args.outfile, args.view_dim, args.view_dim_val)
-
+    data = load_grid(args.infile, args.cache, args.diff)
+
+    box = None
+    if args.box is not None:
+        box = list(zip(args.box[0::2], args.box[1::2]))
+        print(f"Integral inside box: {data.integrate(box)}")
+
+    if args.outfile is None:
+        pass
+    elif args.profile:
+        dx_profile(data, args.outfile, args.view_dim or 'z', box, args.raw)
+    else:
+        dx_plot(data, args.outfile, args.view_dim, args.view_dim_val,
+                args.stack, args.vrange, args.slab, args.raw, args.xlim,
+                args.ylim)
@@ -0,0 +1,244 @@
+#!/usr/bin/python
+
+"""
+Read CHARMM/NAMD DCD trajectories without VMD. The file is memory-mapped,
+and frames are returned as zero-copy (n_atoms, 3) float32 views into it,
+so only the frames that are used are read from disk. Several DCD files
+can be read as one trajectory, as with a dcdlist in analyzeDCD.tcl.
+
+Version: Oct 18 2026
+
+Example:
+>>> import dcd
+>>> traj = dcd.Trajectory(['win01.dcd', 'win02.dcd'])
+>>> for i, xyz, cell in traj.frames(first=0, last=-1, step=10):
+...     print(i, xyz[0])
+
+Resources:
+- https://www.ks.uiuc.edu/Research/vmd/plugins/molfile/dcdplugin.html
+
+"""
+
+import os
+import numpy as np
+
+
+class DCD:
+    """
+    One DCD file.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the DCD file.
+
+    Attributes
+    ----------
+    natoms : int
+    nframes : int
+        Number of complete frames in the file, from its size.
+    timestep : float
+        Time between saved frames in AKMA units, i.e., DELTA*NSAVC.
+    titles : list of strings
+    has_cell : bool
+        Whether each frame has a unit cell record.
+    coords : numpy array of shape (nframes, natoms, 3)
+        Read-only view of all coordinates, in Angstroms.
+    cells : numpy array of shape (nframes, 6), or None
+        Raw unit cell record of each frame, as A, gamma, B, beta, alpha, C.
+
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._mm = np.memmap(filename, dtype=np.uint8, mode='r')
+
+        # first record is 84 bytes, which gives the byte order
+        for endian in ('<', '>'):
+            if np.frombuffer(self._mm, endian+'i4', 1, 0)[0] == 84:
+                break
+        else:
+            raise ValueError(f"{filename} is not a DCD file with 32-bit record markers")
+        self._endian = endian
+        if bytes(self._mm[4:8]) != b'CORD':
+            raise ValueError(f"{filename} is not a DCD coordinate file")
+
+        icntrl = np.frombuffer(self._mm, endian+'i4', 20, 8)
+        self.istart = int(icntrl[1])
+        self.nsavc = int(icntrl[2])
+        nfixed = int(icntrl[8])
+        charmm = icntrl[19] != 0
+        delta = float(np.frombuffer(self._mm, endian+'f4', 1, 8+9*4)[0])
+        self.timestep = delta * self.nsavc
+        self.has_cell = charmm and icntrl[10] != 0
+        if charmm and icntrl[11] != 0:
+            raise ValueError(f"Four-dimensional DCD files are not supported: {filename}")
+        if nfixed != 0:
+            raise ValueError(f"DCD files with fixed atoms are not supported: {filename}")
+
+        # title record
+        pos = 4 + 84 + 4
+        size = self._int(pos)
+        ntitle = self._int(pos + 4)
+        raw = bytes(self._mm[pos+8:pos+8+80*ntitle])
+        self.titles = [raw[i:i+80].decode('ascii', errors='replace').rstrip('\x00 ')
+                       for i in range(0, len(raw), 80)]
+        pos += 4 + size + 4
+
+        # number of atoms record
+        self.natoms = self._int(pos + 4)
+        pos += 4 + 4 + 4
+        self._header_size = pos
+
+        # frames are [cell record] then X, Y, and Z records
+        self._cell_size = 4 + 48 + 4 if self.has_cell else 0
+        self._coord_size = 4 + 4*self.natoms + 4
+        self._frame_size = self._cell_size + 3*self._coord_size
+        self.nframes = (len(self._mm) - self._header_size) // self._frame_size
+
+        self.coords = np.ndarray(
+            shape=(self.nframes, self.natoms, 3), dtype=endian+'f4',
+            buffer=self._mm, offset=self._header_size + self._cell_size + 4,
+            strides=(self._frame_size, 4, self._coord_size))
+        self.cells = None
+        if self.has_cell:
+            self.cells = np.ndarray(
+                shape=(self.nframes, 6), dtype=endian+'f8', buffer=self._mm,
+                offset=self._header_size + 4, strides=(self._frame_size, 8))
+
+    def _int(self, offset):
+        return int(np.frombuffer(self._mm, self._endian+'i4', 1, offset)[0])
+
+    def __len__(self):
+        return self.nframes
+
+    def __getitem__(self, index):
+        """
+        Coordinates of one frame as an (natoms, 3) view, or of a slice
+        of frames as an (nframes, natoms, 3) view.
+        """
+        return self.coords[index]
+
+    def box(self, index):
+        """
+        Unit cell of a frame as (a, b, c, alpha, beta, gamma), with
+        lengths in Angstroms and angles in degrees, or None.
+        """
+        if self.cells is None:
+            return None
+        a, gamma, b, beta, alpha, c = self.cells[index]
+        angles = np.array([alpha, beta, gamma])
+        # some NAMD versions write cosines of the angles
+        if np.all(np.abs(angles) <= 1.):
+            angles = np.degrees(np.arccos(angles))
+        return np.array([a, b, c, *angles])
+
+
+def frame_range(nframes, first=0, last=-1, step=1):
+    """
+    Frame indices from first to last, including last, as in VMD's
+    mol addfile. A last of -1 means the last frame.
+
+    Returns
+    -------
+    range
+
+    """
+    if last < 0 or last >= nframes:
+        last = nframes - 1
+    return range(first, last + 1, step)
+
+
+class Trajectory:
+    """
+    Several DCD files read as one trajectory.
+
+    Parameters
+    ----------
+    filenames : list of strings
+        Names of the DCD files, in order. All must have the same atoms.
+
+    """
+    def __init__(self, filenames):
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        self.dcds = [DCD(f) for f in filenames]
+        self.natoms = self.dcds[0].natoms
+        for d in self.dcds:
+            if d.natoms != self.natoms:
+                raise ValueError(f"{d.filename} has {d.natoms} atoms but "
+                                 f"{self.dcds[0].filename} has {self.natoms}")
+        # index of the first frame of each file
+        self._starts = np.cumsum([0] + [len(d) for d in self.dcds])
+
+    def __len__(self):
+        return int(self._starts[-1])
+
+    def __getitem__(self, index):
+        """
+        Coordinates of one frame as an (natoms, 3) view.
+        """
+        if index < 0:
+            index += len(self)
+        k = int(np.searchsorted(self._starts, index, side='right')) - 1
+        return self.dcds[k][index - self._starts[k]]
+
+    def frames(self, first=0, last=-1, step=1):
+        """
+        Iterate over frames from first to last, including last, with step.
+
+        Returns
+        -------
+        generator of (int, numpy array, numpy array or None) tuples
+            Frame index in the whole trajectory, (natoms, 3) view of its
+            coordinates, and its unit cell as from DCD.box
+
+        """
+        for indices, xyz, cells in self.blocks(1, first, last, step):
+            yield int(indices[0]), xyz[0], None if cells is None else cells[0]
+
+    def blocks(self, block_size, first=0, last=-1, step=1):
+        """
+        Iterate over blocks of frames from first to last, including last,
+        with step. Blocks do not cross file boundaries, so each is a view.
+
+        Returns
+        -------
+        generator of (numpy array, numpy array, numpy array or None) tuples
+            Frame indices in the whole trajectory, (nblock, natoms, 3) view
+            of their coordinates, and (nblock, 6) array of unit cells as
+            from DCD.box
+
+        """
+        wanted = frame_range(len(self), first, last, step)
+        for k, d in enumerate(self.dcds):
+            start, stop = self._starts[k], self._starts[k+1]
+            # first wanted frame in this file
+            if wanted.start >= stop or len(wanted) == 0:
+                continue
+            i0 = wanted.start if wanted.start >= start else \
+                start + (-(start - wanted.start)) % wanted.step
+            i1 = min(stop, wanted.stop)
+            for b in range(i0, i1, block_size * wanted.step):
+                local = slice(b - start, min(b + block_size*wanted.step, i1) - start, wanted.step)
+                indices = np.arange(len(d))[local] + start
+                cells = None
+                if d.has_cell:
+                    cells = np.array([d.box(i) for i in range(len(d))[local]])
+                yield indices, d[local], cells
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Print information about DCD files.")
+    parser.add_argument("-i", "--infiles", nargs='+', required=True,
+                        help="Names of DCD files.")
+    args = parser.parse_args()
+
+    for f in args.infiles:
+        if not os.path.exists(f):
+            raise parser.error(f"Input file {f} does not exist.")
+        d = DCD(f)
+        print(f"{f}: {d.natoms} atoms, {d.nframes} frames, "
+              f"timestep {d.timestep:g}, unit cell {'yes' if d.has_cell else 'no'}")
+        if d.has_cell and d.nframes > 0:
+            print("  first unit cell (a b c alpha beta gamma):", d.box(0))
@@ -8,15 +8,21 @@ See more details: https://stackoverflow.com/a/16399202
 """
 
 import os
-import matplotlib.pyplot as plt
+import sys
 import numpy as np
 
-def plot_hists(infiles, same_ax=False):
+# column_reader is in the python directory of this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'python'))
+import column_reader
+
+def plot_hists(infiles, same_ax=False, cache=False):
+    import matplotlib.pyplot as plt
+
     num_files = len(infiles)
 
     alldata = []
     for i in infiles:
-        data = np.loadtxt(i)[:,1]
+        data = column_reader.load_columns(i, usecols=[1], cache=cache)[:,0]
         alldata.append(data)
 
     if not same_ax:
@@ -74,5 +80,10 @@ if __name__ == "__main__":
                         help="Plot histogram on the same axes instead of "
                              "on different subplots")
 
+    parser.add_argument("--cache", action="store_true", default=False,
+                        help="Save parsed data to a binary file next to each "
+                             "input, and reuse it on later runs if the input "
+                             "has not changed.")
+
     args = parser.parse_args()
-    plot_hists(args.infile, args.together)
+    plot_hists(args.infile, args.together, args.cache)
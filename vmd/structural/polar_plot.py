@@ -13,8 +13,6 @@ By:         Victoria T. Lim
 
 import os, sys
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
 import argparse
 
 def load_file(filename):
@@ -29,6 +27,8 @@ def polar_hist(filename, filelist=[], bins_number=72):
     """
     Reference: https://tinyurl.com/y9wzfo6f
     """
+    import matplotlib.pyplot as plt
+    import matplotlib as mpl
 
     # load data
     times, angles = load_file(filename)
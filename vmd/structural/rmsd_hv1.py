@@ -0,0 +1,358 @@
+#!/usr/bin/python
+
+"""
+Measure RMSD of Hv1 over a trajectory without VMD, as calc_rmsd_hv1 in
+analyzeDCD.tcl. Atom indices of every group are found once from the PSF,
+then frames are read in blocks with dcd.py, superposed onto the reference
+by the transmembrane backbone with a batched Kabsch fit, and the RMSD of
+all groups is computed per block with array reductions. The output .dat
+file has the same layout as that of calc_rmsd_hv1.
+
+As in analyzeDCD.tcl, frame 0 is the PDB loaded with the PSF and the DCD
+frames follow it. The ligand is moved to its periodic image nearest the
+protein when the DCD has unit cells, in place of pbc wrap. With a reference
+PDB the ligand is not moved, since analyzeDCD.tcl then wraps the reference
+molecule instead of the trajectory.
+
+Version: Oct 18 2026
+
+Usage:
+python rmsd_hv1.py -p file.psf -b file.pdb -d win01.dcd win02.dcd -o rmsd_segmt --level segment --gbi 1
+
+"""
+
+import os
+import numpy as np
+import dcd
+
+# residue names counted as protein
+PROTEIN = {'ALA', 'ARG', 'ASN', 'ASP', 'ASH', 'CYS', 'CYX', 'GLN', 'GLU', 'GLH',
+           'GLY', 'HIS', 'HSD', 'HSE', 'HSP', 'HID', 'HIE', 'HIP', 'ILE', 'LEU',
+           'LYS', 'LYN', 'MET', 'PHE', 'PRO', 'SER', 'THR', 'TRP', 'TYR', 'VAL'}
+
+# protein backbone atom names, including C-terminal oxygens
+BACKBONE = {'N', 'CA', 'C', 'O', 'OT1', 'OT2', 'OXT'}
+
+# resid ranges of the transmembrane segments S1 to S4
+SEGMENTS = [(100, 125), (134, 160), (168, 191), (198, 220)]
+
+# resids of the residue level of detail
+RESIDUES = range(88, 231)
+
+
+class Topology:
+    """
+    Per-atom fields used for selections, each as a numpy array.
+
+    Parameters
+    ----------
+    segname, resname, name : lists of strings
+    resid : list of ints
+    hydrogen : list of bools
+
+    """
+    def __init__(self, segname, resid, resname, name, hydrogen):
+        self.segname = np.array(segname)
+        self.resid = np.array(resid, dtype=int)
+        self.resname = np.array(resname)
+        self.name = np.array(name)
+        self.hydrogen = np.array(hydrogen, dtype=bool)
+
+    def __len__(self):
+        return len(self.name)
+
+    def backbone(self, resids=None):
+        """
+        Indices of protein backbone atoms, optionally of only the given
+        list of (first, last) resid ranges, e.g., as in hv1_backbone.
+        """
+        mask = np.isin(self.resname, list(PROTEIN)) & np.isin(self.name, list(BACKBONE))
+        if resids is not None:
+            in_range = np.zeros(len(self), dtype=bool)
+            for lo, hi in resids:
+                in_range |= (self.resid >= lo) & (self.resid <= hi)
+            mask &= in_range
+        return np.flatnonzero(mask)
+
+    def protein(self):
+        return np.flatnonzero(np.isin(self.resname, list(PROTEIN)))
+
+    def segment_heavy(self, segname):
+        """
+        Indices of non-hydrogen atoms of a segment, e.g., "segname GBI1 and noh".
+        """
+        return np.flatnonzero((self.segname == segname) & ~self.hydrogen)
+
+
+def _resid(field):
+    # drop insertion codes
+    return int(''.join(c for c in field if c.isdigit() or c == '-'))
+
+
+def read_psf(filename):
+    """
+    Read the atoms of a CHARMM PSF file. Atoms with masses below 1.5
+    are hydrogens.
+
+    Returns
+    -------
+    Topology
+
+    """
+    fields = []
+    with open(filename) as f:
+        for line in f:
+            if '!NATOM' in line:
+                natoms = int(line.split()[0])
+                fields = [next(f).split() for _ in range(natoms)]
+                break
+    if not fields:
+        raise ValueError(f"No atoms found in {filename}")
+    mass = np.array([float(x[7]) for x in fields])
+    names = [x[4] for x in fields]
+    hydrogen = (mass > 0) & (mass < 1.5)
+    hydrogen |= (mass == 0) & np.char.startswith(np.array(names), 'H')
+    return Topology([x[1] for x in fields], [_resid(x[2]) for x in fields],
+                    [x[3] for x in fields], names, hydrogen)
+
+
+def read_pdb(filename):
+    """
+    Read the atoms and coordinates of a PDB file. Hydrogens are found by
+    the element column, or else by the first letter of the atom name.
+
+    Returns
+    -------
+    top : Topology
+    coords : numpy array of shape (natoms, 3)
+
+    """
+    segname, resid, resname, name, hydrogen, coords = [], [], [], [], [], []
+    with open(filename) as f:
+        for line in f:
+            if not line.startswith(('ATOM', 'HETATM')):
+                continue
+            name.append(line[12:16].strip())
+            resname.append(line[17:21].strip())
+            resid.append(_resid(line[22:26]))
+            segname.append(line[72:76].strip())
+            element = line[76:78].strip() or name[-1].lstrip('0123456789')[:1]
+            hydrogen.append(element.upper() == 'H')
+            coords.append([float(line[30:38]), float(line[38:46]), float(line[46:54])])
+    return Topology(segname, resid, resname, name, hydrogen), np.array(coords)
+
+
+def superpose(coords, mobile, target):
+    """
+    Superpose a block of frames onto a target with a batched Kabsch fit,
+    without weights as in VMD's measure fit.
+
+    Parameters
+    ----------
+    coords : numpy array of shape (nframes, n, 3)
+        Coordinates to move with the fit of each frame.
+    mobile : numpy array of shape (nframes, m, 3)
+        Coordinates of the fitting atoms in each frame.
+    target : numpy array of shape (m, 3)
+        Coordinates of the fitting atoms in the reference.
+
+    Returns
+    -------
+    numpy array of shape (nframes, n, 3)
+
+    """
+    mobile_com = mobile.mean(axis=1, keepdims=True)
+    target_com = target.mean(axis=0)
+    cov = np.einsum('fmi,mj->fij', mobile - mobile_com, target - target_com)
+    u, s, vt = np.linalg.svd(cov)
+    # reflect the smallest axis to keep proper rotations
+    d = np.sign(np.linalg.det(u @ vt))
+    u[:, :, 2] *= d[:, None]
+    return (coords - mobile_com) @ (u @ vt) + target_com
+
+
+def group_rmsd(coords, ref, starts):
+    """
+    RMSD of consecutive groups of atoms without fitting.
+
+    Parameters
+    ----------
+    coords : numpy array of shape (nframes, n, 3)
+    ref : numpy array of shape (n, 3)
+    starts : list of ints
+        Index of the first atom of each group, in increasing order.
+
+    Returns
+    -------
+    numpy array of shape (nframes, ngroups)
+
+    """
+    sq = ((coords - ref)**2).sum(axis=-1)
+    counts = np.diff(np.append(starts, sq.shape[1]))
+    return np.sqrt(np.add.reduceat(sq, starts, axis=1) / counts)
+
+
+def hv1_groups(top, level='segment', gbi=0):
+    """
+    Groups of atoms for calc_rmsd_hv1, starting with hv1_backbone.
+
+    Returns
+    -------
+    list of numpy arrays of atom indices
+
+    """
+    groups = [top.backbone(SEGMENTS)]
+    if level in ('residue', 'resid'):
+        groups += [top.backbone([(r, r)]) for r in RESIDUES]
+    elif level == 'segment':
+        groups += [top.backbone([seg]) for seg in SEGMENTS]
+    if gbi in (1, 2):
+        groups.append(top.segment_heavy(f'GBI{gbi}'))
+    return groups
+
+
+def calc_rmsd_hv1(outprefix, psf, pdb, dcds, level='segment', gbi=0,
+                  inpdb=None, skip=1, block_size=256):
+    """
+    Parameters
+    ----------
+    outprefix : string
+        Basename of the output .dat file.
+    psf : string
+        Name of the PSF file.
+    pdb : string
+        Name of the PDB file loaded with the PSF, as frame 0.
+    dcds : list of strings
+        Names of the DCD files.
+    level : string (opt.)
+        Level of detail of RMSD values: backbone, segment, or residue.
+    gbi : int (opt.)
+        2GBI tautomer. 0=absent, 1=taut1, 2=taut2.
+    inpdb : string (opt.)
+        Name of PDB file for reference instead of pdb.
+    skip : int (opt.)
+        Read every skip-th frame of each DCD, as inskip in analyzeDCD.tcl.
+    block_size : int (opt.)
+        Number of frames to superpose at a time.
+
+    """
+    top = read_psf(psf)
+    frame0 = read_pdb(pdb)[1]
+    if len(frame0) != len(top):
+        raise ValueError(f"{pdb} has {len(frame0)} atoms but {psf} has {len(top)}")
+    if inpdb:
+        ref_top, ref_coords = read_pdb(inpdb)
+    else:
+        ref_top, ref_coords = top, frame0
+
+    groups = hv1_groups(top, level, gbi)
+    ref_groups = hv1_groups(ref_top, level, gbi)
+    for i, (g, rg) in enumerate(zip(groups, ref_groups)):
+        if len(g) == 0 or len(g) != len(rg):
+            raise ValueError(f"Group {i} has {len(g)} atoms in the trajectory "
+                             f"but {len(rg)} in the reference")
+
+    # concatenate groups, with the fitting atoms first
+    idx = np.concatenate(groups)
+    ref = ref_coords[np.concatenate(ref_groups)]
+    starts = np.cumsum([0] + [len(g) for g in groups[:-1]])
+    nfit = len(groups[0])
+    lig = slice(starts[-1], None) if gbi in (1, 2) else None
+    prot = top.protein()
+
+    outfile = outprefix + '.dat'
+    with open(outfile, 'w') as f:
+        f.write("# Data from files:\n#  {}\n#  {}\n".format(psf, ' '.join(dcds)))
+        f.write("# Alignment reference: {}\n\n".format(inpdb or ''))
+        f.write("# RMSD (Angstroms)\n")
+        header = "# Win | TM bb"
+        if level in ('residue', 'resid'):
+            header += " | " + "\t\t".join(str(r) for r in RESIDUES)
+        elif level == 'segment':
+            header += " | S1\t\tS2\t\tS3\t\tS4"
+        if gbi in (1, 2):
+            header += "\t\t2GBI"
+        f.write(header + "\n")
+
+        def write_rows(frames, coords):
+            fit = superpose(coords, coords[:, :nfit], ref[:nfit])
+            rmsd = group_rmsd(fit, ref, starts)
+            f.write(''.join("{}\t{}\n".format(i, ''.join("\t%.4f" % v for v in row))
+                            for i, row in zip(frames, rmsd)))
+
+        write_rows([0], frame0[idx][None])
+        nframes = 1
+        for d in dcd.Trajectory(dcds).dcds:
+            print(f"Calculating RMSD for {d.filename}...")
+            # skip is applied to each DCD, as in mol addfile ... step
+            for first in range(0, len(d), block_size*skip):
+                xyz = d[first:first + block_size*skip:skip]
+                coords = np.asarray(xyz[:, idx], dtype=np.float64)
+                if lig is not None and d.has_cell and not inpdb:
+                    cells = np.array([d.box(i) for i in range(first, first + len(xyz)*skip, skip)])
+                    center = np.asarray(xyz[:, prot], dtype=np.float64).mean(axis=1)
+                    coords = wrap_near(coords, lig, center, cells)
+                write_rows(range(nframes, nframes + len(xyz)), coords)
+                nframes += len(xyz)
+
+    print(f"Wrote {outfile}")
+
+
+def wrap_near(coords, sel, center, cells):
+    """
+    Move selected atoms as a whole to the periodic image nearest a center,
+    for orthorhombic unit cells.
+
+    Parameters
+    ----------
+    coords : numpy array of shape (nframes, n, 3)
+    sel : slice
+        Atoms to move.
+    center : numpy array of shape (nframes, 3)
+    cells : numpy array of shape (nframes, 6)
+        Unit cells as (a, b, c, alpha, beta, gamma).
+
+    Returns
+    -------
+    numpy array of shape (nframes, n, 3)
+
+    """
+    box = cells[:, :3]
+    shift = coords[:, sel].mean(axis=1) - center
+    shift = box * np.round(shift / np.where(box > 0, box, np.inf))
+    coords = coords.copy()
+    coords[:, sel] -= shift[:, None]
+    return coords
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Measure RMSD of Hv1 over "
+        "a trajectory, as calc_rmsd_hv1 in analyzeDCD.tcl.")
+    parser.add_argument("-p", "--psf", required=True,
+                        help="Name of PSF file.")
+    parser.add_argument("-b", "--pdb", required=True,
+                        help="Name of PDB file loaded with the PSF, as frame 0.")
+    parser.add_argument("-d", "--dcds", nargs='+', required=True,
+                        help="Names of DCD files.")
+    parser.add_argument("-o", "--outprefix", required=True,
+                        help="Basename of the output .dat file.")
+    parser.add_argument("--level", default='segment',
+                        choices=['backbone', 'segment', 'residue', 'resid'],
+                        help="Level of detail of RMSD values.")
+    parser.add_argument("--gbi", type=int, default=0, choices=[0, 1, 2],
+                        help="2GBI tautomer. 0=absent, 1=taut1, 2=taut2.")
+    parser.add_argument("--ref",
+                        help="Name of PDB file for reference instead of the PDB "
+                             "loaded with the PSF.")
+    parser.add_argument("-s", "--skip", type=int, default=1,
+                        help="Read every skip-th frame of each DCD.")
+    parser.add_argument("--block", type=int, default=256,
+                        help="Number of frames to superpose at a time.")
+    args = parser.parse_args()
+
+    for f in [args.psf, args.pdb] + args.dcds:
+        if not os.path.exists(f):
+            parser.error(f"Input file {f} does not exist.")
+    calc_rmsd_hv1(args.outprefix, args.psf, args.pdb, args.dcds, args.level,
+                  args.gbi, args.ref, args.skip, args.block)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# scripts in the vmd/structural directory are imported as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
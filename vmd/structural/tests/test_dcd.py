@@ -0,0 +1,170 @@
+import struct
+import numpy as np
+import pytest
+import dcd
+
+NATOMS = 5
+DELTA = 0.04888821
+
+
+def record(data, endian):
+    return struct.pack(endian + 'i', len(data)) + data + struct.pack(endian + 'i', len(data))
+
+
+def write_dcd(filename, coords, cells=None, endian='<', nsavc=500):
+    """
+    Write a CHARMM-style DCD file with struct, with unit cells if given as
+    raw records of (A, gamma, B, beta, alpha, C).
+    """
+    icntrl = [0] * 20
+    icntrl[0], icntrl[2] = len(coords), nsavc
+    icntrl[10] = 0 if cells is None else 1
+    icntrl[19] = 24
+    header = (b'CORD' + struct.pack(endian + '9i', *icntrl[:9])
+              + struct.pack(endian + 'f', DELTA) + struct.pack(endian + '10i', *icntrl[10:]))
+    titles = struct.pack(endian + 'i', 2) + b'REMARKS test'.ljust(80) + b'REMARKS two'.ljust(80)
+    out = record(header, endian) + record(titles, endian)
+    out += record(struct.pack(endian + 'i', coords.shape[1]), endian)
+    for k, xyz in enumerate(coords):
+        if cells is not None:
+            out += record(np.asarray(cells[k], endian + 'f8').tobytes(), endian)
+        for c in range(3):
+            out += record(xyz[:, c].astype(endian + 'f4').tobytes(), endian)
+    with open(filename, 'wb') as f:
+        f.write(out)
+
+
+def make_coords(nframes, start=0):
+    # atom i of frame k is at (k, i, -k*i), offset by start
+    k = np.arange(start, start + nframes, dtype=np.float32)[:, None]
+    i = np.arange(NATOMS, dtype=np.float32)[None]
+    return np.stack(np.broadcast_arrays(k, i, -k*i), axis=-1).astype(np.float32)
+
+
+def make_cells(nframes, start=0, cosines=False):
+    k = np.arange(start, start + nframes, dtype=np.float64)
+    angle = np.cos(np.radians(90.)) if cosines else 90.
+    # A, gamma, B, beta, alpha, C
+    return np.stack([30. + k, np.full_like(k, angle), 40. + k,
+                     np.full_like(k, angle), np.full_like(k, angle), 50. + k], axis=1)
+
+
+@pytest.fixture
+def dcdfile(tmp_path):
+    filename = str(tmp_path / 'traj.dcd')
+    write_dcd(filename, make_coords(10), make_cells(10))
+    return filename
+
+
+@pytest.mark.parametrize('endian', ['<', '>'])
+def test_header(tmp_path, endian):
+    filename = str(tmp_path / 'traj.dcd')
+    write_dcd(filename, make_coords(3), endian=endian, nsavc=100)
+    d = dcd.DCD(filename)
+    assert (d.natoms, d.nframes, len(d)) == (NATOMS, 3, 3)
+    assert d.titles == ['REMARKS test', 'REMARKS two']
+    assert d.timestep == pytest.approx(DELTA * 100)
+    assert not d.has_cell and d.cells is None and d.box(0) is None
+    np.testing.assert_array_equal(d.coords, make_coords(3))
+
+
+def test_zero_copy_views(dcdfile):
+    d = dcd.DCD(dcdfile)
+    expected = make_coords(10)
+    for index in [0, 3, 9, -1]:
+        np.testing.assert_array_equal(d[index], expected[index])
+    for s in [slice(None), slice(0, 10, 3), slice(1, 8, 2), slice(9, None, -4)]:
+        xyz = d[s]
+        assert np.shares_memory(xyz, d._mm)
+        np.testing.assert_array_equal(xyz, expected[s])
+    assert d[5:5].shape == (0, NATOMS, 3)
+    assert not d.coords.flags.writeable
+
+
+def test_unit_cell(dcdfile, tmp_path):
+    d = dcd.DCD(dcdfile)
+    assert d.has_cell
+    np.testing.assert_array_equal(d.cells, make_cells(10))
+    np.testing.assert_allclose(d.box(4), [34., 44., 54., 90., 90., 90.])
+    # coordinates come after the cell record
+    np.testing.assert_array_equal(d[4], make_coords(10)[4])
+
+    # angles written as cosines
+    filename = str(tmp_path / 'cos.dcd')
+    write_dcd(filename, make_coords(2), make_cells(2, cosines=True))
+    np.testing.assert_allclose(dcd.DCD(filename).box(1), [31., 41., 51., 90., 90., 90.])
+
+
+def test_truncated_last_frame(dcdfile):
+    with open(dcdfile, 'r+b') as f:
+        f.seek(0, 2)
+        f.truncate(f.tell() - 10)
+    d = dcd.DCD(dcdfile)
+    assert len(d) == 9
+    np.testing.assert_array_equal(d[-1], make_coords(10)[8])
+
+
+def test_not_a_dcd(tmp_path):
+    filename = str(tmp_path / 'bad.dcd')
+    with open(filename, 'wb') as f:
+        f.write(b'\0' * 200)
+    with pytest.raises(ValueError):
+        dcd.DCD(filename)
+
+
+@pytest.mark.parametrize('first,last,step,expected', [
+    (0, -1, 1, range(10)), (0, 9, 3, [0, 3, 6, 9]), (2, 7, 2, [2, 4, 6]),
+    (5, 100, 1, range(5, 10)), (0, 0, 1, [0])])
+def test_frame_range(first, last, step, expected):
+    assert list(dcd.frame_range(10, first, last, step)) == list(expected)
+
+
+@pytest.fixture
+def traj(tmp_path):
+    # files of 4, 1, and 6 frames, numbered consecutively
+    filenames = []
+    start = 0
+    for i, n in enumerate([4, 1, 6]):
+        filenames.append(str(tmp_path / 'win{:02d}.dcd'.format(i)))
+        write_dcd(filenames[-1], make_coords(n, start), make_cells(n, start))
+        start += n
+    return dcd.Trajectory(filenames)
+
+
+def test_trajectory_indexing(traj):
+    expected = make_coords(11)
+    assert len(traj) == 11
+    for index in [0, 3, 4, 5, 10, -1, -7]:
+        np.testing.assert_array_equal(traj[index], expected[index])
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 3, 100])
+@pytest.mark.parametrize('first,last,step', [
+    (0, -1, 1), (0, -1, 2), (0, -1, 3), (1, 9, 4), (3, 5, 1), (4, 4, 1), (6, -1, 5)])
+def test_blocks(traj, block_size, first, last, step):
+    expected = list(dcd.frame_range(11, first, last, step))
+    coords, cells = make_coords(11), make_cells(11)
+
+    indices = []
+    for idx, xyz, box in traj.blocks(block_size, first, last, step):
+        assert 0 < len(idx) <= block_size
+        assert any(np.shares_memory(xyz, d._mm) for d in traj.dcds)
+        np.testing.assert_array_equal(xyz, coords[idx])
+        np.testing.assert_allclose(box[:, :3], cells[idx][:, [0, 2, 5]])
+        np.testing.assert_allclose(box[:, 3:], 90.)
+        indices.extend(idx)
+    assert indices == expected
+
+    frames = list(traj.frames(first, last, step))
+    assert [i for i, _, _ in frames] == expected
+    for i, xyz, box in frames:
+        np.testing.assert_array_equal(xyz, coords[i])
+        np.testing.assert_allclose(box[:3], cells[i, [0, 2, 5]])
+
+
+def test_trajectory_atom_mismatch(tmp_path):
+    a, b = str(tmp_path / 'a.dcd'), str(tmp_path / 'b.dcd')
+    write_dcd(a, make_coords(2))
+    write_dcd(b, make_coords(2)[:, :3])
+    with pytest.raises(ValueError):
+        dcd.Trajectory([a, b])
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from rmsd_hv1 import superpose, group_rmsd, wrap_near
+
+
+def rotation(seed):
+    q = np.random.default_rng(seed).normal(size=4)
+    w, x, y, z = q / np.linalg.norm(q)
+    return np.array([[1-2*(y*y+z*z), 2*(x*y-z*w), 2*(x*z+y*w)],
+                     [2*(x*y+z*w), 1-2*(x*x+z*z), 2*(y*z-x*w)],
+                     [2*(x*z-y*w), 2*(y*z+x*w), 1-2*(x*x+y*y)]])
+
+
+@pytest.fixture
+def ref():
+    return np.random.default_rng(0).normal(scale=5., size=(30, 3))
+
+
+def test_superpose_rigid_copies(ref):
+    frames = np.array([ref @ rotation(k).T + [k, -2.*k, 10.] for k in range(5)])
+    fit = superpose(frames, frames[:, :10], ref[:10])
+    np.testing.assert_allclose(fit, np.broadcast_to(ref, fit.shape), atol=1e-10)
+    np.testing.assert_allclose(group_rmsd(fit, ref, [0, 10, 25]), 0., atol=1e-10)
+
+
+def test_superpose_keeps_proper_rotation(ref):
+    # a mirror image can only be fit with a reflection, which is not allowed
+    mirror = ref * [1., 1., -1.]
+    fit = superpose(mirror[None], mirror[None], ref)
+    assert group_rmsd(fit, ref, [0])[0, 0] > 1.
+    np.testing.assert_allclose(np.linalg.norm(fit[0] - fit[0].mean(axis=0), axis=1),
+                               np.linalg.norm(ref - ref.mean(axis=0), axis=1))
+
+
+def test_superpose_known_offset(ref):
+    # moving atoms that are not fit keeps their offset from the reference
+    frames = (ref @ rotation(3).T + 7.)[None]
+    moved = frames.copy()
+    moved[:, 20:] += rotation(3) @ [3., 4., 0.]
+    fit = superpose(moved, moved[:, :20], ref[:20])
+    rmsd = group_rmsd(fit, ref, [0, 20])
+    np.testing.assert_allclose(rmsd, [[0., 5.]], atol=1e-10)
+
+
+def test_group_rmsd_known_offset(ref):
+    coords = np.array([ref, ref + [3., 4., 0.], ref])
+    coords[2, 10:] += [0., 0., 2.]
+    rmsd = group_rmsd(coords, ref, [0, 10, 12])
+    np.testing.assert_allclose(rmsd, [[0., 0., 0.], [5., 5., 5.], [0., 2., 2.]])
+    # groups of different sizes
+    np.testing.assert_allclose(group_rmsd(coords[2:], ref, [0, 20])[0],
+                               [np.sqrt(10*4./20), 2.])
+
+
+def test_wrap_near(ref):
+    cells = np.array([[40., 50., 60., 90., 90., 90.]] * 3)
+    center = np.zeros((3, 3))
+    coords = np.array([ref, ref, ref])
+    lig = slice(25, None)
+    coords[1, lig] += [40., -50., 0.]
+    coords[2, lig] += [0., 0., 120.]
+    wrapped = wrap_near(coords, lig, center, cells)
+    np.testing.assert_allclose(wrapped, np.broadcast_to(ref, wrapped.shape))
+    # other atoms and the input are not changed
+    np.testing.assert_array_equal(coords[1, lig], ref[lig] + [40., -50., 0.])
+
+
+def test_wrap_near_known_offset():
+    coords = np.zeros((1, 4, 3))
+    coords[0, 2:] = [[21., 0., 0.], [23., 2., 0.]]
+    cells = np.array([[30., 30., 30., 90., 90., 90.]])
+    wrapped = wrap_near(coords, slice(2, None), np.zeros((1, 3)), cells)
+    np.testing.assert_allclose(wrapped[0, 2:], [[-9., 0., 0.], [-7., 2., 0.]])
+    np.testing.assert_array_equal(wrapped[0, :2], 0.)
+    # zero box lengths, as written by some programs, are not wrapped
+    cells[0, :3] = 0.
+    np.testing.assert_array_equal(wrap_near(coords, slice(2, None), np.zeros((1, 3)), cells),
+                                  coords)
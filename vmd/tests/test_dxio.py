@@ -0,0 +1,34 @@
+import os
+import numpy as np
+import pytest
+import dxio
+
+
+@pytest.fixture
+def dxfile(tmp_path):
+    filename = str(tmp_path / 'grid.dx')
+    grid = np.arange(24, dtype=np.float32).reshape(2, 3, 4)
+    dxio.write_dx(filename, grid, [1., 2., 3.], [0.5, 0.5, 0.5])
+    return filename, grid
+
+
+def test_cache_round_trip(dxfile):
+    filename, grid = dxfile
+    np.testing.assert_array_equal(dxio.read_dx(filename, cache=True).grid, grid)
+    dx = dxio.read_dx(filename, cache=True)
+    assert isinstance(dx.grid, np.memmap)
+    np.testing.assert_array_equal(dx.grid, grid)
+
+
+@pytest.mark.parametrize('damage', ['delete', 'truncate'])
+def test_broken_cache_is_rebuilt(dxfile, damage):
+    filename, grid = dxfile
+    dxio.read_dx(filename, cache=True)
+    npyname = filename + '.cache.npy'
+    if damage == 'delete':
+        os.remove(npyname)
+    else:
+        with open(npyname, 'r+b') as f:
+            f.truncate(40)
+    np.testing.assert_array_equal(dxio.read_dx(filename, cache=True).grid, grid)
+    np.testing.assert_array_equal(np.load(npyname), grid)